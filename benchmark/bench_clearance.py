@@ -0,0 +1,55 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+
+from clearance import ClearanceEngine
+from path import Trajectory
+
+
+def terrain(grid, size=1000., relief=20.):
+    # grid x grid heightfield, two triangles per cell
+    x, y = np.meshgrid(np.linspace(0., size, grid), np.linspace(0., size, grid))
+    z = relief * np.sin(x / 50.) * np.cos(y / 70.)
+    vertices = np.stack([x.ravel(), y.ravel(), z.ravel()], axis=1)
+    index = np.arange(grid * grid).reshape(grid, grid)
+    a, b = index[:-1, :-1].ravel(), index[:-1, 1:].ravel()
+    c, d = index[1:, :-1].ravel(), index[1:, 1:].ravel()
+    return vertices, np.concatenate([np.stack([a, b, d], axis=1), np.stack([a, d, c], axis=1)])
+
+
+def survey(waypoints, size=1000., height=30.):
+    # a weaving flight over the terrain that dips down to height - 10
+    s = np.linspace(0., 1., waypoints)
+    columns = np.zeros((6, waypoints))
+    columns[0] = size * (.1 + .8 * s)
+    columns[1] = size * (.5 + .4 * np.sin(s * 20.))
+    columns[2] = height + 10. * np.sin(s * 200.)
+    return Trajectory.from_columns(np.array(['%06d.jpg' % i for i in range(waypoints)]), columns)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Path clearance against a synthetic terrain')
+    parser.add_argument('--waypoints', type=int, default=100000)
+    parser.add_argument('--grid', type=int, default=708, help='terrain grid size, 708 gives 1M faces')
+    parser.add_argument('--threshold', type=float, default=22.)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    vertices, faces = terrain(args.grid)
+    trajectory = survey(args.waypoints)
+    print('%d faces, %d waypoints' % (len(faces), args.waypoints))
+
+    start = time.perf_counter()
+    engine = ClearanceEngine(vertices, faces)
+    print('build %.1f s' % (time.perf_counter() - start))
+    start = time.perf_counter()
+    result = engine.check(trajectory, args.threshold, processes=args.processes)
+    elapsed = time.perf_counter() - start
+    print('%.1f s, %.0f waypoints/s, min waypoint %.2f m, min segment %.2f m, %d + %d violations' % (
+        elapsed, args.waypoints / elapsed, result['waypoint'].min(), result['segment'].min(),
+        len(result['waypoint_violations']), len(result['segment_violations'])))
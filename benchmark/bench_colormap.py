@@ -0,0 +1,30 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pyqtgraph as pg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+
+from colormap import ScalarColormap
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scalar to RGBA mapping of a large point cloud')
+    parser.add_argument('--points', type=int, default=20000000)
+    parser.add_argument('--colormap', default='viridis')
+    args = parser.parse_args()
+
+    values = np.random.default_rng(0).random(args.points).astype(np.float32)
+    for dtype in (np.float32, np.uint8):
+        colormap = ScalarColormap(args.colormap)
+        out = np.empty((args.points, 4), dtype=dtype)
+        colormap.table(dtype)
+        start = time.perf_counter()
+        colormap.map(values, out=out)
+        print('%-8s %.3f s' % (np.dtype(dtype).name, time.perf_counter() - start))
+    start = time.perf_counter()
+    pg.colormap.get(args.colormap).map(values, mode='float')
+    print('%-8s %.3f s' % ('pyqtgraph', time.perf_counter() - start))
@@ -0,0 +1,39 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+
+from PySide6.QtWidgets import QApplication
+
+import scenes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Turning camera frustums on for a survey mission')
+    parser.add_argument('--images', type=int, nargs='+', default=[2000, 20000, 100000])
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv[:1])
+    from MeshViewerWidget import MeshViewerWidget, ViewerPathItemContainer
+    viewer = MeshViewerWidget()
+    with tempfile.TemporaryDirectory() as tmp:
+        for images in args.images:
+            log_path = os.path.join(tmp, 'mission%d.log' % images)
+            scenes.write_smith18_log(log_path, images)
+            container = ViewerPathItemContainer(log_path)
+            viewer.addItemContainer(container)
+            for footprints in (False, True):
+                start = time.perf_counter()
+                container.set_frustums(depth=20., footprints=footprints, ground=0.)
+                shown = time.perf_counter() - start
+                vertices = sum(len(item.pos) if hasattr(item, 'pos') else len(item.opts['meshdata'].vertexes())
+                               for item in container.frustum_items)
+                start = time.perf_counter()
+                container.clear_frustums()
+                print('%7d images  footprints %-5s  on %.3f s  off %.3f s  %d items  %d vertices' % (
+                    images, footprints, shown, time.perf_counter() - start, 1 + footprints, vertices))
+            viewer.removeItemContainer(container)
+    os._exit(0)
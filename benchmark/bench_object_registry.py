@@ -0,0 +1,85 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+
+from PySide6.QtWidgets import QApplication
+
+# callbacks of the object tree, the time spent in each is summed up
+CALLBACKS = ['on_objectTree_change', 'on_object_added', 'on_object_removed', 'on_objects_changed',
+             'on_select_mesh', 'on_select_sample', 'on_select_path']
+spent = defaultdict(float)
+calls = defaultdict(int)
+
+
+def timed(name, fn):
+    def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            spent[name] += time.perf_counter() - start
+            calls[name] += 1
+    return wrapper
+
+
+def report(title, elapsed):
+    print('%s: %.3f s, %.3f s in callbacks' % (title, elapsed, sum(spent.values())))
+    for name in CALLBACKS:
+        if calls[name]:
+            print('    %-22s %6d calls %8.3f s' % (name, calls[name], spent[name]))
+    spent.clear()
+    calls.clear()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Object tree callbacks with many loaded paths')
+    parser.add_argument('--objects', type=int, default=1000)
+    parser.add_argument('--waypoints', type=int, default=10)
+    parser.add_argument('--batch', action='store_true', help='load and hide in one transaction each')
+    args = parser.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QApplication(sys.argv)
+    import main_windows
+    from MeshViewerWidget import ViewerPathItemContainer
+    for name in CALLBACKS:
+        setattr(main_windows.MainWindow, name, timed(name, getattr(main_windows.MainWindow, name)))
+    window = main_windows.MainWindow()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, 'path.log')
+        with open(log_path, 'w') as f:
+            for i in range(args.waypoints):
+                f.write('%05d.jpg,%d,0,3000,-90,0,0\n' % (i, 100 * i))
+        containers = [ViewerPathItemContainer(log_path, build_item=False) for _ in range(args.objects)]
+
+        start = time.perf_counter()
+        if args.batch:
+            window.object_objeGroupParam.addLoadedMany([('Path', container) for container in containers])
+        else:
+            for container in containers:
+                window.object_objeGroupParam.addLoaded('Path', container)
+        report('load %d paths' % args.objects, time.perf_counter() - start)
+
+        objects = window.registry.of_type('Path')
+        start = time.perf_counter()
+        for obj in objects[::max(1, len(objects) // 100)]:
+            window.object_options.param('selected path').setValue(obj.object_id)
+        report('select 100 paths', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        if args.batch:
+            window.object_objeGroupParam.setShown(objects[::max(1, len(objects) // 100)], False)
+        else:
+            for obj in objects[::max(1, len(objects) // 100)]:
+                obj['show'] = False
+        report('hide 100 paths', time.perf_counter() - start)
+
+        start = time.perf_counter()
+        window.on_clear_objects()
+        report('clear', time.perf_counter() - start)
@@ -0,0 +1,36 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+
+import scenes
+from path import Trajectory
+from playback import PoseTrack
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Building a playback track and sampling poses, in order and scrubbing')
+    parser.add_argument('--waypoints', type=int, nargs='+', default=[10**3, 10**4, 10**5, 10**6])
+    parser.add_argument('--samples', type=int, default=100000)
+    args = parser.parse_args()
+
+    out = np.empty(7)
+    for count in args.waypoints:
+        poses = scenes.survey_poses(count)
+        trajectory = Trajectory.from_columns(np.array(['%08d.jpg' % i for i in range(count)]), poses.T.copy())
+        start = time.perf_counter()
+        track = PoseTrack(trajectory)
+        built = time.perf_counter() - start
+        # frames of a playback, then jumps anywhere as a dragged slider makes them
+        for name, times in (('playback', np.linspace(0., track.duration, args.samples)),
+                            ('scrub', np.random.default_rng(0).uniform(0., track.duration, args.samples))):
+            times = times.tolist()
+            start = time.perf_counter()
+            for t in times:
+                track.pose(t, out)
+            print('%9d waypoints  build %7.3f s  %-8s %6.2f us / pose' % (
+                count, built, name, (time.perf_counter() - start) / args.samples * 1e6))
@@ -0,0 +1,81 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src')
+
+
+def write_cloud(path, n, seed=0):
+    rng = np.random.default_rng(seed)
+    dtype = np.dtype([('x', '<f4'), ('y', '<f4'), ('z', '<f4'),
+                      ('red', 'u1'), ('green', 'u1'), ('blue', 'u1')])
+    data = np.empty(n, dtype=dtype)
+    for axis in 'xyz':
+        data[axis] = rng.uniform(0., 1000., n)
+    for channel in ('red', 'green', 'blue'):
+        data[channel] = rng.integers(0, 256, n)
+    with open(path, 'wb') as f:
+        f.write(('ply\nformat binary_little_endian 1.0\nelement vertex %d\n'
+                 'property float x\nproperty float y\nproperty float z\n'
+                 'property uchar red\nproperty uchar green\nproperty uchar blue\n'
+                 'end_header\n' % n).encode())
+        data.tofile(f)
+
+
+def rss():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def child(reader, path):
+    # runs in its own process so the numbers belong to one reader only;
+    # resident memory is read while the arrays are still held, heap peak
+    # comes from tracemalloc (the mapping itself is not a heap allocation)
+    sys.path.insert(0, SRC_DIR)
+    import tracemalloc
+    if reader == 'mmap':
+        from ply import PlyData
+    else:
+        import trimesh
+    base = rss()
+    tracemalloc.start()
+    start = time.perf_counter()
+    if reader == 'mmap':
+        vertices = PlyData(path).vertices
+    else:
+        vertices = trimesh.load_mesh(path).vertices
+    checksum = float(vertices[:, 2].sum(dtype=np.float64))
+    elapsed = time.perf_counter() - start
+    _, heap_peak = tracemalloc.get_traced_memory()
+    print('%f %d %d %f' % (elapsed, rss() - base, heap_peak, checksum))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description='Memory-mapped PLY reader against trimesh.load_mesh')
+    parser.add_argument('--points', type=int, nargs='+', default=[1000000, 10000000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.points:
+            path = os.path.join(tmp, 'cloud_%d.ply' % n)
+            write_cloud(path, n)
+            size = os.path.getsize(path)
+            line = 'points %d (%.1f MB file):' % (n, size / 2**20)
+            for reader in ('trimesh', 'mmap'):
+                out = subprocess.run([sys.executable, __file__, '--child', reader, path],
+                                     capture_output=True, text=True, check=True).stdout.split()
+                line += '  %s %.3f s, RSS +%.1f MB, heap peak %.1f MB' % (
+                    reader, float(out[0]), int(out[1]) / 2**20, int(out[2]) / 2**20)
+            print(line)
@@ -0,0 +1,105 @@
+import argparse
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+from octree import PointOctree, frustum_planes
+
+
+def synthetic_cloud(n, seed=0):
+    # a 1 km square site with a few tall blocks, roughly what a city scan looks like
+    rng = np.random.default_rng(seed)
+    points = rng.uniform((0., 0., 0.), (1000., 1000., 5.), (n, 3))
+    block = rng.random(n) < 0.4
+    points[block, 2] = rng.uniform(0., 80., block.sum())
+    return points
+
+
+def perspective(fov, aspect, near, far):
+    t = 1 / math.tan(math.radians(fov) / 2)
+    return np.array([
+        [t / aspect, 0, 0, 0],
+        [0, t, 0, 0],
+        [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+        [0, 0, -1, 0]])
+
+
+def look_at(eye, center, up=(0., 0., 1.)):
+    f = center - eye
+    f /= np.linalg.norm(f)
+    s = np.cross(f, up)
+    s /= np.linalg.norm(s)
+    u = np.cross(s, f)
+    view = np.eye(4)
+    view[0, :3], view[1, :3], view[2, :3] = s, u, -f
+    view[:3, 3] = -view[:3, :3] @ eye
+    return view
+
+
+def cameras(height=720, fov=60.):
+    center = np.array((500., 500., 0.))
+    projection = perspective(fov, 16 / 9, 1., 10000.)
+    pixel_scale = height / (2 * math.tan(math.radians(fov) / 2))
+    for distance in (2000., 600., 150.):
+        eye = center + np.array((0., -distance, distance * 0.6))
+        yield distance, frustum_planes(projection @ look_at(eye, center)), eye, pixel_scale
+
+
+def gl_frame_time(points, colors, frames=20):
+    # optional, needs a working OpenGL context
+    from PySide6.QtWidgets import QApplication
+    import pyqtgraph.opengl as gl
+    app = QApplication.instance() or QApplication(sys.argv)
+    view = gl.GLViewWidget()
+    view.resize(1280, 720)
+    view.show()
+    item = gl.GLScatterPlotItem(pos=points, color=colors, size=2., pxMode=False)
+    view.addItem(item)
+    view.grabFramebuffer()
+    start = time.perf_counter()
+    for _ in range(frames):
+        view.grabFramebuffer()
+    elapsed = (time.perf_counter() - start) / frames
+    view.close()
+    return elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Point cloud octree / point budget benchmark')
+    parser.add_argument('--points', type=int, nargs='+', default=[100000, 1000000, 10000000])
+    parser.add_argument('--budget', type=int, default=2000000)
+    parser.add_argument('--gl', action='store_true', help='also time real frames, needs an OpenGL context')
+    args = parser.parse_args()
+
+    for n in args.points:
+        points = synthetic_cloud(n)
+        # what ViewerSampleItemContainer keeps and sends to GL without an octree
+        colors = np.tile(np.array((1., 0., 0., 1.)), (n, 1))
+        single_bytes = points.astype(np.float32).nbytes + colors.nbytes
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        octree = PointOctree(points)
+        build_t = time.perf_counter() - start
+        _, build_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print('points %d: octree depth %d, build %.3f s, peak %.1f MB, resident %.1f MB, single item %.1f MB per frame' % (
+            n, octree.depth, build_t, build_peak / 2**20, octree.nbytes() / 2**20, single_bytes / 2**20))
+        for distance, planes, eye, pixel_scale in cameras():
+            start = time.perf_counter()
+            index = octree.select(planes, eye, args.budget, pixel_scale)
+            select_t = time.perf_counter() - start
+            frame_bytes = len(index) * (3 * 4 + 4 * 8)
+            line = '  camera %6.0f m: select %7.2f ms, %9d points, %7.1f MB per frame' % (
+                distance, select_t * 1000, len(index), frame_bytes / 2**20)
+            if args.gl:
+                single = gl_frame_time(points, colors)
+                budgeted = gl_frame_time(octree.points[index], colors[octree.order[index]])
+                line += ', frame %.1f ms single / %.1f ms budget' % (single * 1000, budgeted * 1000)
+            print(line)
@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+
+from profiling import profiler, profiled
+
+
+def callback(param, value):
+    return value
+
+
+@profiled('callback')
+def profiled_callback(param, value):
+    return value
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(None, i)
+    return (time.perf_counter() - start) / calls
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cost of the profiling hooks on a tree callback, off and recording')
+    parser.add_argument('--calls', type=int, default=1000000)
+    args = parser.parse_args()
+
+    plain = per_call(callback, args.calls)
+    profiler.set_enabled(False)
+    off = per_call(profiled_callback, args.calls)
+    profiler.set_enabled(True)
+    recording = per_call(profiled_callback, args.calls)
+    start = time.perf_counter()
+    for i in range(args.calls // 100):
+        profiler.frame(0.01, 10, 10, 1 << 20)
+    frame = (time.perf_counter() - start) / (args.calls // 100)
+    print('plain call     %7.3f us' % (plain * 1e6))
+    print('hook off       %7.3f us (+%.3f)' % (off * 1e6, (off - plain) * 1e6))
+    print('hook recording %7.3f us (+%.3f)' % (recording * 1e6, (recording - plain) * 1e6))
+    print('frame record   %7.3f us' % (frame * 1e6))
@@ -0,0 +1,86 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+
+import project
+from loader import restore_container
+from MeshViewerWidget import (ViewerMeshItemContainer, ViewerPathItemContainer,
+                              read_mesh_arrays, read_trajectory_arrays)
+
+
+def write_mesh(path, grid, seed=0):
+    # an ASCII OBJ terrain, the kind of file trimesh has to parse line by line
+    rng = np.random.default_rng(seed)
+    x, y = np.meshgrid(np.arange(grid, dtype=np.float64), np.arange(grid, dtype=np.float64))
+    vertices = np.column_stack((x.ravel(), y.ravel(), rng.normal(0., 1., grid * grid)))
+    corner = (np.arange(grid - 1)[None, :] + grid * np.arange(grid - 1)[:, None]).ravel()
+    faces = np.concatenate((np.column_stack((corner, corner + 1, corner + grid)),
+                            np.column_stack((corner + 1, corner + grid + 1, corner + grid))))
+    with open(path, 'w') as f:
+        np.savetxt(f, vertices, fmt='v %.4f %.4f %.4f')
+        np.savetxt(f, faces + 1, fmt='f %d %d %d')
+
+
+def write_log(path, n, seed=0):
+    rng = np.random.default_rng(seed)
+    pose = rng.uniform(-5000., 5000., (n, 6))
+    with open(path, 'w') as f:
+        for i in range(n):
+            f.write('%08d.jpg,%.4f,%.4f,%.4f,%.4f,%.4f,%.4f\n' % (i, *pose[i]))
+
+
+def state_of(items, embed):
+    # what MainWindow.project_state records, without a window
+    return dict(objects=[dict(type=typ, path=container.file_path, show=True, options=container.options(),
+                              style=container.style(), arrays=container.embedded_arrays() if embed else None)
+                         for typ, container in items],
+                selection={}, options={})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reopening a session from a project file against parsing its files')
+    parser.add_argument('--grid', type=int, default=500, help='mesh vertices per side')
+    parser.add_argument('--waypoints', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mesh_path, log_path = os.path.join(tmp, 'terrain.obj'), os.path.join(tmp, 'path.log')
+        write_mesh(mesh_path, args.grid)
+        write_log(log_path, args.waypoints)
+
+        # reading the arrays is what a project saves, building the GL buffers
+        # from them (marker normals, LOD levels) is the same either way
+        start = time.perf_counter()
+        arrays = [read_mesh_arrays(mesh_path), read_trajectory_arrays(log_path)]
+        read = time.perf_counter() - start
+        start = time.perf_counter()
+        items = [('Mesh', ViewerMeshItemContainer(mesh_path, build_item=False, arrays=arrays[0])),
+                 ('Path', ViewerPathItemContainer(log_path, build_item=False, arrays=arrays[1]))]
+        print('%-12s %8s %8.3f s read %8.3f s containers' % ('files', '', read, time.perf_counter() - start))
+
+        for embed in (False, True):
+            project_path = os.path.join(tmp, 'session%d.dcproj' % embed)
+            start = time.perf_counter()
+            project.write_project(project_path, state_of(items, embed))
+            saved = time.perf_counter() - start
+            start = time.perf_counter()
+            state = project.read_project(project_path)
+            entries = state['objects']
+            for entry in entries:
+                # paths only: the files are parsed as when loading them
+                if entry['arrays'] is None:
+                    entry['arrays'] = read_trajectory_arrays(entry['path']) if entry['type'] == 'Path' \
+                        else read_mesh_arrays(entry['path'])
+            read = time.perf_counter() - start
+            start = time.perf_counter()
+            for entry in entries:
+                restore_container(entry)
+            print('%-12s %6.1f MB %8.3f s read %8.3f s containers, saved in %.3f s' % (
+                'embedded' if embed else 'paths only', os.path.getsize(project_path) / 2**20,
+                read, time.perf_counter() - start, saved))
@@ -0,0 +1,41 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+
+from path import Trajectory
+from path_simplify import simplify
+
+
+def lawnmower(nodes, lines=50, width=1000., spacing=20., noise=.02, seed=0):
+    # a survey flown back and forth, logged densely with some GPS and heading jitter
+    rng = np.random.default_rng(seed)
+    s = np.linspace(0., 1., nodes)
+    line = np.floor(s * lines)
+    columns = np.zeros((6, nodes))
+    columns[0] = np.where(line % 2 == 0, (s * lines) % 1., 1. - (s * lines) % 1.) * width
+    columns[1] = line * spacing
+    columns[2] = 40. + rng.normal(0., noise, nodes)
+    columns[3] = -90.
+    columns[5] = np.where(line % 2 == 0, 0., 180.) + rng.normal(0., 10 * noise, nodes)
+    return Trajectory.from_columns(np.array(['%08d.jpg' % i for i in range(nodes)]), columns)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='6-DoF Douglas-Peucker on a dense survey log')
+    parser.add_argument('--nodes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--position-tolerance', type=float, default=.1)
+    parser.add_argument('--angle-tolerance', type=float, default=1.)
+    args = parser.parse_args()
+
+    print('%10s %10s %10s %12s' % ('nodes', 'kept', 's', 'nodes/s'))
+    for n in args.nodes:
+        trajectory = lawnmower(n)
+        start = time.perf_counter()
+        reduced, index = simplify(trajectory, args.position_tolerance, args.angle_tolerance)
+        elapsed = time.perf_counter() - start
+        print('%10d %10d %10.3f %12.0f' % (n, reduced.len(), elapsed, n / elapsed))
@@ -0,0 +1,67 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src')
+# seconds from interpreter start to the first painted frame of the main
+# window, median of the runs (0.86 s on a single core VM with the offscreen
+# platform); lower it when startup gets faster
+BUDGET = 1.0
+
+
+def child():
+    # one cold start in a fresh interpreter, times are from before the first import
+    start = time.perf_counter()
+    sys.path.insert(0, SRC_DIR)
+    from PySide6.QtCore import QObject, QEvent, QTimer
+    from PySide6.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    import main_windows
+    imported = time.perf_counter()
+    window = main_windows.MainWindow()
+    built = time.perf_counter()
+    painted = []
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and not painted:
+                painted.append(time.perf_counter())
+                QTimer.singleShot(0, app.quit)
+            return False
+
+    first_paint = FirstPaint()
+    app.installEventFilter(first_paint)
+    window.show()
+    QTimer.singleShot(30000, app.quit)
+    app.exec()
+    print('%f %f %f' % (imported - start, built - start, (painted or [float('nan')])[0] - start))
+    sys.stdout.flush()
+    # the window is not torn down, only startup is measured
+    os._exit(0)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 2 and sys.argv[1] == '--child':
+        child()
+
+    parser = argparse.ArgumentParser(description='Cold start: imports and time to the first frame of the main window')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=BUDGET, help='seconds to the first frame')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    env.setdefault('LIBGL_ALWAYS_SOFTWARE', '1')
+    runs = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, __file__, '--child'], env=env,
+                             capture_output=True, text=True, check=True).stdout.split()
+        wall = time.perf_counter() - start
+        runs.append([float(v) for v in out] + [wall])
+        print('imports %.3f s  window %.3f s  first frame %.3f s  process %.3f s' % tuple(runs[-1]))
+    first_frame = sorted(run[2] for run in runs)[len(runs) // 2]
+    print('median first frame %.3f s, budget %.3f s' % (first_frame, args.budget))
+    sys.exit(0 if first_frame <= args.budget else 1)
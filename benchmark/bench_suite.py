@@ -0,0 +1,234 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, '../src')
+sys.path.insert(0, SRC_DIR)
+
+import scenes
+
+# main window callbacks timed in the tree case
+CALLBACKS = ['on_objectTree_change', 'on_objects_changed', 'on_object_added', 'on_object_removed',
+             'on_select_mesh', 'on_select_sample', 'on_select_path']
+# element counts every case is run at unless --scales says otherwise
+DEFAULT_SCALES = dict(trajectory=[10**3, 10**4, 10**5, 10**6], mesh=[10**3, 10**4, 10**5, 10**6],
+                      points=[10**3, 10**4, 10**5, 10**6], path=[10**3, 10**4, 10**5])
+# objects in the tree case, PySide6 6.12 aborts on a refcount error at about 100
+DEFAULT_OBJECTS = [10, 50]
+
+
+def timed(stages, name, fn):
+    start = time.perf_counter()
+    result = fn()
+    stages[name] = time.perf_counter() - start
+    return result
+
+
+def viewer():
+    from MeshViewerWidget import MeshViewerWidget
+    widget = MeshViewerWidget()
+    widget.resize(800, 600)
+    widget.show()
+    return widget
+
+
+def frame(stages, widget):
+    # one rendered frame, left out where there is no GL context (e.g. offscreen without Mesa)
+    image = timed(stages, 'frame', widget.grabFramebuffer)
+    if image.isNull() or image.width() == 0:
+        del stages['frame']
+
+
+def container_stages(container_class, path, colors):
+    # what showing one file costs, stage by stage
+    stages = {}
+    widget = viewer()
+    container = timed(stages, 'load', lambda: container_class(path, build_item=False))
+    timed(stages, 'set_item', container.set_item)
+    if colors is not None:
+        count = colors(container)
+        rgba = np.random.default_rng(0).random((count, 4)).astype(np.float32)
+        timed(stages, 'set_color', lambda: container.set_color(rgba))
+        if container.item is not None:
+            # the sample container writes the new colors into the drawn buffer itself
+            getattr(container, 'refresh_color', lambda: None)()
+    timed(stages, 'addItemContainer', lambda: widget.addItemContainer(container))
+    frame(stages, widget)
+    timed(stages, 'removeItemContainer', lambda: widget.removeItemContainer(container))
+    return stages
+
+
+def case_trajectory(tmp, scale):
+    from path import Trajectory
+    log_path = os.path.join(tmp, 'survey.log')
+    scenes.write_smith18_log(log_path, scale)
+    stages = {}
+    timed(stages, 'load_smith18_path', lambda: Trajectory().load_smith18_path(log_path))
+    return stages
+
+
+def case_mesh(tmp, scale):
+    from MeshViewerWidget import ViewerMeshItemContainer
+    mesh_path = os.path.join(tmp, 'terrain.ply')
+    scenes.write_mesh_ply(mesh_path, scale)
+    return container_stages(ViewerMeshItemContainer, mesh_path, None)
+
+
+def case_points(tmp, scale):
+    from MeshViewerWidget import ViewerSampleItemContainer
+    cloud_path = os.path.join(tmp, 'cloud.ply')
+    scenes.write_cloud_ply(cloud_path, scale)
+    return container_stages(ViewerSampleItemContainer, cloud_path, lambda c: len(c.sample.vertices))
+
+
+def case_path(tmp, scale):
+    from MeshViewerWidget import ViewerPathItemContainer
+    log_path = os.path.join(tmp, 'survey.log')
+    scenes.write_smith18_log(log_path, scale)
+    return container_stages(ViewerPathItemContainer, log_path, lambda c: c.path.len())
+
+
+def case_tree(tmp, scale):
+    # scale paths through the object tree: batched load, selection, visibility and clear
+    import main_windows
+    from MeshViewerWidget import ViewerPathItemContainer
+    spent = dict((name, 0.) for name in CALLBACKS)
+
+    def wrap(name, fn):
+        def wrapper(*args):
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                spent[name] += time.perf_counter() - start
+        return wrapper
+
+    for name in CALLBACKS:
+        setattr(main_windows.MainWindow, name, wrap(name, getattr(main_windows.MainWindow, name)))
+    window = main_windows.MainWindow()
+    window.graphics_viewer
+    log_path = os.path.join(tmp, 'path.log')
+    scenes.write_smith18_log(log_path, 10)
+    containers = [ViewerPathItemContainer(log_path, build_item=False) for _ in range(scale)]
+    group = window.object_objeGroupParam
+
+    stages = {}
+    timed(stages, 'addLoadedMany', lambda: group.addLoadedMany([('Path', c) for c in containers]))
+    objects = window.registry.of_type('Path')
+    select = window.object_options.param('selected path')
+    timed(stages, 'select', lambda: [select.setValue(obj.object_id) for obj in objects[::max(1, scale // 100)]])
+    timed(stages, 'hide', lambda: group.setShown(objects, False))
+    timed(stages, 'show', lambda: group.setShown(objects, True))
+    timed(stages, 'removeAll', group.removeAll)
+    stages.update(('callback ' + name, seconds) for name, seconds in spent.items() if seconds)
+    return stages
+
+
+CASES = dict(trajectory=case_trajectory, mesh=case_mesh, points=case_points, path=case_path, tree=case_tree)
+
+
+def child(case, scale):
+    # one case at one scale in a fresh process, a JSON line on stdout
+    from PySide6.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as tmp:
+        stages = CASES[case](tmp, scale)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(json.dumps(dict(stages=stages, peak_rss=peak)))
+    sys.stdout.flush()
+    # Qt teardown is not part of any case
+    os._exit(0)
+
+
+def run(case, scale, timeout):
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    env.setdefault('LIBGL_ALWAYS_SOFTWARE', '1')
+    # every case parses its files, a warm asset cache would measure the cache
+    env['DRONECENTER_CACHE'] = '0'
+    result = dict(case=case, scale=scale)
+    try:
+        out = subprocess.run([sys.executable, __file__, '--child', case, str(scale)], env=env,
+                             capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        result['error'] = 'timed out after %d s' % timeout
+        return result
+    lines = out.stdout.strip().splitlines()
+    if out.returncode == 0 and lines:
+        result.update(json.loads(lines[-1]))
+    else:
+        errors = out.stderr.strip().splitlines()
+        message = next((line for line in reversed(errors) if 'error' in line.lower()), errors[-1] if errors else '')
+        result['error'] = 'exit %d: %s' % (out.returncode, message)
+    return result
+
+
+def revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous):
+    # stage time against the previous run, > 1 is slower
+    old = dict(((r['case'], r['scale']), r.get('stages', {})) for r in previous['results'])
+    print('\nagainst %s (%s):' % (previous.get('revision'), previous.get('created')))
+    for result in results:
+        before = old.get((result['case'], result['scale']), {})
+        for stage, seconds in result.get('stages', {}).items():
+            if before.get(stage):
+                print('%-10s %9d %-34s %8.2fx' % (result['case'], result['scale'], stage, seconds / before[stage]))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        child(sys.argv[2], int(sys.argv[3]))
+
+    parser = argparse.ArgumentParser(description='Loading, GL item and object tree stages on synthetic scenes')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--scales', type=int, nargs='+', help='element counts for the file cases')
+    parser.add_argument('--objects', type=int, nargs='+', default=DEFAULT_OBJECTS, help='objects in the tree case')
+    parser.add_argument('--timeout', type=int, default=1800, help='seconds per case and scale')
+    parser.add_argument('--output', help='JSON file, by default results/suite-<time>.json next to this script')
+    parser.add_argument('--compare', help='JSON file of an earlier run')
+    args = parser.parse_args()
+
+    created = time.strftime('%Y-%m-%dT%H:%M:%S')
+    results = []
+    for case in args.cases:
+        scales = args.objects if case == 'tree' else args.scales or DEFAULT_SCALES[case]
+        for scale in scales:
+            result = run(case, scale, args.timeout)
+            results.append(result)
+            if 'error' in result:
+                print('%-10s %9d %s' % (case, scale, result['error']))
+                continue
+            for stage, seconds in result['stages'].items():
+                print('%-10s %9d %-34s %9.4f s' % (case, scale, stage, seconds))
+            print('%-10s %9d %-34s %9.1f MB' % (case, scale, 'peak RSS', result['peak_rss'] / 2**20))
+
+    import PySide6
+    import pyqtgraph
+    report = dict(created=created, revision=revision(), python=platform.python_version(),
+                  platform=platform.platform(), processor=platform.processor(), cpus=os.cpu_count(),
+                  versions=dict(numpy=np.__version__, pyside6=PySide6.__version__, pyqtgraph=pyqtgraph.__version__),
+                  results=results)
+    output = args.output or os.path.join(BENCH_DIR, 'results', 'suite-%s.json' % time.strftime('%Y%m%d-%H%M%S'))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=1)
+    print('results written to %s' % output)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+
+from PySide6.QtGui import QVector3D
+from PySide6.QtWidgets import QApplication
+
+import scenes
+from tiles import TileIndex
+
+
+def write_tiles(root, grid, faces, size):
+    # grid x grid terrain tiles of size m, written with their index
+    paths, lo, hi = [], [], []
+    for row in range(grid):
+        for col in range(grid):
+            path = os.path.join(root, 'tile_%d_%d.ply' % (row, col))
+            scenes.write_mesh_ply(path, faces, seed=row * grid + col, size=size, origin=(col * size, row * size))
+            paths.append(path)
+            lo.append((col * size, row * size, -25.))
+            hi.append(((col + 1) * size, (row + 1) * size, 25.))
+    index = TileIndex(paths, lo, hi, [faces] * len(paths))
+    index.write(os.path.join(root, 'tiles.json'))
+    return os.path.join(root, 'tiles.json')
+
+
+def settle(app, pager, timeout=120.):
+    # runs the event loop until the reads the pager queued are back
+    start = time.perf_counter()
+    while pager.is_busy() and time.perf_counter() - start < timeout:
+        app.processEvents()
+        time.sleep(.001)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Flying over a tiled terrain: resident memory and paging against the budget')
+    parser.add_argument('--grid', type=int, default=8, help='tiles along a side')
+    parser.add_argument('--faces', type=int, default=100000, help='faces per tile')
+    parser.add_argument('--size', type=float, default=250., help='tile side in m')
+    parser.add_argument('--budget', type=int, default=256, help='memory budget in MB')
+    parser.add_argument('--steps', type=int, default=8)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv[:1])
+    from MeshViewerWidget import MeshViewerWidget, ViewerTiledMeshItemContainer
+    viewer = MeshViewerWidget()
+    viewer.resize(1280, 720)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        index_path = write_tiles(tmp, args.grid, args.faces, args.size)
+        print('%d tiles of %d faces written in %.1f s' % (args.grid ** 2, args.faces, time.perf_counter() - start))
+        container = ViewerTiledMeshItemContainer(index_path, budget=args.budget << 20)
+        viewer.load_tiles(tile_container=container)
+        pager = container.pager
+        extent = args.grid * args.size
+        peak = 0
+        # along the diagonal, looking down at 30 degrees from 300 m
+        for step in range(args.steps):
+            s = (step + .5) / args.steps * extent
+            viewer.setCameraPosition(pos=QVector3D(s, s, 0.), distance=300., elevation=30., azimuth=45.)
+            start = time.perf_counter()
+            container.update_lod(viewer)
+            planned = time.perf_counter() - start
+            queued = len(pager.jobs)
+            waited = settle(app, pager)
+            container.update_lod(viewer)
+            peak = max(peak, pager.nbytes())
+            print('step %2d  plan %6.2f ms  %2d read in %6.2f s  %2d resident  %7.1f MB' % (
+                step, planned * 1e3, queued, waited, len(pager.resident), pager.nbytes() / (1 << 20)))
+        print('peak %.1f MB of a %d MB budget, %d tiles failed' % (peak / (1 << 20), args.budget, len(pager.failed)))
+        container.close()
+    os._exit(0)
@@ -0,0 +1,99 @@
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+from path import POSE_FIELDS, Trajectory, parse_smith18_log
+
+
+class LegacyPathNode():
+    def __init__(self, x, y, z, pitch, roll, yaw) -> None:
+        self.x, self.y, self.z, self.pitch, self.roll, self.yaw = \
+            x, y, z, pitch, roll, yaw
+
+
+def legacy_load_smith18_path(log_path):
+    # the per-line loader path.py used before the columnar store
+    f = open(log_path, 'r')
+    lines = f.readlines()
+    path = []
+    for i, line in enumerate(lines):
+        imagename, x, y, z, pitch, roll, yaw = line.split(',')
+        x, y, z, pitch, roll, yaw = - \
+            float(x)/100, float(y)/100, float(z)/100, - \
+            float(pitch), float(roll), 90-float(yaw)
+        path.append(LegacyPathNode(x, y, z, pitch, roll, yaw))
+    f.close()
+    return path
+
+
+def structured_parse(raw):
+    # the single np.loadtxt with a string field parse_smith18_log used before
+    # the pose columns and the image names were read separately
+    width = max(len(line.split(b',', 1)[0]) for line in raw.splitlines())
+    return np.loadtxt(io.BytesIO(raw), delimiter=',', ndmin=1, encoding='utf-8',
+                      dtype=[('imagename', 'U%d' % width), ('pose', 'f8', (len(POSE_FIELDS),))])
+
+
+def best_of(fn, *args, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def write_log(log_path, n, seed=0):
+    rng = np.random.default_rng(seed)
+    pose = rng.uniform(-5000., 5000., (n, 6))
+    with open(log_path, 'w') as f:
+        for i in range(n):
+            f.write('%08d.jpg,%.4f,%.4f,%.4f,%.4f,%.4f,%.4f\n' % (i, *pose[i]))
+
+
+def measure(fn, *args):
+    # time without tracing, then a second run for retained and peak memory
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = fn(*args)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, retained, peak
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Trajectory loader benchmark')
+    parser.add_argument('--nodes', type=int, nargs='+', default=[1000, 10000, 100000, 500000])
+    args = parser.parse_args()
+
+    print('%10s %10s %10s %8s %14s %14s %12s %12s' % (
+        'nodes', 'legacy s', 'columnar s', 'speedup', 'legacy MB', 'columnar MB', 'structured s', 'split s'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.nodes:
+            log_path = os.path.join(tmp, 'trajectory_%d.log' % n)
+            write_log(log_path, n)
+            legacy, legacy_t, legacy_mem, legacy_peak = measure(legacy_load_smith18_path, log_path)
+            trajectory, columnar_t, columnar_mem, columnar_peak = measure(Trajectory, log_path)
+            assert trajectory.len() == len(legacy)
+            assert np.allclose(trajectory.yaw[-1], legacy[-1].yaw)
+            del legacy
+            # the parse alone, on bytes already read: one structured np.loadtxt
+            # against the pose columns and the image names read separately
+            with open(log_path, 'rb') as f:
+                raw = f.read()
+            structured_t, split_t = best_of(structured_parse, raw), best_of(parse_smith18_log, raw)
+            # memory columns are "retained / peak"
+            print('%10d %10.4f %10.4f %7.1fx %6.1f/%-7.1f %6.1f/%-7.1f %12.4f %12.4f' % (
+                n, legacy_t, columnar_t, legacy_t / columnar_t,
+                legacy_mem / 2**20, legacy_peak / 2**20, columnar_mem / 2**20, columnar_peak / 2**20,
+                structured_t, split_t))
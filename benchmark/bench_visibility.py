@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import trimesh
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '../src'))
+
+import bvh
+import camera
+from path import Trajectory
+from visibility import compute_visibility
+
+
+def orbit(views, radius=5., height=2.):
+    # viewpoints on a circle, every camera looking at the origin
+    angle = np.linspace(0., 360., views, endpoint=False)
+    columns = np.array([radius * np.cos(np.radians(angle)), radius * np.sin(np.radians(angle)),
+                        np.full(views, height), np.full(views, -np.degrees(np.arctan2(height, radius))),
+                        np.zeros(views), angle + 180.])
+    return Trajectory.from_columns(np.array(['%05d.jpg' % i for i in range(views)]), columns)
+
+
+def sphere_samples(count, seed=0):
+    samples = np.random.default_rng(seed).normal(size=(count, 3))
+    return samples / np.linalg.norm(samples, axis=1)[:, None]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Viewpoint to sample visibility on a synthetic scene')
+    parser.add_argument('--samples', type=int, default=100000)
+    parser.add_argument('--views', type=int, default=5000)
+    parser.add_argument('--subdivisions', type=int, default=7, help='icosphere subdivisions of the mesh')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--camera', default=camera.DEFAULT_CAMERA, choices=list(camera.CAMERA_PRESETS))
+    args = parser.parse_args()
+
+    mesh = trimesh.creation.icosphere(subdivisions=args.subdivisions)
+    samples = sphere_samples(args.samples)
+    trajectory = orbit(args.views)
+    print('%d faces, %d samples, %d views, %s' % (
+        len(mesh.faces), args.samples, args.views, 'embree' if bvh.has_embree() else 'numpy BVH'))
+
+    start = time.perf_counter()
+    matrix = compute_visibility(mesh.vertices, mesh.faces, samples, trajectory,
+                                camera.CAMERA_PRESETS[args.camera], processes=args.processes, use_cache=False)
+    elapsed = time.perf_counter() - start
+    pairs = matrix.shape[0] * matrix.shape[1]
+    print('%.1f s, %d of %d pairs visible, %.2f M pairs/s' % (elapsed, matrix.nnz(), pairs, pairs / elapsed / 1e6))
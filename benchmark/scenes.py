@@ -0,0 +1,80 @@
+import numpy as np
+
+# synthetic scenes for the benchmarks, sized by element count and seeded so
+# every run and every version reads the same files
+
+
+def terrain(faces, size=1000., relief=20., seed=0, origin=(0., 0.)):
+    # (vertices, faces) of a rolling height field with about faces triangles
+    # over the size m square with its corner at origin
+    rng = np.random.default_rng(seed)
+    side = max(2, int(round(np.sqrt(faces / 2.))) + 1)
+    x, y = np.meshgrid(np.linspace(origin[0], origin[0] + size, side), np.linspace(origin[1], origin[1] + size, side))
+    z = relief * (np.sin(x / size * 7.) * np.cos(y / size * 5.)) + rng.normal(0., relief / 50., x.shape)
+    vertices = np.column_stack((x.ravel(), y.ravel(), z.ravel())).astype(np.float32)
+    corner = (np.arange(side - 1)[None, :] + side * np.arange(side - 1)[:, None]).ravel()
+    triangles = np.concatenate((np.column_stack((corner, corner + 1, corner + side)),
+                                np.column_stack((corner + 1, corner + side + 1, corner + side))))
+    return vertices, triangles.astype(np.int32)
+
+
+def write_mesh_ply(path, faces, seed=0, size=1000., origin=(0., 0.)):
+    vertices, triangles = terrain(faces, size, seed=seed, origin=origin)
+    face_data = np.empty(len(triangles), dtype=[('count', 'u1'), ('vertex_indices', '<i4', (3,))])
+    face_data['count'] = 3
+    face_data['vertex_indices'] = triangles
+    with open(path, 'wb') as f:
+        f.write(('ply\nformat binary_little_endian 1.0\nelement vertex %d\n'
+                 'property float x\nproperty float y\nproperty float z\n'
+                 'element face %d\nproperty list uchar int vertex_indices\n'
+                 'end_header\n' % (len(vertices), len(triangles))).encode())
+        vertices.tofile(f)
+        face_data.tofile(f)
+    return len(triangles)
+
+
+def write_cloud_ply(path, points, size=1000., seed=0):
+    rng = np.random.default_rng(seed)
+    data = np.empty(points, dtype=[('x', '<f4'), ('y', '<f4'), ('z', '<f4'),
+                                   ('red', 'u1'), ('green', 'u1'), ('blue', 'u1')])
+    for axis in 'xy':
+        data[axis] = rng.uniform(0., size, points)
+    data['z'] = rng.normal(0., size / 50., points)
+    for channel in ('red', 'green', 'blue'):
+        data[channel] = rng.integers(0, 256, points)
+    with open(path, 'wb') as f:
+        f.write(('ply\nformat binary_little_endian 1.0\nelement vertex %d\n'
+                 'property float x\nproperty float y\nproperty float z\n'
+                 'property uchar red\nproperty uchar green\nproperty uchar blue\n'
+                 'end_header\n' % points).encode())
+        data.tofile(f)
+    return points
+
+
+def survey_poses(waypoints, lines=20, width=1000., spacing=50., altitude=80., seed=0):
+    # (waypoints, 6) x, y, z in m and pitch, roll, yaw in degrees of a lawnmower survey
+    rng = np.random.default_rng(seed)
+    s = np.linspace(0., 1., waypoints)
+    line = np.floor(s * lines)
+    along = (s * lines) % 1.
+    poses = np.zeros((waypoints, 6))
+    poses[:, 0] = np.where(line % 2 == 0, along, 1. - along) * width
+    poses[:, 1] = line * spacing
+    poses[:, 2] = altitude + rng.normal(0., .05, waypoints)
+    poses[:, 3] = -90. + rng.normal(0., .5, waypoints)
+    poses[:, 5] = np.where(line % 2 == 0, 0., 180.) + rng.normal(0., .5, waypoints)
+    return poses
+
+
+def write_smith18_log(path, waypoints, seed=0, block=1 << 16):
+    # imagename,x,y,z,pitch,roll,yaw with positions in cm and the axes as
+    # Trajectory.load_smith18_path expects them
+    poses = survey_poses(waypoints, seed=seed)
+    raw = np.column_stack((-100. * poses[:, 0], 100. * poses[:, 1], 100. * poses[:, 2],
+                           -poses[:, 3], poses[:, 4], 90. - poses[:, 5]))
+    with open(path, 'w') as f:
+        for start in range(0, waypoints, block):
+            rows = raw[start:start + block]
+            f.write(''.join('%08d.jpg,%.3f,%.3f,%.3f,%.3f,%.3f,%.3f\n' % ((start + i,) + tuple(row))
+                            for i, row in enumerate(rows.tolist())))
+    return waypoints
@@ -1,5 +1,3 @@
-from http.client import INSUFFICIENT_STORAGE
-from re import A
 from PySide6 import QtWidgets
 from PySide6 import QtCore
 from PySide6.QtWidgets import (
@@ -26,27 +24,156 @@ from PySide6.QtGui import (
 )
 import sys
 import os
+import math
+import time
+from contextlib import contextmanager
 
-from pyqtgraph.parametertree import Parameter, ParameterTree
-from pyqtgraph.parametertree import types as pTypes
-
-import pyqtgraph as pg
 import pyqtgraph.opengl as gl
-from pyqtgraph.opengl.GLGraphicsItem import GLGraphicsItem
-from pyqtgraph import LayoutWidget
+from OpenGL import GL
 
-import trimesh
 import numpy as np
-from path import Trajectory, PathNode
+from path import Trajectory, TrajectoryTail, PathNode, GrowableArray
+import path_geometry
+import path_simplify
+from colormap import ScalarColormap, rgba_array, compact_rgba
+from octree import PointOctree, frustum_planes
+from mesh_lod import MeshLOD, face_indexed_meshdata
+from asset_cache import load_cached, load_derived
+from ply import PlyData, is_binary_ply
+from bvh import build_bvh
+from picking import PointPicker, Pick, pick_ray
+from profiling import profiler, profiled
+from tiles import TileIndex, TilePager
+import camera
+
+
+def read_mesh_arrays(mesh_path):
+    # trimesh is only imported for the formats the mapped PLY reader does not cover
+    import trimesh
+    mesh = trimesh.load_mesh(mesh_path)
+    return dict(vertices=mesh.vertices, faces=mesh.faces)
+
+
+def read_sample_arrays(sample_path):
+    import trimesh
+    return dict(vertices=trimesh.load_mesh(sample_path).vertices)
+
+
+def map_binary_ply(path):
+    # binary PLY is mapped instead of parsed, None means go through trimesh
+    if not is_binary_ply(path):
+        return None
+    return PlyData(path)
+
+
+def read_trajectory_arrays(log_path):
+    trajectory = Trajectory(log_path)
+    return dict(imagename=trajectory.imagename, columns=trajectory.columns)
+
+
+class PointSamples():
+    # what the sample container needs of a point cloud, without the float64 copy trimesh.PointCloud makes
+    def __init__(self, vertices, colors=None, normals=None) -> None:
+        self.vertices, self.colors, self.normals = vertices, colors, normals
 
 
 class ViewerItemContainer():
-    def __init__(self, path, display=True) -> None:
+    def __init__(self, path, display=True, build_item=True, arrays=None, lazy=False) -> None:
         self.display = display
-        self.load(path)
+        self.item = None
+        # the MeshViewerWidget currently showing the items, set by addItemContainer
+        self.viewer = None
+        self.file_path = os.path.abspath(path)
+        # decoded arrays handed in, e.g. embedded in a project, stand in for parsing the file
+        self.arrays = arrays
+        # lazy=True leaves the file unread until materialize(), a project
+        # opens hidden objects this way; style waits there until then
+        self.loaded = False
+        self.pending_style = None
+        self.name = os.path.basename(path)
+        if lazy:
+            return
+        self.read(path)
+        self.loaded = True
+        # the GL items are only made on the Qt thread, a loader worker
+        # passes build_item=False and leaves set_item() to the caller
+        if build_item:
+            self.set_item()
+
+    def load(self, path):
+        self.file_path = os.path.abspath(path)
+        self.arrays = None
+        self.read(path)
+        self.loaded = True
+        self.set_item()
+
+    @profiled('loader')
+    def materialize(self):
+        if self.loaded:
+            return
+        self.read(self.file_path)
+        self.loaded = True
+        if self.pending_style is not None:
+            self.set_style(self.pending_style)
+            self.pending_style = None
+
+    def read_arrays(self, path, kind, parse):
+        if self.arrays is not None:
+            return self.arrays
+        return load_cached(path, kind, parse)
+
+    def options(self):
+        # constructor options a project reopens the container with
+        return {}
+
+    def style(self):
+        # display settings a project records, set_style puts them back
+        return {}
+
+    def set_style(self, style):
+        pass
+
+    def geometry(self):
+        # the decoded arrays read() made of the file
+        return {}
+
+    def embedded_arrays(self):
+        # arrays a project embeds so reopening it skips parsing, None when the file has to be read
+        if not self.loaded and self.arrays is None:
+            self.materialize()
+        if not self.loaded:
+            return self.arrays
+        return self.geometry()
 
     def is_empty(self):
-        return self.item == None
+        return self.item is None
+
+    def detach(self):
+        # take the current items out of the viewer before they are replaced,
+        # returns the viewer so the new items can be put back
+        if self.viewer is None or not self.display:
+            return None
+        viewer = self.viewer
+        viewer.removeItemContainer(self)
+        return viewer
+
+    def has_lod(self):
+        return False
+
+    def extra_items(self):
+        # GL items drawn with the container besides self.item
+        return []
+
+    def close(self):
+        # called when the container is removed for good
+        pass
+
+    def update_lod(self, view, interacting=False):
+        pass
+
+    def pick(self, origin, direction, tan_tolerance):
+        # Pick nearest along the ray, or None
+        return None
 
     def len(self):
         if self.is_empty():
@@ -55,37 +182,282 @@ class ViewerItemContainer():
             return 1
 
 class ViewerMeshItemContainer(ViewerItemContainer):
-    def __init__(self, path) -> None:
-        super().__init__(path)
+    def __init__(self, path, display=True, build_item=True, lod_faces=200000, error_pixels=1.,
+                 arrays=None, lazy=False) -> None:
+        # meshes with more faces than lod_faces get a decimated LOD chain,
+        # the viewer shows the coarsest level within error_pixels of screen error
+        self.lod_faces = lod_faces
+        self.error_pixels = error_pixels
+        self.lod = None
+        self.lod_level = 0
+        self._mesh = None
+        self._bvh = None
+        super().__init__(path, display, build_item, arrays, lazy)
 
-    def load(self, mesh_path=r'F:\projects\DroneCenter\test_data\xuexiao_coarse.ply'):
-        self.mesh = trimesh.load_mesh(mesh_path)
+    def read(self, mesh_path=r'F:\projects\DroneCenter\test_data\xuexiao_coarse.ply'):
+        self.vertices, self.faces = None, None
+        ply = map_binary_ply(mesh_path) if self.arrays is None else None
+        if ply is not None:
+            self.vertices, self.faces = ply.vertices, ply.faces
+        if self.vertices is None or self.faces is None or not self.faces.shape[1] == 3:
+            # decoded arrays come from the asset cache when the file is unchanged
+            arrays = self.read_arrays(mesh_path, 'mesh', read_mesh_arrays)
+            self.vertices, self.faces = arrays['vertices'], arrays['faces']
+        self._mesh = None
+        self._bvh = None
         self.name = os.path.basename(mesh_path)
+        self.meshdata = face_indexed_meshdata(self.vertices, self.faces)
+        self.lod = None
+        if len(self.faces) > self.lod_faces:
+            # decimating takes longer than parsing, the chain is cached next to the mesh
+            self.lod = load_derived(
+                mesh_path, 'mesh_lod', lambda: MeshLOD(self.vertices, self.faces, meshdata=self.meshdata),
+                lambda arrays: MeshLOD.from_arrays(arrays, self.meshdata),
+                None if self.arrays is None else [self.vertices, self.faces])
+
+    def options(self):
+        return dict(lod_faces=self.lod_faces, error_pixels=self.error_pixels)
+
+    def geometry(self):
+        return dict(vertices=self.vertices, faces=self.faces)
+
+    @property
+    def mesh(self):
+        # the trimesh object is only built for the code that needs one
+        if self._mesh is None:
+            import trimesh
+            self._mesh = trimesh.Trimesh(vertices=self.vertices, faces=self.faces, process=False)
+        return self._mesh
+
+    @property
+    def bvh(self):
+        # built on the first pick and kept
+        if self._bvh is None:
+            self._bvh = build_bvh(self.vertices, self.faces)
+        return self._bvh
+
+    def pick(self, origin, direction, tan_tolerance):
+        t, face = self.bvh.first_hit(origin, direction)
+        if face[0] < 0:
+            return None
+        face = int(face[0])
+        return Pick(self, 'Mesh', face, float(t[0]), dict(
+            point=origin + t[0] * direction, vertices=np.asarray(self.faces[face]).tolist()))
+
+    def set_item(self):
+        viewer = self.detach()
+        meshdata = self.meshdata
+        if self.lod is not None:
+            # start coarse, the viewer raises the level once it has a camera
+            self.lod_level = self.lod.len() - 1
+            meshdata = self.lod.levels[self.lod_level].meshdata
         self.item = gl.GLMeshItem(
-            vertexes=self.mesh.vertices,
-            faces=self.mesh.faces, shader='viewNormalColor',
+            meshdata=meshdata, shader='viewNormalColor',
             glOptions='opaque', smooth=False)
+        if viewer is not None:
+            viewer.addItemContainer(self)
+
+    def has_lod(self):
+        return self.lod is not None
+
+    def update_lod(self, view, interacting=False):
+        # levels only get coarser while the camera moves, finer ones wait until it stops
+        if self.lod is None or self.is_empty():
+            return
+        level = self.lod.select(view.eye_position(), view.pixel_scale(), self.error_pixels)
+        if level == self.lod_level or (interacting and level < self.lod_level):
+            return
+        self.lod_level = level
+        self.item.setMeshData(meshdata=self.lod.levels[level].meshdata)
+
+def mesh_bytes(container):
+    # memory a read ViewerMeshItemContainer holds, the arrays drawn at every LOD level included
+    meshdatas = [container.meshdata] if container.lod is None else [level.meshdata for level in container.lod.levels]
+    arrays = [container.vertices, container.faces]
+    for meshdata in meshdatas:
+        arrays += [meshdata.vertexes(), meshdata.faces(), meshdata.vertexes(indexed='faces'),
+                   meshdata.faceNormals(indexed='faces')]
+    unique = dict((id(array), array) for array in arrays if isinstance(array, np.ndarray))
+    return sum(array.nbytes for array in unique.values())
+
+
+class ViewerTiledMeshItemContainer(ViewerItemContainer):
+    # a mesh split into the tiles of a tiles.TileIndex; only tiles in or near
+    # the view are resident, read on a paging thread and evicted farthest
+    # first to stay within budget bytes. Every resident tile is a
+    # ViewerMeshItemContainer with a LOD chain of its own
+    def __init__(self, path, display=True, build_item=True, budget=1 << 30, margin=.25, lod_faces=200000,
+                 error_pixels=1., arrays=None, lazy=False) -> None:
+        self.budget = budget
+        # tiles within margin times their own size of the frustum count as near
+        self.margin = margin
+        self.lod_faces = lod_faces
+        self.error_pixels = error_pixels
+        self.index = None
+        self.pager = None
+        super().__init__(path, display, build_item, arrays, lazy)
+
+    def read(self, index_path):
+        self.index = TileIndex.read(index_path)
+        self.name = os.path.basename(index_path)
+
+    def options(self):
+        return dict(budget=self.budget, margin=self.margin, lod_faces=self.lod_faces, error_pixels=self.error_pixels)
+
+    def geometry(self):
+        # the tiles are read from their files again, a project does not embed them
+        return None
+
+    def read_tile(self, tile_path):
+        # runs on the paging thread, GL items are made once the tile is back
+        tile = ViewerMeshItemContainer(tile_path, build_item=False, lod_faces=self.lod_faces,
+                                       error_pixels=self.error_pixels)
+        return tile, mesh_bytes(tile)
+
+    def tiles(self):
+        return [] if self.pager is None else list(self.pager.resident.values())
+
+    def set_item(self):
+        # the pager is a QObject, it is made here on the Qt thread and not in read()
+        viewer = self.detach()
+        if self.pager is None:
+            self.pager = TilePager(self.index, self.read_tile, self.budget, self.margin)
+            self.pager.sigRead.connect(self.on_tile_read)
+            self.pager.sigFailed.connect(self.pager.fail)
+        self.item = []
+        for tile in self.tiles():
+            if tile.is_empty():
+                tile.set_item()
+            self.item.append(tile.item)
+        if viewer is not None:
+            viewer.addItemContainer(self)
+
+    def has_lod(self):
+        return True
+
+    def update_lod(self, view, interacting=False):
+        # the camera moved or stopped: page tiles, then pick each tile's level
+        if self.is_empty():
+            return
+        self.remove_tiles(self.pager.update(view.frustum_planes(), view.eye_position()))
+        for tile in self.tiles():
+            tile.update_lod(view, interacting)
+
+    def on_tile_read(self, number, tile, nbytes):
+        if self.is_empty():
+            return
+        kept, evicted = self.pager.accept(number, tile, nbytes)
+        self.remove_tiles(evicted)
+        if not kept:
+            return
+        tile.set_item()
+        self.item.append(tile.item)
+        if self.viewer is not None and self.display:
+            self.viewer.addItem(tile.item)
+            tile.update_lod(self.viewer)
+
+    def remove_tiles(self, evicted):
+        for number, tile in evicted:
+            if tile.item is None:
+                continue
+            self.item.remove(tile.item)
+            if self.viewer is not None and self.display:
+                self.viewer.removeItem(tile.item)
+
+    def close(self):
+        if self.pager is not None:
+            self.pager.shutdown()
+
+    def pick(self, origin, direction, tan_tolerance):
+        nearest = None
+        for tile in self.tiles():
+            hit = tile.pick(origin, direction, tan_tolerance)
+            if hit is not None and (nearest is None or hit.distance < nearest.distance):
+                nearest = hit
+        return nearest
+
+    def len(self):
+        if self.is_empty():
+            return 0
+        return len(self.item)
+
 
 class ViewerSampleItemContainer(ViewerItemContainer):
-    def __init__(self, path, display=True) -> None:
+    default_color = (1., 0., 0., 1.)
+
+    def __init__(self, path, display=True, build_item=True, point_budget=2000000, arrays=None, lazy=False) -> None:
         self.size = 2.
-        super().__init__(path, display)
+        # clouds larger than the budget are drawn from an octree, the
+        # viewer picks at most point_budget points for the current camera
+        self.point_budget = point_budget
+        self.octree = None
+        self.picker = None
+        super().__init__(path, display, build_item, arrays, lazy)
 
-    def load(self, mesh_path=r'F:\projects\DroneCenter\test_data\xuexiao_coarse_90.ply', color=None):
-        self.sample = trimesh.load_mesh(mesh_path)
+    def read(self, mesh_path=r'F:\projects\DroneCenter\test_data\xuexiao_coarse_90.ply', color=None):
+        ply = map_binary_ply(mesh_path) if self.arrays is None else None
+        if ply is not None and ply.vertices is not None:
+            self.sample = PointSamples(ply.vertices, ply.colors, ply.normals)
+        else:
+            arrays = self.read_arrays(mesh_path, 'sample', read_sample_arrays)
+            self.sample = PointSamples(arrays['vertices'], arrays.get('colors'), arrays.get('normals'))
         self.name = os.path.basename(mesh_path)
-        self.set_item()
+        self.picker = None
         self.set_color(color)
+        self.build_octree(mesh_path)
+
+    def options(self):
+        return dict(point_budget=self.point_budget)
+
+    def style(self):
+        return dict(color=compact_rgba(self.color), size=self.size)
+
+    def set_style(self, style):
+        self.size = style.get('size', self.size)
+        self.set_color(style.get('color'))
+        if self.item is not None:
+            self.item.setData(size=self.size)
+            self.refresh_color()
+
+    def geometry(self):
+        arrays = dict(vertices=self.sample.vertices)
+        if self.sample.colors is not None:
+            arrays['colors'] = self.sample.colors
+        if self.sample.normals is not None:
+            arrays['normals'] = self.sample.normals
+        return arrays
+
+    def build_octree(self, path=None):
+        # the octree of a file's points is cached next to them
+        self.octree = None
+        if len(self.sample.vertices) <= self.point_budget:
+            return
+        if path is None:
+            self.octree = PointOctree(self.sample.vertices)
+        else:
+            self.octree = load_derived(path, 'octree', lambda: PointOctree(self.sample.vertices), PointOctree.from_arrays,
+                                       None if self.arrays is None else [self.sample.vertices])
 
     def set_sample(self, sample, name='samples', color=None):
         self.name = name
         self.sample = sample
-        self.set_item(color)
-
-    def set_item(self, color=None):
-        self.item = []
+        self.picker = None
         self.set_color(color)
-        self.item = gl.GLScatterPlotItem(pos=self.sample.vertices, size=self.size, color=self.color, pxMode=False, glOptions='translucent')
+        self.build_octree()
+        self.set_item()
+
+    def set_item(self):
+        viewer = self.detach()
+        if self.octree is None:
+            self.item = gl.GLScatterPlotItem(pos=self.sample.vertices, size=self.size, color=self.color, pxMode=False, glOptions='translucent')
+        else:
+            # an even subsample until the viewer asks for the camera dependent one
+            self.lod_index = np.linspace(0, self.octree.len() - 1, self.point_budget // 8).astype(np.int64)
+            self.item = gl.GLScatterPlotItem(
+                pos=self.octree.points[self.lod_index], size=self.size,
+                color=self.color[self.octree.order[self.lod_index]], pxMode=False, glOptions='translucent')
+        if viewer is not None:
+            viewer.addItemContainer(self)
         # for i, pos in enumerate(self.sample.vertices):
         #     self.item.append(gl.GLScatterPlotItem(pos=self.sample.vertices[i], size=self.size, color=self.color[i], pxMode=False, glOptions='translucent'))
         #     # sphere = gl.MeshData.sphere(rows=1, cols=1, radius=self.radius)
@@ -93,36 +465,345 @@ class ViewerSampleItemContainer(ViewerItemContainer):
         #     # sphere_meshItem.translate(pos[0], pos[1], pos[2])
         #     # self.item.append(sphere_meshItem)
 
+    def has_lod(self):
+        return self.octree is not None
+
+    def set_point_budget(self, point_budget):
+        self.point_budget = point_budget
+        if self.octree is None and len(self.sample.vertices) > point_budget:
+            self.build_octree()
+            self.set_item()
+        elif self.viewer is not None:
+            self.update_lod(self.viewer)
+
+    def update_lod(self, view, interacting=False):
+        # a coarse share of the budget while the camera moves, the full one when it stops
+        if self.octree is None or self.is_empty():
+            return
+        budget = self.point_budget // 8 if interacting else self.point_budget
+        self.lod_index = self.octree.select(
+            view.frustum_planes(), view.eye_position(), budget, view.pixel_scale())
+        self.item.setData(
+            pos=self.octree.points[self.lod_index],
+            color=self.color[self.octree.order[self.lod_index]])
+
+    def pick(self, origin, direction, tan_tolerance):
+        if self.picker is None:
+            self.picker = PointPicker(self.sample.vertices)
+        hit = self.picker.pick(origin, direction, tan_tolerance)
+        if hit is None:
+            return None
+        index, t = hit
+        attributes = dict(position=np.asarray(self.sample.vertices[index]).tolist(), color=self.color[index].tolist())
+        return Pick(self, 'Points', index, t, attributes)
+
+    def set_scalar_color(self, values, colormap='viridis', vmin=None, vmax=None, clamp=True, log=False):
+        # colors every point by a value of its own, e.g. its reconstructability,
+        # written over the color buffer the GL item already draws from
+        self.scalar_colormap = ScalarColormap(colormap, vmin, vmax, clamp, log)
+        self.scalar_colormap.map(values, out=self.color)
+        self.refresh_color()
+
+    def refresh_color(self):
+        if self.item is None:
+            return
+        if self.octree is None:
+            if self.item.color is self.color:
+                self.item.update()
+            else:
+                self.item.setData(color=self.color)
+        elif isinstance(self.item.color, np.ndarray) and len(self.item.color) == len(self.lod_index):
+            np.take(self.color, self.octree.order[self.lod_index], axis=0, out=self.item.color)
+            self.item.update()
+        else:
+            self.item.setData(color=self.color[self.octree.order[self.lod_index]])
+
     def set_color(self, color=None):
+        # one color for all points or one per point, float32 RGBA
         sample_len = len(self.sample.vertices)
-        if color == None or not color.size(0) == sample_len:
-            self.color = np.tile(np.array((1., 0., 0., 1.)), (sample_len, 1))
-        elif color.size(0) == 1:
-            self.color = np.tile(color, (sample_len, 1))
-        else:
-            self.color = color
+        self.color = rgba_array(color, sample_len)
+        if self.color is None:
+            self.color = rgba_array(self.default_color, sample_len)
+
+# the two triangles of a footprint quad
+FOOTPRINT_FACES = np.array([[0, 1, 2], [0, 2, 3]])
+
+
+class InstancedMeshData(gl.MeshData):
+    # marker instances with their normals given next to the vertexes;
+    # MeshData.vertexNormals() would compute them in a Python loop over every
+    # vertex each time the vertexes are set
+    def __init__(self, vertexes, faces, normals, vertexColors) -> None:
+        super().__init__(vertexes=vertexes, faces=faces, vertexColors=vertexColors)
+        self.instance_normals = normals
+
+    def setNormals(self, normals):
+        self.instance_normals = normals
+
+    def vertexNormals(self, indexed=None):
+        if indexed is None:
+            return self.instance_normals
+        elif indexed == 'faces':
+            return self.instance_normals[self.faces()]
+        raise Exception("Invalid indexing mode. Accepts: None, 'faces'")
+
 
 class ViewerPathItemContainer(ViewerItemContainer):
-    def __init__(self, path, display=True) -> None:
+    default_color = (0., 0., 1., 1.)
+
+    def __init__(self, path, display=True, render_mode='batched', build_item=True, follow=False,
+                 simplify=None, source_index=None, arrays=None, lazy=False) -> None:
         self.radius = [.8, 0.]
         self.length = 4.
-        super().__init__(path, display)
+        # 'batched' draws every marker from one vertex/face buffer,
+        # 'items' keeps the old one GLMeshItem per waypoint
+        self.render_mode = render_mode
+        self.meshdata = None
+        # follow=True keeps reading the log while a flight is writing it
+        self.follow = follow
+        self.tail = None
+        self.follow_timer = None
+        self.picker = None
+        # simplify=(position tolerance, angle tolerance) reduces the path on
+        # load, source keeps the full one and source_index maps back into it;
+        # a source_index given keeps those nodes without simplifying again
+        self.simplify = simplify
+        self.source = None
+        self.source_index = source_index
+        # camera frustums drawn with the markers, see set_frustums()
+        self.frustums = None
+        self.frustum_items = []
+        super().__init__(path, display, build_item, arrays, lazy)
 
-    def load(self, log_path=r'H:\final_trajectory.log', color=None):
-        self.path = Trajectory(log_path)
+    def read(self, log_path=r'H:\final_trajectory.log', color=None):
+        if self.follow:
+            # a growing log is never cached, the tail reads what is there now
+            self.path = Trajectory()
+            self.tail = TrajectoryTail(self.path, log_path)
+            self.tail.poll()
+        else:
+            arrays = self.read_arrays(log_path, 'trajectory', read_trajectory_arrays)
+            self.path = Trajectory.from_columns(arrays['imagename'], arrays['columns'])
+            if self.source_index is not None:
+                self.source = self.path
+                self.path = Trajectory.from_columns(
+                    self.source.imagename[self.source_index], self.source.columns[:, self.source_index])
+            elif self.simplify is not None:
+                self.source = self.path
+                self.path, self.source_index = path_simplify.simplify(self.source, *self.simplify)
+        self.picker = None
         self.name = os.path.basename(log_path)
         self.set_color(color)
-        self.set_item()
+        self.prepare()
+
+    def options(self):
+        # a followed log is read from the file again, what it holds now may have grown
+        return dict(render_mode=self.render_mode, follow=self.tail is not None, source_index=self.source_index)
+
+    def style(self):
+        return dict(color=compact_rgba(self.color), radius=list(self.radius), length=self.length,
+                    frustums=self.frustums)
+
+    def set_style(self, style):
+        shape = (style.get('radius', self.radius), style.get('length', self.length))
+        self.set_color(style.get('color'))
+        if not shape == (self.radius, self.length):
+            self.radius, self.length = shape
+            self.restyle_shape()
+        frustums = style.get('frustums')
+        if not frustums == self.frustums:
+            if frustums is None:
+                self.clear_frustums()
+            else:
+                self.set_frustums(**frustums)
+
+    def geometry(self):
+        if self.tail is not None:
+            return None
+        trajectory = self.path if self.source is None else self.source
+        return dict(imagename=trajectory.imagename, columns=trajectory.columns)
 
     def set_path(self, trajectory, name='path', color=None):
         self.name = name
         self.path = trajectory
-        self.set_item(color)
-
-    def set_item(self, color=None):
-        self.item = []
+        self.meshdata = None
+        self.picker = None
         self.set_color(color)
-        for i, node in enumerate(self.path.path):
+        self.prepare()
+        self.set_item()
+
+    def set_simplified(self, trajectory, index):
+        # shows trajectory, nodes index of the full path, in place of the path
+        if self.source is None:
+            self.source = self.path
+        self.source_index = index
+        self.set_path(trajectory, self.name)
+
+    def source_node(self, index):
+        # index of node index in the full path
+        return index if self.source_index is None else int(self.source_index[index])
+
+    @property
+    def color(self):
+        return self.color_array.data
+
+    @property
+    def rotations(self):
+        return self.rotation_array.data
+
+    def marker_template(self):
+        cylinder = gl.MeshData.cylinder(
+            rows=1, cols=3, radius=self.radius, length=self.length)
+        return cylinder.vertexes(), cylinder.faces(), cylinder.vertexNormals()
+
+    def prepare(self):
+        # marker buffers for batched mode, no GL calls so a loader worker can run it
+        if not self.render_mode == 'batched':
+            return
+        vertexes, faces, normals = self.marker_template()
+        # rotations are kept so restyling only has to redo the einsum
+        self.rotation_array = GrowableArray(path_geometry.marker_rotations(self.path.pitch, self.path.yaw))
+        self.vertex_array = GrowableArray(
+            path_geometry.instance_vertexes(vertexes, self.rotations, self.path.positions()))
+        self.normal_array = GrowableArray(path_geometry.instance_normals(normals, self.rotations))
+        self.face_array = GrowableArray(path_geometry.instance_faces(faces, self.path.len(), len(vertexes)))
+        self.vertex_color_array = GrowableArray(path_geometry.instance_colors(self.color, len(vertexes)))
+        self.meshdata = InstancedMeshData(
+            self.vertex_array.data, self.face_array.data, self.normal_array.data, self.vertex_color_array.data)
+
+    def set_item(self):
+        viewer = self.detach()
+        self.item = None
+        if self.render_mode == 'batched':
+            self.item = gl.GLMeshItem(
+                meshdata=self.meshdata, smooth=True, drawEdges=False, shader='balloon')
+        else:
+            self.item = self.node_items(0)
+        self.refresh_frustums()
+        if viewer is not None:
+            viewer.addItemContainer(self)
+        if self.tail is not None and self.follow_timer is None:
+            self.start_follow()
+
+    def set_frustums(self, preset=camera.DEFAULT_CAMERA, depth=10., footprints=False, ground=0., max_distance=None):
+        # the view of every node as one GL_LINES item, with footprints the
+        # image outlines on the plane z = ground go in one translucent mesh
+        self.frustums = dict(preset=preset, depth=depth, footprints=footprints, ground=ground, max_distance=max_distance)
+        self.refresh_frustums()
+
+    def clear_frustums(self):
+        self.frustums = None
+        self.refresh_frustums()
+
+    def extra_items(self):
+        return self.frustum_items
+
+    def refresh_frustums(self):
+        # frustum buffers made again from the path and the marker colors, the
+        # GL items are kept and handed the new data
+        if self.frustums is None or self.is_empty() or self.path.is_empty():
+            self.set_frustum_items([])
+            return
+        lines, line_colors, nodes, corners = self.frustum_arrays(0)
+        self.frustum_line_array = GrowableArray(lines)
+        self.frustum_color_array = GrowableArray(line_colors)
+        # the nodes with a footprint, their corners and the colors of those
+        self.footprint_node_array = GrowableArray(nodes)
+        self.footprint_vertex_array = GrowableArray(corners)
+        self.footprint_face_array = GrowableArray(path_geometry.instance_faces(FOOTPRINT_FACES, len(nodes), 4))
+        self.footprint_color_array = GrowableArray(self.footprint_colors(nodes))
+        self.update_frustum_items()
+
+    def append_frustums(self, start):
+        # the frustums of the nodes from start on go into the existing buffers
+        if self.frustums is None or not self.frustum_items:
+            self.refresh_frustums()
+            return
+        lines, line_colors, nodes, corners = self.frustum_arrays(start)
+        self.frustum_line_array.extend(lines)
+        self.frustum_color_array.extend(line_colors)
+        self.footprint_face_array.extend(
+            path_geometry.instance_faces(FOOTPRINT_FACES, len(nodes), 4, len(self.footprint_node_array.data)))
+        self.footprint_node_array.extend(nodes)
+        self.footprint_vertex_array.extend(corners)
+        self.footprint_color_array.extend(self.footprint_colors(nodes))
+        self.update_frustum_items()
+
+    def recolor_frustums(self):
+        # the marker colors written over the existing frustum color buffers
+        if self.frustums is None or not self.frustum_items:
+            return
+        count = self.path.len()
+        if not len(self.frustum_color_array.data) == 16 * count:
+            self.refresh_frustums()
+            return
+        self.frustum_color_array.data.reshape(count, 16, 4)[:] = self.color[:, None]
+        self.footprint_color_array.data[:] = self.footprint_colors(self.footprint_node_array.data)
+        self.update_frustum_items()
+
+    def node_rotations(self, start=0):
+        # camera.camera_rotations of the nodes from start on, batched markers keep them
+        if self.render_mode == 'batched':
+            return self.rotations[start:]
+        return path_geometry.marker_rotations(self.path.pitch[start:], self.path.yaw[start:])
+
+    def frustum_arrays(self, start):
+        # line vertexes and colors of the nodes from start on, those of them
+        # with a footprint and its corners
+        options = self.frustums
+        intrinsics = camera.CAMERA_PRESETS[options['preset']]
+        rotations = self.node_rotations(start)
+        centers = self.path.positions()[start:]
+        lines = camera.frustum_lines(rotations, centers, intrinsics, options['depth'])
+        line_colors = np.repeat(self.color[start:], 16, axis=0)
+        nodes = np.zeros(0, dtype=np.int64)
+        corners = np.zeros((0, 3), dtype=np.float32)
+        if options['footprints']:
+            corners, valid = camera.footprints(rotations, centers, intrinsics, options['ground'], options['max_distance'])
+            nodes = start + np.flatnonzero(valid)
+            corners = corners[valid].reshape(-1, 3).astype(np.float32)
+        return lines, line_colors, nodes, corners
+
+    def footprint_colors(self, nodes):
+        # the marker colors, translucent
+        colors = self.color[nodes]
+        colors[:, 3] *= .25
+        return path_geometry.instance_colors(colors, 4)
+
+    def update_frustum_items(self):
+        # one GL_LINES item for the frustums and, with footprints, the image
+        # outlines on the plane z = ground in one translucent mesh
+        items = self.frustum_items[:1] or [gl.GLLinePlotItem(mode='lines')]
+        items[0].setData(pos=self.frustum_line_array.data, color=self.frustum_color_array.data)
+        if len(self.footprint_node_array.data) > 0:
+            if len(self.frustum_items) < 2:
+                # no shader reads normals, smooth=True draws the indexed buffers as they are
+                items.append(gl.GLMeshItem(meshdata=gl.MeshData(), smooth=True, computeNormals=False,
+                                           glOptions='translucent'))
+            else:
+                items.append(self.frustum_items[1])
+            meshdata = items[1].opts['meshdata']
+            meshdata.setFaces(self.footprint_face_array.data)
+            meshdata.setVertexes(self.footprint_vertex_array.data)
+            meshdata.setVertexColors(self.footprint_color_array.data)
+            items[1].meshDataChanged()
+        self.set_frustum_items(items)
+
+    def set_frustum_items(self, items):
+        shown = self.viewer is not None and self.display and not self.is_empty()
+        if shown:
+            for item in self.frustum_items:
+                if item not in items:
+                    self.viewer.removeItem(item)
+            for item in items:
+                if item not in self.frustum_items:
+                    self.viewer.addItem(item)
+        self.frustum_items = items
+
+    def node_items(self, start):
+        items = []
+        for i in range(start, self.path.len()):
+            node = self.path.node(i)
             cylinder = gl.MeshData.cylinder(
                 rows=1, cols=3, radius=self.radius, length=self.length)
             cylinder_meshItem = gl.GLMeshItem(
@@ -131,32 +812,188 @@ class ViewerPathItemContainer(ViewerItemContainer):
             cylinder_meshItem.rotate(node.pitch, 1, 0, 0)
             cylinder_meshItem.rotate(node.yaw-90, 0, 0, 1)
             cylinder_meshItem.translate(node.x, node.y, node.z)
-            self.item.append(cylinder_meshItem)
+            items.append(cylinder_meshItem)
+        return items
+
+    def start_follow(self, interval=500):
+        self.follow_timer = QtCore.QTimer()
+        self.follow_timer.timeout.connect(self.poll_follow)
+        self.follow_timer.start(interval)
+
+    def stop_follow(self):
+        if self.follow_timer is not None:
+            self.follow_timer.stop()
+            self.follow_timer = None
+
+    def poll_follow(self):
+        start = self.path.len()
+        if self.tail.poll() > 0:
+            self.append_markers(start)
+
+    def append_markers(self, start):
+        # markers for the nodes from start on go into the existing buffers,
+        # the cost depends on how many nodes were added, not on the path length
+        count = self.path.len()
+        self.color_array.extend(rgba_array(self.default_color, count - start))
+        if self.render_mode == 'batched':
+            vertexes, faces, normals = self.marker_template()
+            rotations = path_geometry.marker_rotations(self.path.pitch[start:], self.path.yaw[start:])
+            self.rotation_array.extend(rotations)
+            self.vertex_array.extend(
+                path_geometry.instance_vertexes(vertexes, rotations, self.path.positions()[start:]))
+            self.normal_array.extend(path_geometry.instance_normals(normals, rotations))
+            self.face_array.extend(path_geometry.instance_faces(faces, count - start, len(vertexes), start))
+            self.vertex_color_array.extend(path_geometry.instance_colors(self.color[start:], len(vertexes)))
+            self.meshdata.setFaces(self.face_array.data)
+            self.meshdata.setVertexes(self.vertex_array.data)
+            self.meshdata.setNormals(self.normal_array.data)
+            self.meshdata.setVertexColors(self.vertex_color_array.data)
+            if not self.is_empty():
+                self.item.meshDataChanged()
+        elif not self.is_empty():
+            items = self.node_items(start)
+            self.item.extend(items)
+            if self.viewer is not None and self.display:
+                for i in items:
+                    self.viewer.addItem(i)
+        self.append_frustums(start)
+
+    def close(self):
+        self.stop_follow()
+
+    def pick(self, origin, direction, tan_tolerance):
+        # waypoints count as hit within the marker radius, the index is
+        # rebuilt when the path changed since the last pick
+        if self.picker is None or not len(self.picker.points) == self.path.len():
+            self.picker = PointPicker(self.path.positions())
+        hit = self.picker.pick(origin, direction, tan_tolerance, radius=max(self.radius))
+        if hit is None:
+            return None
+        index, t = hit
+        node = self.path.node(index)
+        return Pick(self, 'Path', index, t, dict(
+            source=self.source_node(index), imagename=node.imagename, x=node.x, y=node.y, z=node.z, pitch=node.pitch, roll=node.roll, yaw=node.yaw))
 
     def set_color(self, color=None):
-        path_len = len(self.path.path)
-        if color == None or not color.size(0) == path_len:
-            self.color = np.tile(np.array((0., 0., 1., 1.)), (path_len, 1))
-        else:
-            self.color = color
+        # one color for all markers or one per waypoint, float32 RGBA
+        path_len = self.path.len()
+        colors = rgba_array(color, path_len)
+        if colors is None:
+            colors = rgba_array(self.default_color, path_len)
+        self.color_array = GrowableArray(colors)
+        self.restyle_colors()
+
+    def set_scalar_color(self, values, colormap='viridis', vmin=None, vmax=None, clamp=True, log=False):
+        # colors every marker by a value of its waypoint, e.g. its altitude
+        ScalarColormap(colormap, vmin, vmax, clamp, log).map(values, out=self.color)
+        self.restyle_colors()
 
     def set_radius(self, radius):
         self.radius = radius
-        self.set_item()
+        self.restyle_shape()
 
     def set_length(self, length):
         self.length = length
-        self.set_item()
+        self.restyle_shape()
+
+    def restyle_shape(self):
+        # new marker size written into the existing vertex buffers
+        if self.render_mode == 'batched':
+            if self.meshdata is None:
+                return
+            vertexes, _, normals = self.marker_template()
+            path_geometry.instance_vertexes(vertexes, self.rotations, self.path.positions(),
+                                            out=self.vertex_array.data)
+            path_geometry.instance_normals(normals, self.rotations, out=self.normal_array.data)
+            self.meshdata.setVertexes(self.vertex_array.data)
+            self.meshdata.setNormals(self.normal_array.data)
+            if not self.is_empty():
+                self.item.meshDataChanged()
+        elif not self.is_empty():
+            cylinder = gl.MeshData.cylinder(
+                rows=1, cols=3, radius=self.radius, length=self.length)
+            for cylinder_meshItem in self.item:
+                cylinder_meshItem.setMeshData(meshdata=cylinder)
+
+    def restyle_colors(self):
+        # new colors written into the existing color buffers
+        if self.render_mode == 'batched':
+            if self.meshdata is None:
+                return
+            # the marker colors are written over the existing vertex color buffer
+            colors = self.vertex_color_array.data
+            colors.reshape(len(self.color), -1, 4)[:] = self.color[:, None]
+            self.meshdata.setVertexColors(colors)
+            if not self.is_empty():
+                self.item.meshDataChanged()
+        elif not self.is_empty():
+            for i, cylinder_meshItem in enumerate(self.item):
+                cylinder_meshItem.setColor(self.color[i])
+        self.recolor_frustums()
+
+    def highlight(self, indices, color=(1., 0., 0., 1.)):
+        # recolors the markers of some waypoints, e.g. those too close to the scene
+        self.color[np.asarray(indices, dtype=np.int64)] = color
+        self.restyle_colors()
 
     def len(self):
         if self.is_empty():
             return 0
+        elif self.render_mode == 'batched':
+            return self.path.len()
         else:
             return len(self.item)
 
 
+def array_bytes(*arrays):
+    # glVertexPointerf and co. send float32, faces and edges go as uint32
+    return sum(4 * array.size for array in arrays if isinstance(array, np.ndarray))
+
+
+def draw_stats(item):
+    # (draw calls, bytes sent) of painting one item; pyqtgraph draws from
+    # client side arrays, so they go to the GPU again every frame
+    if isinstance(item, gl.GLMeshItem):
+        calls, sent = 0, 0
+        if item.opts['drawFaces'] and item.vertexes is not None:
+            calls += 1
+            sent += array_bytes(item.vertexes, item.normals, item.colors, item.faces)
+        if item.opts['drawEdges'] and item.edgeVerts is not None:
+            calls += 1
+            sent += array_bytes(item.edgeVerts, item.edges, item.edgeColors)
+        return calls, sent
+    if isinstance(item, gl.GLScatterPlotItem):
+        if item.pos is None:
+            return 0, 0
+        # point sizes in scene units go as one normal per point
+        sized = not item.pxMode or isinstance(item.size, np.ndarray)
+        return 1, array_bytes(item.pos, item.color, item.pos if sized else None)
+    if isinstance(item, gl.GLLinePlotItem):
+        if item.pos is None:
+            return 0, 0
+        return 1, array_bytes(item.pos, item.color)
+    # grid, axis and the like draw a handful of immediate mode vertices
+    return 1, 0
+
+
+def drone_meshdata(preset=camera.DEFAULT_CAMERA):
+    # a unit deep pyramid over the field of view, apex at the camera, in the
+    # frame of the path markers (z is the viewing direction)
+    tan_x, tan_y = camera.CAMERA_PRESETS[preset].tan_half_fov()
+    vertexes = np.array([[0., 0., 0.], [-tan_x, -tan_y, 1.], [tan_x, -tan_y, 1.],
+                         [tan_x, tan_y, 1.], [-tan_x, tan_y, 1.]])
+    faces = np.array([[0, 1, 2], [0, 2, 3], [0, 3, 4], [0, 4, 1], [1, 3, 2], [1, 4, 3]])
+    return gl.MeshData(vertexes=vertexes, faces=faces)
+
+
 class MeshViewerWidget(gl.GLViewWidget):
+    sigPicked = QtCore.Signal(object)         # Pick, or None for a click on nothing
+
     def __init__(self, parent=None, devicePixelRatio=None, rotationMethod='euler'):
+        # scene transactions, see batch(); set first, the base class repaints
+        self.batch_depth = 0
+        self.batch_removed = set()
+        self.batch_dirty = False
         super().__init__(parent, devicePixelRatio, rotationMethod)
         # self.setBackgroundColor(255,255,255)
         self.setWindowTitle('3D Viewer')
@@ -173,9 +1010,74 @@ class MeshViewerWidget(gl.GLViewWidget):
         self.meshContainer_list = []
         self.pathContainer_list = []
         self.sampleContainer_list = []
+        self.tileContainer_list = []
+
+        # containers drawing a camera dependent level of detail
+        self.lod_containers = []
+        self.last_camera = None
+        # detail is raised once the camera has been still for a moment
+        self.lod_timer = QtCore.QTimer(self)
+        self.lod_timer.setSingleShot(True)
+        self.lod_timer.setInterval(200)
+        self.lod_timer.timeout.connect(self.refine_lod)
+
+        # a click is a press and release within a few pixels, a drag moves the camera
+        self.press_pos = None
+        self.pick_tolerance = 4.
+
+        # frame metrics drawn over the view, see set_overlay()
+        self.overlay = None
+
+        # the drone of a flight playback, one item moved by its transform
+        self.playback_item = None
+        self.playback_pose = np.zeros(7)
+        self.playback_size = 6.
+
 
         # self.load_example()
 
+    @contextmanager
+    def batch(self):
+        # items added or removed inside are applied at the end with one
+        # repaint, and removals take one pass over the scene instead of one each
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                self.commit_batch()
+
+    def commit_batch(self):
+        if self.batch_removed:
+            self.items = [item for item in self.items if id(item) not in self.batch_removed]
+            self.batch_removed = set()
+        if self.batch_dirty:
+            self.batch_dirty = False
+            self.update()
+
+    def update(self):
+        if self.batch_depth > 0:
+            self.batch_dirty = True
+            return
+        super().update()
+
+    def addItem(self, item):
+        if id(item) in self.batch_removed:
+            # taken out and put back in the same batch, it never left self.items
+            self.batch_removed.discard(id(item))
+            item._setView(self)
+            self.update()
+            return
+        super().addItem(item)
+
+    def removeItem(self, item):
+        if self.batch_depth == 0:
+            return super().removeItem(item)
+        self.batch_removed.add(id(item))
+        item._setView(None)
+        self.update()
+
     def load_example(self):
         src_dir = os.path.dirname(os.path.abspath(__file__))
         self.load_mesh(os.path.join(src_dir, '../test_data/xuexiao_coarse.ply'))
@@ -185,36 +1087,212 @@ class MeshViewerWidget(gl.GLViewWidget):
     def load(self,path):
         pass
 
-    def load_mesh(self, mesh_path=r'F:\projects\DroneCenter\test_data\xuexiao_coarse.ply'):
-        mesh_container = ViewerMeshItemContainer(mesh_path)
+    def load_mesh(self, mesh_path=r'F:\projects\DroneCenter\test_data\xuexiao_coarse.ply', mesh_container=None):
+        # a container read by the loader only needs its GL items made here
+        if mesh_container is None:
+            mesh_container = ViewerMeshItemContainer(mesh_path)
         self.meshContainer_list.append(mesh_container)
-        self.addItemContainer(mesh_container)
+        self.show_loaded(mesh_container)
         return self, self.meshContainer_list, mesh_container
 
-    def load_path(self, log_path=r'F:\projects\DroneCenter\test_data\final_trajectory.log'):
-        path_container = ViewerPathItemContainer(log_path)
+    def load_path(self, log_path=r'F:\projects\DroneCenter\test_data\final_trajectory.log', path_container=None):
+        if path_container is None:
+            path_container = ViewerPathItemContainer(log_path)
         self.pathContainer_list.append(path_container)
-        self.addItemContainer(path_container)
+        self.show_loaded(path_container)
         return self, self.pathContainer_list, path_container
 
-    def load_sample(self, sample_path=r'F:\projects\DroneCenter\test_data\xuexiao_coarse_90.ply'):
-        sample_container = ViewerSampleItemContainer(sample_path)
+    def load_sample(self, sample_path=r'F:\projects\DroneCenter\test_data\xuexiao_coarse_90.ply', sample_container=None):
+        if sample_container is None:
+            sample_container = ViewerSampleItemContainer(sample_path)
         self.sampleContainer_list.append(sample_container)
-        self.addItemContainer(sample_container)
+        self.show_loaded(sample_container)
         return self, self.sampleContainer_list, sample_container
 
+    def load_tiles(self, index_path=None, tile_container=None):
+        if tile_container is None:
+            tile_container = ViewerTiledMeshItemContainer(index_path)
+        self.tileContainer_list.append(tile_container)
+        self.show_loaded(tile_container)
+        return self, self.tileContainer_list, tile_container
+
+    @profiled('setup')
+    def show_loaded(self, container):
+        # a container loaded hidden, e.g. from a project, gets its items once it is shown
+        if not container.display:
+            return
+        if container.is_empty():
+            container.set_item()
+        self.addItemContainer(container)
+
+    def camera_state(self):
+        eye = self.cameraPosition()
+        center = self.opts['center']
+        return (eye.x(), eye.y(), eye.z(), center.x(), center.y(), center.z(),
+                self.opts['distance'], self.opts['fov'], self.width(), self.height())
+
+    def view_projection(self):
+        # row-major numpy copy of projection * view
+        m = self.projectionMatrix() * self.viewMatrix()
+        return np.array(m.data(), dtype=np.float64).reshape(4, 4).T
+
+    def frustum_planes(self):
+        return frustum_planes(self.view_projection())
+
+    def eye_position(self):
+        eye = self.cameraPosition()
+        return np.array((eye.x(), eye.y(), eye.z()))
+
+    def pixel_scale(self):
+        # screen pixels covered by one unit at distance one
+        return self.height() / (2 * np.tan(np.radians(self.opts['fov']) / 2))
+
+    def pick(self, x, y, tolerance=None):
+        # nearest Pick under widget pixel x, y over everything shown
+        tolerance = self.pick_tolerance if tolerance is None else tolerance
+        origin, direction = pick_ray(self.view_projection(), x, y, self.width(), self.height())
+        tan_tolerance = tolerance / self.pixel_scale()
+        nearest = None
+        for container in self.meshContainer_list + self.tileContainer_list + self.sampleContainer_list + self.pathContainer_list:
+            if not container.display:
+                continue
+            hit = container.pick(origin, direction, tan_tolerance)
+            if hit is not None and (nearest is None or hit.distance < nearest.distance):
+                nearest = hit
+        return nearest
+
+    def mousePressEvent(self, ev):
+        self.press_pos = ev.position()
+        super().mousePressEvent(ev)
+
+    def mouseReleaseEvent(self, ev):
+        super().mouseReleaseEvent(ev)
+        if self.press_pos is None or not ev.button() == Qt.LeftButton:
+            return
+        moved = ev.position() - self.press_pos
+        self.press_pos = None
+        if abs(moved.x()) + abs(moved.y()) <= 3:
+            self.sigPicked.emit(self.pick(ev.position().x(), ev.position().y()))
+
+    def paintGL(self, *args, **kwds):
+        camera = self.camera_state()
+        if not camera == self.last_camera:
+            self.last_camera = camera
+            for container in self.lod_containers:
+                container.update_lod(self, interacting=True)
+            if self.lod_containers:
+                self.lod_timer.start()
+        if not profiler.enabled:
+            super().paintGL(*args, **kwds)
+            return
+        start = time.perf_counter()
+        super().paintGL(*args, **kwds)
+        # wait for the GPU so the time covers the whole frame, only while recording
+        GL.glFinish()
+        profiler.frame(time.perf_counter() - start, *self.draw_stats())
+
+    def draw_stats(self):
+        # (items, draw calls, bytes sent) of what drawItemTree paints
+        items, calls, sent = 0, 0, 0
+        stack = [item for item in self.items if item.parentItem() is None]
+        while stack:
+            item = stack.pop()
+            if not item.visible():
+                continue
+            item_calls, item_sent = draw_stats(item)
+            items += 1
+            calls += item_calls
+            sent += item_sent
+            stack.extend(item.childItems())
+        return items, calls, sent
+
+    def set_overlay(self, show):
+        # frame metrics in the top left corner, showing them starts recording
+        if show:
+            profiler.set_enabled(True)
+            if self.overlay is None:
+                self.overlay = QtWidgets.QLabel(self)
+                self.overlay.setAttribute(Qt.WA_TransparentForMouseEvents)
+                self.overlay.setStyleSheet('background: rgba(0, 0, 0, 160); color: white; font-family: monospace; padding: 4px;')
+                self.overlay.move(8, 8)
+                self.overlay_timer = QtCore.QTimer(self)
+                self.overlay_timer.setInterval(500)
+                self.overlay_timer.timeout.connect(self.refresh_overlay)
+            self.refresh_overlay()
+            self.overlay.show()
+            self.overlay_timer.start()
+        elif self.overlay is not None:
+            self.overlay.hide()
+            self.overlay_timer.stop()
+
+    def refresh_overlay(self):
+        self.overlay.setText(profiler.summary())
+        self.overlay.adjustSize()
+
+    def set_playback_pose(self, track, t, follow=False):
+        # puts the drone at time t of a PoseTrack; with follow the view looks
+        # out of its camera instead. Nothing is rebuilt, the item transform
+        # is rewritten in place
+        if self.playback_item is None:
+            self.playback_item = gl.GLMeshItem(meshdata=drone_meshdata(), color=(1., .5, 0., 1.),
+                                               smooth=False, shader='shaded')
+            self.addItem(self.playback_item)
+        index = track.pose(t, self.playback_pose)
+        x, y, z, qw, qx, qy, qz = self.playback_pose.tolist()
+        self.playback_item.setVisible(not follow)
+        transform = self.playback_item.transform()
+        transform.setToIdentity()
+        transform.translate(x, y, z)
+        sine = math.sqrt(qx * qx + qy * qy + qz * qz)
+        if sine > 1e-12:
+            transform.rotate(math.degrees(2 * math.atan2(sine, qw)), qx, qy, qz)
+        transform.scale(self.playback_size)
+        self.playback_item.update()
+        if follow:
+            # viewing direction, the camera z axis
+            fx, fy, fz = 2 * (qx * qz + qw * qy), 2 * (qy * qz - qw * qx), 1 - 2 * (qx * qx + qy * qy)
+            distance = 1.
+            center = self.opts['center']
+            center.setX(x + distance * fx)
+            center.setY(y + distance * fy)
+            center.setZ(z + distance * fz)
+            self.opts['distance'] = distance
+            self.opts['azimuth'] = math.degrees(math.atan2(-fy, -fx))
+            self.opts['elevation'] = math.degrees(math.asin(max(-1., min(1., -fz))))
+            self.update()
+        return index
+
+    def clear_playback(self):
+        if self.playback_item is not None:
+            self.removeItem(self.playback_item)
+            self.playback_item = None
+
+    def refine_lod(self):
+        for container in self.lod_containers:
+            container.update_lod(self, interacting=False)
+
     def addItemContainer(self, itemContainer):
         itemContainer.display = True
+        itemContainer.viewer = self
+        if itemContainer.has_lod() and itemContainer not in self.lod_containers:
+            self.lod_containers.append(itemContainer)
+            self.lod_timer.start()
         if not type(itemContainer.item) == list:
             self.addItem(itemContainer.item)
         else:
             for i in itemContainer.item:
                 self.addItem(i)
+        for i in itemContainer.extra_items():
+            self.addItem(i)
 
     def removeItemContainer(self, itemContainer):
         itemContainer.display = False
+        if itemContainer in self.lod_containers:
+            self.lod_containers.remove(itemContainer)
         if not type(itemContainer.item) == list:
             self.removeItem(itemContainer.item)
         else:
             for i in itemContainer.item:
-                self.removeItem(i)
\ No newline at end of file
+                self.removeItem(i)
+        for i in itemContainer.extra_items():
+            self.removeItem(i)
\ No newline at end of file
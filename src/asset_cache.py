@@ -0,0 +1,178 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+# bump when the arrays stored for a kind change meaning
+FORMAT_VERSION = 1
+
+
+class AssetCache():
+    # decoded arrays of parsed files, one directory of .npy files per entry,
+    # loaded back memory-mapped; entries are evicted least recently used
+    # first once the cache grows past max_bytes
+    def __init__(self, root, max_bytes=8 << 30, key_mode='stat') -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        # 'stat' keys on path + mtime + size, 'content' hashes the whole file
+        self.key_mode = key_mode
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.evictions = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, path, kind):
+        digest = hashlib.sha1(('%s:%d:' % (kind, FORMAT_VERSION)).encode())
+        if self.key_mode == 'content':
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        else:
+            st = os.stat(path)
+            digest.update(('%s:%d:%d' % (os.path.abspath(path), st.st_mtime_ns, st.st_size)).encode())
+        return digest.hexdigest()
+
+    def data_key(self, kind, arrays, params=''):
+        # for results derived from arrays rather than read from a file
+        digest = hashlib.sha1(('%s:%d:%s' % (kind, FORMAT_VERSION, params)).encode())
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            digest.update(('%s%s' % (array.dtype.str, array.shape)).encode())
+            digest.update(array.data)
+        return digest.hexdigest()
+
+    def get(self, path, kind):
+        return self.get_entry(self.key(path, kind))
+
+    def get_entry(self, key):
+        entry = os.path.join(self.root, key)
+        try:
+            names = [f for f in os.listdir(entry) if f.endswith('.npy')]
+            arrays = {f[:-4]: np.load(os.path.join(entry, f), mmap_mode='r') for f in names}
+            # marks the entry as recently used for eviction
+            os.utime(entry)
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+            self.bytes_read += sum(a.nbytes for a in arrays.values())
+        return arrays
+
+    def put(self, path, kind, arrays):
+        self.put_entry(self.key(path, kind), arrays)
+
+    def put_entry(self, key, arrays):
+        entry = os.path.join(self.root, key)
+        # written next to the final place and renamed, so readers never see half an entry
+        tmp = tempfile.mkdtemp(dir=self.root, prefix='.tmp-')
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp, name + '.npy'), np.ascontiguousarray(array), allow_pickle=False)
+            os.replace(tmp, entry)
+        except OSError:
+            # another thread stored the same file first
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        with self.lock:
+            self.bytes_written += sum(np.asarray(a).nbytes for a in arrays.values())
+        self.evict()
+
+    def entries(self):
+        # (last use, bytes, path) of every complete entry
+        result = []
+        for name in os.listdir(self.root):
+            entry = os.path.join(self.root, name)
+            if name.startswith('.') or not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(f.stat().st_size for f in os.scandir(entry))
+                result.append((os.stat(entry).st_mtime, size, entry))
+            except OSError:
+                # evicted by another thread meanwhile
+                continue
+        return result
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        with self.lock:
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            for _, _, entry in self.entries():
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def stats(self):
+        entries = self.entries()
+        with self.lock:
+            return dict(hits=self.hits, misses=self.misses, bytes_read=self.bytes_read,
+                        bytes_written=self.bytes_written, evictions=self.evictions,
+                        entries=len(entries), size=sum(size for _, size, _ in entries))
+
+    def load(self, path, kind, parse):
+        # arrays for path from the cache, parse(path) fills it on a miss
+        arrays = self.get(path, kind)
+        if arrays is None:
+            arrays = parse(path)
+            self.put(path, kind, arrays)
+        return arrays
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    # DRONECENTER_CACHE=0 turns the cache off, DRONECENTER_CACHE_DIR moves it
+    # and DRONECENTER_CACHE_MAX_BYTES caps its size
+    global _default_cache
+    if os.environ.get('DRONECENTER_CACHE', '1') == '0':
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            root = os.environ.get('DRONECENTER_CACHE_DIR') or \
+                os.path.join(os.path.expanduser('~'), '.cache', 'DroneCenter')
+            max_bytes = int(os.environ.get('DRONECENTER_CACHE_MAX_BYTES', 8 << 30))
+            _default_cache = AssetCache(root, max_bytes)
+    return _default_cache
+
+
+def load_cached(path, kind, parse):
+    cache = default_cache()
+    if cache is None:
+        return parse(path)
+    return cache.load(path, kind, parse)
+
+
+def load_derived(path, kind, build, restore, source=None):
+    # an object built from an asset, e.g. its LOD chain, cached as what its
+    # arrays() returns; keyed on the file like the asset itself, or on the
+    # source arrays when they stand in for the file. build() makes it on a
+    # miss, restore(arrays) on a hit
+    cache = default_cache()
+    if cache is None:
+        return build()
+    key = cache.key(path, kind) if source is None else cache.data_key(kind, source)
+    arrays = cache.get_entry(key)
+    if arrays is not None:
+        return restore(arrays)
+    result = build()
+    cache.put_entry(key, result.arrays())
+    return result
@@ -0,0 +1,201 @@
+import numpy as np
+
+from octree import morton_codes
+
+_embree = None
+
+
+def embree():
+    # (rtcore_scene, TriangleMesh) of embreex, imported on the first tree
+    # built, None without embreex
+    global _embree
+    if _embree is None:
+        try:
+            from embreex import rtcore_scene
+            from embreex.mesh_construction import TriangleMesh
+            _embree = (rtcore_scene, TriangleMesh)
+        except ImportError:
+            _embree = ()
+    return _embree or None
+
+
+def has_embree():
+    return embree() is not None
+
+
+class TriangleBVH():
+    # triangles are sorted along a Morton curve of their centroids and cut into
+    # leaves of leaf_size; the tree over the leaves is complete and binary, so it
+    # is stored as one bounds array per level and node i has the children 2i and
+    # 2i + 1 one level down. rays walk it breadth first, all rays of a batch at
+    # once, which keeps the whole traversal in numpy
+    def __init__(self, vertices, faces, leaf_size=8) -> None:
+        vertices = np.asarray(vertices, dtype=np.float64)
+        faces = np.asarray(faces, dtype=np.int64)
+        self.leaf_size = leaf_size
+        count = len(faces)
+        triangles = vertices[faces]
+
+        centroids = triangles.mean(axis=1)
+        lo = centroids.min(axis=0) if count else np.zeros(3)
+        extent = float((centroids.max(axis=0) - lo).max()) if count else 0.
+        cells = ((centroids - lo) * (1023. / (extent or 1.))).astype(np.int64)
+        order = np.argsort(morton_codes(cells), kind='stable')
+        triangles = triangles[order]
+
+        self.depth = int(np.ceil(np.log2(max(-(-count // leaf_size), 1))))
+        slots = (1 << self.depth) * leaf_size
+        # face index of every slot, -1 for the padding of the last leaves
+        self.order = np.full(slots, -1, dtype=np.int64)
+        self.order[:count] = order
+        # padding slots hold degenerate triangles, they never hit
+        self.v0 = np.zeros((slots, 3), dtype=np.float32)
+        self.e1 = np.zeros((slots, 3), dtype=np.float32)
+        self.e2 = np.zeros((slots, 3), dtype=np.float32)
+        self.v0[:count] = triangles[:, 0]
+        self.e1[:count] = triangles[:, 1] - triangles[:, 0]
+        self.e2[:count] = triangles[:, 2] - triangles[:, 0]
+
+        # padding takes the bounds of the last triangle, so it never grows a box
+        tri_lo = np.zeros((slots, 3))
+        tri_hi = np.zeros((slots, 3))
+        tri_lo[:count] = triangles.min(axis=1)
+        tri_hi[:count] = triangles.max(axis=1)
+        if count:
+            tri_lo[count:], tri_hi[count:] = tri_lo[count - 1], tri_hi[count - 1]
+        self.lo = [tri_lo.reshape(-1, leaf_size, 3).min(axis=1)]
+        self.hi = [tri_hi.reshape(-1, leaf_size, 3).max(axis=1)]
+        for _ in range(self.depth):
+            self.lo.insert(0, self.lo[0].reshape(-1, 2, 3).min(axis=1))
+            self.hi.insert(0, self.hi[0].reshape(-1, 2, 3).max(axis=1))
+
+    def len(self):
+        return int((self.order >= 0).sum())
+
+    def nbytes(self):
+        return sum(a.nbytes for a in [self.order, self.v0, self.e1, self.e2] + self.lo + self.hi)
+
+    def occluded(self, origins, directions, t_max, t_min=0., batch=4096):
+        # True for every ray that hits a triangle at t_min < t < t_max,
+        # t in units of the (not necessarily normalized) direction
+        origins = np.asarray(origins, dtype=np.float64)
+        directions = np.asarray(directions, dtype=np.float64)
+        t_max = np.broadcast_to(np.asarray(t_max, dtype=np.float64), len(origins))
+        result = np.zeros(len(origins), dtype=bool)
+        for start in range(0, len(origins), batch):
+            stop = start + batch
+            result[start:stop] = self.occluded_batch(origins[start:stop], directions[start:stop],
+                                                     t_max[start:stop], t_min)
+        return result
+
+    def leaf_pairs(self, origins, directions, t_max, t_min=0.):
+        # (ray, leaf) of every leaf box a ray passes through between t_min and t_max
+        # a tiny stand-in for zero components keeps 0 * inf out of the slab test
+        inverse = 1. / np.where(directions == 0., 1e-30, directions)
+        rays = np.arange(len(origins))
+        nodes = np.zeros(len(origins), dtype=np.int64)
+        for level in range(self.depth + 1):
+            if level > 0:
+                rays = np.repeat(rays, 2)
+                nodes = np.repeat(nodes * 2, 2)
+                nodes[1::2] += 1
+            t0 = (self.lo[level][nodes] - origins[rays]) * inverse[rays]
+            t1 = (self.hi[level][nodes] - origins[rays]) * inverse[rays]
+            near = np.minimum(t0, t1).max(axis=1)
+            far = np.maximum(t0, t1).min(axis=1)
+            keep = (near <= far) & (far > t_min) & (near < t_max[rays])
+            rays, nodes = rays[keep], nodes[keep]
+            if len(rays) == 0:
+                break
+        return rays, nodes
+
+    def occluded_batch(self, origins, directions, t_max, t_min=0., pair_chunk=1 << 16):
+        rays, nodes = self.leaf_pairs(origins, directions, t_max, t_min)
+        hit = np.zeros(len(origins), dtype=bool)
+        steps = np.arange(self.leaf_size)
+        for start in range(0, len(rays), pair_chunk):
+            chunk_rays = rays[start:start + pair_chunk]
+            # rays found occluded by an earlier chunk are done
+            open_rays = ~hit[chunk_rays]
+            chunk_rays = chunk_rays[open_rays]
+            slots = (nodes[start:start + pair_chunk][open_rays, None] * self.leaf_size + steps).ravel()
+            chunk_rays = np.repeat(chunk_rays, self.leaf_size)
+            t = self.intersect(origins[chunk_rays], directions[chunk_rays], slots)
+            hit[chunk_rays[(t > t_min) & (t < t_max[chunk_rays])]] = True
+        return hit
+
+    def first_hit(self, origins, directions, t_max=np.inf, t_min=0.):
+        # (t, face) of the nearest hit of every ray, face is -1 for a miss
+        origins = np.atleast_2d(np.asarray(origins, dtype=np.float64))
+        directions = np.atleast_2d(np.asarray(directions, dtype=np.float64))
+        t_max = np.broadcast_to(np.asarray(t_max, dtype=np.float64), len(origins))
+        rays, nodes = self.leaf_pairs(origins, directions, t_max, t_min)
+        slots = (nodes[:, None] * self.leaf_size + np.arange(self.leaf_size)).ravel()
+        rays = np.repeat(rays, self.leaf_size)
+        t = self.intersect(origins[rays], directions[rays], slots)
+        hit = (t > t_min) & (t < t_max[rays])
+        rays, slots, t = rays[hit], slots[hit], t[hit]
+        best_t = np.full(len(origins), np.inf)
+        np.minimum.at(best_t, rays, t)
+        face = np.full(len(origins), -1, dtype=np.int64)
+        nearest = t == best_t[rays]
+        face[rays[nearest]] = self.order[slots[nearest]]
+        return best_t, face
+
+    def intersect(self, origins, directions, slots):
+        # Moller-Trumbore, one ray per slot, t of the hit or nan
+        e1, e2 = self.e1[slots], self.e2[slots]
+        p = np.cross(directions, e2)
+        det = np.einsum('ij,ij->i', e1, p)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv_det = 1. / det
+            s = origins - self.v0[slots]
+            u = np.einsum('ij,ij->i', s, p) * inv_det
+            q = np.cross(s, e1)
+            v = np.einsum('ij,ij->i', directions, q) * inv_det
+            t = np.einsum('ij,ij->i', e2, q) * inv_det
+        return np.where((np.abs(det) > 1e-12) & (u >= 0) & (v >= 0) & (u + v <= 1), t, np.nan)
+
+
+class EmbreeBVH():
+    # the same occlusion query on an embree scene, about a hundred times the
+    # rays per second of TriangleBVH; embree works in float32
+    def __init__(self, vertices, faces) -> None:
+        rtcore_scene, TriangleMesh = embree()
+        self.scene = rtcore_scene.EmbreeScene()
+        self.count = len(faces)
+        TriangleMesh(self.scene, np.asarray(vertices, dtype=np.float32)[np.asarray(faces)])
+
+    def len(self):
+        return self.count
+
+    def occluded(self, origins, directions, t_max, t_min=0., batch=1 << 20):
+        # embree starts every ray at t = 0, t_min moves the origins instead
+        origins = np.asarray(origins, dtype=np.float64)
+        directions = np.asarray(directions, dtype=np.float64)
+        t_max = np.broadcast_to(np.asarray(t_max, dtype=np.float64), len(origins))
+        result = np.zeros(len(origins), dtype=bool)
+        for start in range(0, len(origins), batch):
+            stop = start + batch
+            origin = origins[start:stop] + t_min * directions[start:stop]
+            hits = self.scene.run(origin.astype(np.float32), directions[start:stop].astype(np.float32),
+                                  dists=(t_max[start:stop] - t_min).astype(np.float32), query='OCCLUDED')
+            result[start:stop] = hits != -1
+        return result
+
+    def first_hit(self, origins, directions, t_max=np.inf, t_min=0.):
+        origins = np.atleast_2d(np.asarray(origins, dtype=np.float64))
+        directions = np.atleast_2d(np.asarray(directions, dtype=np.float64))
+        t_max = np.broadcast_to(np.asarray(t_max, dtype=np.float64), len(origins))
+        hits = self.scene.run((origins + t_min * directions).astype(np.float32), directions.astype(np.float32),
+                              dists=np.minimum(t_max - t_min, 1e37).astype(np.float32), output=1)
+        face = hits['primID'].astype(np.int64)
+        t = np.where(face >= 0, hits['tfar'].astype(np.float64) + t_min, np.inf)
+        return t, face
+
+
+def build_bvh(vertices, faces):
+    # embree when embreex is installed, the numpy tree otherwise
+    if has_embree():
+        return EmbreeBVH(vertices, faces)
+    return TriangleBVH(vertices, faces)
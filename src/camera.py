@@ -0,0 +1,86 @@
+import numpy as np
+
+import path_geometry
+
+
+class CameraIntrinsics():
+    # pinhole camera from sensor size and focal length, all in mm
+    def __init__(self, name, focal_length, sensor_width, sensor_height, width, height) -> None:
+        self.name = name
+        self.focal_length = focal_length
+        self.sensor_width, self.sensor_height = sensor_width, sensor_height
+        self.width, self.height = width, height
+
+    @property
+    def hfov(self):
+        return np.degrees(2 * np.arctan(self.sensor_width / (2 * self.focal_length)))
+
+    @property
+    def vfov(self):
+        return np.degrees(2 * np.arctan(self.sensor_height / (2 * self.focal_length)))
+
+    def tan_half_fov(self):
+        return self.sensor_width / (2 * self.focal_length), self.sensor_height / (2 * self.focal_length)
+
+
+CAMERA_PRESETS = {
+    'DJI Phantom 4 Pro': CameraIntrinsics('DJI Phantom 4 Pro', 8.8, 13.2, 8.8, 5472, 3648),
+    'DJI Mavic 2 Pro': CameraIntrinsics('DJI Mavic 2 Pro', 10.26, 13.2, 8.8, 5472, 3648),
+    'DJI Zenmuse P1 35mm': CameraIntrinsics('DJI Zenmuse P1 35mm', 35., 35.9, 24., 8192, 5460),
+    'Sony A7R IV 24mm': CameraIntrinsics('Sony A7R IV 24mm', 24., 35.7, 23.8, 9504, 6336),
+}
+DEFAULT_CAMERA = 'DJI Phantom 4 Pro'
+
+
+def camera_rotations(trajectory):
+    # (n, 3, 3) camera to world rotations; the columns are the camera x (right),
+    # y (down) and z (viewing direction) axes, the same frame the path markers
+    # are drawn in, so the cone of a marker points where the camera looks.
+    # roll is not used, as for the markers
+    return path_geometry.marker_rotations(trajectory.pitch, trajectory.yaw)
+
+
+def to_camera(rotations, centers, points):
+    # (views, points, 3) coordinates of points in every camera frame
+    return np.einsum('vji,vpj->vpi', rotations, points[None, :, :] - centers[:, None, :])
+
+
+def in_fov(camera_points, intrinsics, max_distance=None):
+    tan_x, tan_y = intrinsics.tan_half_fov()
+    z = camera_points[..., 2]
+    visible = (z > 0) & (np.abs(camera_points[..., 0]) <= tan_x * z) & (np.abs(camera_points[..., 1]) <= tan_y * z)
+    if max_distance is not None:
+        visible &= np.einsum('...i,...i->...', camera_points, camera_points) <= max_distance ** 2
+    return visible
+
+
+def image_corners(intrinsics):
+    # (4, 3) corners of the image at unit depth in the camera frame, top left first, clockwise
+    tan_x, tan_y = intrinsics.tan_half_fov()
+    return np.array([[-tan_x, -tan_y, 1.], [tan_x, -tan_y, 1.], [tan_x, tan_y, 1.], [-tan_x, tan_y, 1.]])
+
+
+def frustum_lines(rotations, centers, intrinsics, depth):
+    # (n * 16, 3) float32 GL_LINES vertex pairs, the 4 rays and the 4 edges of
+    # the image rectangle at depth of every camera
+    corners = np.einsum('nij,cj->nci', rotations, depth * image_corners(intrinsics)) + centers[:, None, :]
+    lines = np.empty((len(centers), 8, 2, 3), dtype=np.float32)
+    lines[:, :4, 0] = centers[:, None, :]
+    lines[:, :4, 1] = corners
+    lines[:, 4:, 0] = corners
+    lines[:, 4:, 1] = np.roll(corners, -1, axis=1)
+    return lines.reshape(-1, 3)
+
+
+def footprints(rotations, centers, intrinsics, ground=0., max_distance=None):
+    # (n, 4, 3) points where the corner rays of every camera meet the plane
+    # z = ground, and the (n,) mask of cameras whose four rays all reach it
+    # (within max_distance along the ray)
+    rays = np.einsum('nij,cj->nci', rotations, image_corners(intrinsics))
+    down = rays[..., 2] < 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(down, (ground - centers[:, None, 2]) / rays[..., 2], 0.)
+    valid = down.all(axis=1) & (centers[:, 2] > ground)
+    if max_distance is not None:
+        valid &= (t * np.sqrt(np.einsum('nci,nci->nc', rays, rays))).max(axis=1) <= max_distance
+    return centers[:, None, :] + t[..., None] * rays, valid
@@ -0,0 +1,260 @@
+import numpy as np
+
+from bvh import TriangleBVH
+from process_pool import process_pool
+
+
+def dot(a, b):
+    return np.einsum('ij,ij->i', a, b)
+
+
+def closest_on_triangle(p, a, b, c):
+    # closest points to p on triangles abc, all (n, 3); the Voronoi region
+    # tests of Ericson, Real-Time Collision Detection 5.1.5, done for all rows
+    ab, ac, ap = b - a, c - a, p - a
+    d1, d2 = dot(ab, ap), dot(ac, ap)
+    bp = p - b
+    d3, d4 = dot(ab, bp), dot(ac, bp)
+    cp = p - c
+    d5, d6 = dot(ab, cp), dot(ac, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denom = 1. / (va + vb + vc)
+        v = vb * denom
+        w = vc * denom
+        result = a + ab * v[:, None] + ac * w[:, None]
+        # edges, later regions take precedence over the face
+        t_bc = (d4 - d3) / ((d4 - d3) + (d5 - d6))
+        on_bc = (va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0)
+        result = np.where(on_bc[:, None], b + (c - b) * t_bc[:, None], result)
+        t_ac = d2 / (d2 - d6)
+        on_ac = (vb <= 0) & (d2 >= 0) & (d6 <= 0)
+        result = np.where(on_ac[:, None], a + ac * t_ac[:, None], result)
+        t_ab = d1 / (d1 - d3)
+        on_ab = (vc <= 0) & (d1 >= 0) & (d3 <= 0)
+        result = np.where(on_ab[:, None], a + ab * t_ab[:, None], result)
+    # vertices
+    result = np.where(((d6 >= 0) & (d5 <= d6))[:, None], c, result)
+    result = np.where(((d3 >= 0) & (d4 <= d3))[:, None], b, result)
+    result = np.where(((d1 <= 0) & (d2 <= 0))[:, None], a, result)
+    return result
+
+
+def segment_segment_distance(p0, p1, q0, q1):
+    # closest distance between segments p0p1 and q0q1, Ericson 5.1.9
+    d1, d2, r = p1 - p0, q1 - q0, p0 - q0
+    a, e, f = dot(d1, d1), dot(d2, d2), dot(d2, r)
+    c, b = dot(d1, r), dot(d1, d2)
+    denom = a * e - b * b
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(denom > 1e-12 * a * e, np.clip((b * f - c * e) / denom, 0., 1.), 0.)
+        t = (b * s + f) / e
+        t = np.where(e > 0, t, 0.)
+        # t outside the segment, clamp it and recompute s
+        s = np.where(t < 0, np.clip(-c / a, 0., 1.), np.where(t > 1, np.clip((b - c) / a, 0., 1.), s))
+        # degenerate segments are points
+        s = np.where(e > 0, s, np.clip(-c / a, 0., 1.))
+        s = np.where(a > 0, s, 0.)
+    t = np.clip(t, 0., 1.)
+    gap = p0 + d1 * s[:, None] - (q0 + d2 * t[:, None])
+    return np.sqrt(dot(gap, gap))
+
+
+def segment_crosses_triangle(p0, p1, a, b, c):
+    # Moller-Trumbore with the segment as a ray over t in [0, 1]
+    direction = p1 - p0
+    e1, e2 = b - a, c - a
+    p = np.cross(direction, e2)
+    det = dot(e1, p)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_det = 1. / det
+        s = p0 - a
+        u = dot(s, p) * inv_det
+        q = np.cross(s, e1)
+        v = dot(direction, q) * inv_det
+        t = dot(e2, q) * inv_det
+        # u and v are nan or inf where det is zero, the mask drops those rows
+        return (np.abs(det) > 1e-12) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0) & (t <= 1)
+
+
+def point_triangle_distance(points, a, b, c):
+    gap = points - closest_on_triangle(points, a, b, c)
+    return np.sqrt(dot(gap, gap))
+
+
+def segment_triangle_distance(p0, p1, a, b, c):
+    # zero when the segment passes through, else the nearest of its end
+    # points to the face and of the segment to the three edges
+    distance = np.minimum(point_triangle_distance(p0, a, b, c), point_triangle_distance(p1, a, b, c))
+    for q0, q1 in ((a, b), (b, c), (c, a)):
+        distance = np.minimum(distance, segment_segment_distance(p0, p1, q0, q1))
+    return np.where(segment_crosses_triangle(p0, p1, a, b, c), 0., distance)
+
+
+def point_segment_distance(points, p0, p1):
+    direction = p1 - p0
+    length = dot(direction, direction)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(length > 0, np.clip(dot(points - p0, direction) / length, 0., 1.), 0.)
+    gap = points - (p0 + direction * t[:, None])
+    return np.sqrt(dot(gap, gap))
+
+
+def box_distance(lo, hi, query_lo, query_hi):
+    # lower bound of the distance between a node box and the box of a query
+    gap = np.maximum(np.maximum(lo - query_hi, query_lo - hi), 0.)
+    return np.sqrt(dot(gap, gap))
+
+
+class ClearanceEngine():
+    # distances from waypoints and flight segments to a mesh. a query only
+    # descends into BVH nodes closer than an upper bound of its distance, the
+    # nearest mesh vertex gives a tight one. faces of the leaves left are
+    # skipped when their bounding sphere is out of reach, the rest are
+    # measured exactly
+    def __init__(self, vertices, faces, leaf_size=8) -> None:
+        from scipy.spatial import cKDTree
+        vertices = np.asarray(vertices, dtype=np.float64)
+        self.bvh = TriangleBVH(vertices, faces, leaf_size)
+        # only vertices of some face bound the distance to the faces
+        self.vertex_tree = cKDTree(vertices[np.unique(np.asarray(faces))])
+        a, b, c = self.triangles(slice(None))
+        self.centers = (a + b + c) / 3.
+        self.radii = np.sqrt(np.max([dot(v - self.centers, v - self.centers) for v in (a, b, c)], axis=0))
+        # padding slots hold no face, they are never in reach
+        self.radii[self.bvh.order < 0] = -np.inf
+        normals = np.cross(b - a, c - a)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.normals = np.nan_to_num(normals / np.sqrt(dot(normals, normals))[:, None])
+        self.offsets = dot(self.normals, a)
+
+    def leaf_pairs(self, query_lo, query_hi, upper):
+        # (query, leaf) of every leaf within upper[query] of the query box
+        bvh = self.bvh
+        queries = np.arange(len(query_lo))
+        nodes = np.zeros(len(query_lo), dtype=np.int64)
+        for level in range(bvh.depth + 1):
+            if level > 0:
+                queries = np.repeat(queries, 2)
+                nodes = np.repeat(nodes * 2, 2)
+                nodes[1::2] += 1
+            near = box_distance(bvh.lo[level][nodes], bvh.hi[level][nodes], query_lo[queries], query_hi[queries])
+            keep = near <= upper[queries]
+            queries, nodes = queries[keep], nodes[keep]
+        return queries, nodes
+
+    def measure(self, query_lo, query_hi, upper, center_distance, distance, plane_distance=None,
+                pair_chunk=1 << 16):
+        # smallest distance(queries, slots) per query over the faces within reach;
+        # center_distance(queries, slots) is the distance to the face centers
+        # and plane_distance a lower bound from the face planes
+        queries, nodes = self.leaf_pairs(query_lo, query_hi, upper)
+        best = upper.copy()
+        face = np.full(len(upper), -1, dtype=np.int64)
+        steps = np.arange(self.bvh.leaf_size)
+        for start in range(0, len(queries), pair_chunk):
+            chunk = np.repeat(queries[start:start + pair_chunk], self.bvh.leaf_size)
+            slots = (nodes[start:start + pair_chunk, None] * self.bvh.leaf_size + steps).ravel()
+            reach = center_distance(chunk, slots) - self.radii[slots] <= best[chunk]
+            chunk, slots = chunk[reach], slots[reach]
+            if plane_distance is not None:
+                reach = plane_distance(chunk, slots) <= best[chunk]
+                chunk, slots = chunk[reach], slots[reach]
+            d = distance(chunk, slots)
+            np.minimum.at(best, chunk, d)
+            nearest = d <= best[chunk]
+            face[chunk[nearest]] = self.bvh.order[slots[nearest]]
+        return best, face
+
+    def triangles(self, slots):
+        a = self.bvh.v0[slots].astype(np.float64)
+        return a, a + self.bvh.e1[slots], a + self.bvh.e2[slots]
+
+    def point_distances(self, points, batch=8192):
+        # (distance, face) of every point to the mesh
+        points = np.asarray(points, dtype=np.float64)
+        upper, _ = self.vertex_tree.query(points)
+        distance, face = np.empty(len(points)), np.empty(len(points), dtype=np.int64)
+        for start in range(0, len(points), batch):
+            p = points[start:start + batch]
+            distance[start:start + batch], face[start:start + batch] = self.measure(
+                p, p, upper[start:start + batch],
+                lambda queries, slots: np.sqrt(dot(p[queries] - self.centers[slots], p[queries] - self.centers[slots])),
+                lambda queries, slots: point_triangle_distance(p[queries], *self.triangles(slots)),
+                lambda queries, slots: np.abs(dot(p[queries], self.normals[slots]) - self.offsets[slots]))
+        return distance, face
+
+    def segment_distances(self, starts, ends, upper=None, batch=4096):
+        # (distance, face) of every segment starts[i] .. ends[i] to the mesh;
+        # upper bounds the distances, e.g. by those of the end points
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        if upper is None:
+            upper = np.minimum(self.vertex_tree.query(starts)[0], self.vertex_tree.query(ends)[0])
+        distance, face = np.empty(len(starts)), np.empty(len(starts), dtype=np.int64)
+        for start in range(0, len(starts), batch):
+            p0, p1 = starts[start:start + batch], ends[start:start + batch]
+            distance[start:start + batch], face[start:start + batch] = self.measure(
+                np.minimum(p0, p1), np.maximum(p0, p1), upper[start:start + batch],
+                lambda queries, slots: point_segment_distance(self.centers[slots], p0[queries], p1[queries]),
+                lambda queries, slots: segment_triangle_distance(p0[queries], p1[queries], *self.triangles(slots)))
+        return distance, face
+
+    def check(self, trajectory, threshold, chunk=8192, processes=1):
+        # clearance of a whole path, waypoints and segments under threshold are
+        # violations. chunks of waypoints run on a process pool unless processes=1
+        positions = trajectory.positions()
+        starts = [(start, start + chunk) for start in range(0, len(positions), chunk)]
+        if processes == 1 or len(starts) <= 1:
+            # inline runs keep their state local, loader threads may run several at once
+            waypoint = [point_chunk(self, positions, bounds) for bounds in starts]
+            waypoint_distance = _concatenate(waypoint)[0]
+            segment = [segment_chunk(self, positions, waypoint_distance, bounds) for bounds in starts]
+        else:
+            with process_pool(processes, _init_worker, (self, positions)) as pool:
+                waypoint = list(pool.map(_point_chunk, starts))
+            with process_pool(processes, _init_worker, (self, positions, _concatenate(waypoint)[0])) as pool:
+                segment = list(pool.map(_segment_chunk, starts))
+        waypoint, waypoint_face = _concatenate(waypoint)
+        segment, segment_face = _concatenate(segment)
+        return dict(waypoint=waypoint, waypoint_face=waypoint_face,
+                    segment=segment, segment_face=segment_face,
+                    waypoint_violations=np.flatnonzero(waypoint < threshold),
+                    segment_violations=np.flatnonzero(segment < threshold))
+
+
+def _concatenate(results):
+    if not results:
+        return np.zeros(0), np.zeros(0, dtype=np.int64)
+    return np.concatenate([d for d, _ in results]), np.concatenate([f for _, f in results])
+
+
+def point_chunk(engine, positions, bounds):
+    return engine.point_distances(positions[bounds[0]:bounds[1]])
+
+
+def segment_chunk(engine, positions, waypoint, bounds):
+    # segment i runs from waypoint i to i + 1, its end points bound its distance
+    start, stop = bounds[0], min(bounds[1], len(positions) - 1)
+    if stop <= start:
+        return np.zeros(0), np.zeros(0, dtype=np.int64)
+    upper = np.minimum(waypoint[start:stop], waypoint[start + 1:stop + 1])
+    return engine.segment_distances(positions[start:stop], positions[start + 1:stop + 1], upper)
+
+
+# state of a pool process, the engine and the path are sent once per worker
+_worker = {}
+
+
+def _init_worker(engine, positions, waypoint=None):
+    _worker.update(engine=engine, positions=positions, waypoint=waypoint)
+
+
+def _point_chunk(bounds):
+    return point_chunk(_worker['engine'], _worker['positions'], bounds)
+
+
+def _segment_chunk(bounds):
+    return segment_chunk(_worker['engine'], _worker['positions'], _worker['waypoint'], bounds)
@@ -0,0 +1,89 @@
+import numpy as np
+
+COLORMAPS = ['viridis', 'plasma', 'inferno', 'magma', 'cividis']
+
+
+def rgba_array(color, count, dtype=np.float32):
+    # (count, 4) RGBA from one color or one per item, RGB gets alpha 1 and
+    # uint8 colors are scaled to 0 .. 1; None when color fits neither
+    if color is None:
+        return None
+    color = np.asarray(color)
+    if color.ndim == 1 and len(color) in (3, 4):
+        color = color[None]
+    elif not (color.ndim == 2 and color.shape[1] in (3, 4) and len(color) == count):
+        return None
+    scale = 1.
+    if color.dtype == np.uint8 and not dtype == np.uint8:
+        scale = 1. / 255.
+    elif not color.dtype == np.uint8 and dtype == np.uint8:
+        scale = 255.
+    rgba = np.empty((count, 4), dtype=dtype)
+    rgba[:, 3] = 255 if dtype == np.uint8 else 1.
+    rgba[:, :color.shape[1]] = color * scale if scale != 1. else color
+    return rgba
+
+
+def compact_rgba(rgba):
+    # the one color of a uniformly colored array as a list, otherwise the
+    # array; rgba_array expands either back to one color per item
+    if len(rgba) and (rgba == rgba[0]).all():
+        return rgba[0].tolist()
+    return rgba
+
+
+class ScalarColormap():
+    # maps scalars to RGBA through a lookup table in one pass. values outside
+    # vmin .. vmax take the end colors, or with clamp=False are transparent
+    # like NaN; log=True spaces the colors by log10 of the value. a None
+    # bound is taken from the values of each map() call
+    def __init__(self, name='viridis', vmin=None, vmax=None, clamp=True, log=False, size=256) -> None:
+        self.name = name
+        self.vmin, self.vmax = vmin, vmax
+        self.clamp = clamp
+        self.log = log
+        self.size = size
+        self.tables = {}
+
+    def table(self, dtype=np.float32):
+        # size colors and a transparent one for values that are not drawn
+        if dtype not in self.tables:
+            import pyqtgraph as pg
+            mode = 'byte' if dtype == np.uint8 else 'float'
+            colors = pg.colormap.get(self.name).getLookupTable(0., 1., self.size, alpha=True, mode=mode)
+            self.tables[dtype] = np.concatenate((colors, np.zeros((1, 4)))).astype(dtype)
+        return self.tables[dtype]
+
+    def value_range(self, values):
+        vmin, vmax = self.vmin, self.vmax
+        if vmin is None or vmax is None:
+            finite = values[np.isfinite(values) & (values > 0)] if self.log else values[np.isfinite(values)]
+            if vmin is None:
+                vmin = finite.min() if len(finite) else (1. if self.log else 0.)
+            if vmax is None:
+                vmax = finite.max() if len(finite) else vmin
+        return vmin, vmax
+
+    def indices(self, values):
+        # table row of every value, computed in float32 to keep 20M points light
+        values = np.asarray(values)
+        vmin, vmax = self.value_range(values)
+        position = values.astype(np.float32)
+        if self.log:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                np.log10(position, out=position)
+            vmin, vmax = np.log10(max(vmin, 1e-30)), np.log10(max(vmax, 1e-30))
+        position -= np.float32(vmin)
+        position *= np.float32((self.size - 1) / ((vmax - vmin) or 1.))
+        with np.errstate(invalid='ignore'):
+            hidden = ~(position >= 0.) | (position > self.size - 1) if not self.clamp else np.isnan(position)
+            np.clip(position, 0., self.size - 1, out=position)
+            position += np.float32(.5)
+            index = position.astype(np.int32)
+        index[hidden] = self.size
+        return index
+
+    def map(self, values, out=None, dtype=np.float32):
+        # (n, 4) colors, written into out when given, e.g. a color buffer a GL item draws from
+        table = self.table(out.dtype.type if out is not None else dtype)
+        return np.take(table, self.indices(values), axis=0, out=out)
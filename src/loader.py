@@ -0,0 +1,156 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+from PySide6.QtCore import QObject, Signal
+
+from profiling import profiled
+
+# container class in MeshViewerWidget of each item type, the module and
+# pyqtgraph.opengl with it are imported by the first load
+CONTAINER_TYPES = {
+    'Mesh': 'ViewerMeshItemContainer',
+    'Points': 'ViewerSampleItemContainer',
+    'Path': 'ViewerPathItemContainer',
+    'Tiles': 'ViewerTiledMeshItemContainer',
+}
+
+
+def container_class(typ):
+    import MeshViewerWidget
+    return getattr(MeshViewerWidget, CONTAINER_TYPES[typ])
+
+
+def restore_container(entry):
+    # a container as a project recorded it, hidden ones stay unread until shown
+    container = container_class(entry['type'])(
+        entry['path'], display=entry['show'], build_item=False, arrays=entry['arrays'],
+        lazy=not entry['show'], **entry['options'])
+    if container.loaded:
+        container.set_style(entry['style'])
+    else:
+        container.pending_style = entry['style']
+    return container
+
+
+def restore_containers(entries):
+    # each entry on its own, a missing or unreadable file only loses its object;
+    # returns the containers, None where one failed, and (path, error) of the failures
+    containers, failures = [], []
+    for entry in entries:
+        try:
+            containers.append(restore_container(entry))
+        except Exception as e:
+            containers.append(None)
+            failures.append((entry['path'], str(e)))
+    return containers, failures
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class AssetLoader(QObject):
+    # signals are emitted from the worker threads, Qt queues them
+    # to the thread the loader lives in (the GUI thread)
+    sigProgress = Signal(int, int)            # finished jobs, submitted jobs
+    sigLoaded = Signal(str, object)           # item type, container without GL items
+    sigFailed = Signal(str, str, str)         # item type, file path, error message
+    sigIdle = Signal()
+    sigTaskDone = Signal(str, object)         # task name, result
+    sigTaskFailed = Signal(str, str)          # task name, error message
+
+    def __init__(self, parent=None, max_workers=None):
+        super().__init__(parent)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 1))
+        # analyses run for seconds to minutes and start process pools of their own,
+        # one at a time on their own thread so file loads never queue behind them
+        self.analysis_pool = ThreadPoolExecutor(max_workers=1)
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.submitted = 0
+        self.finished = 0
+        self.cancel_event = threading.Event()
+
+    def submit(self, typ, path, **options):
+        # options are passed on to the container, e.g. follow=True for a path
+        if typ not in CONTAINER_TYPES:
+            raise ValueError('unknown item type %s' % typ)
+        with self.lock:
+            if not self.jobs:
+                self.submitted, self.finished = 0, 0
+                self.cancel_event = threading.Event()
+            self.submitted += 1
+            cancel_event = self.cancel_event
+            future = self.pool.submit(self.read, typ, path, cancel_event, options)
+            self.jobs[future] = (typ, path)
+        self.sigProgress.emit(self.finished, self.submitted)
+        future.add_done_callback(self.on_job_done)
+        return future
+
+    def submit_many(self, items):
+        # items is a list of (type, path), they are parsed in parallel
+        return [self.submit(typ, path) for typ, path in items]
+
+    @profiled('loader')
+    def read(self, typ, path, cancel_event, options):
+        if cancel_event.is_set():
+            raise LoadCancelled(path)
+        container = container_class(typ)(path, build_item=False, **options)
+        # the parse itself can not be interrupted, drop the result instead
+        if cancel_event.is_set():
+            raise LoadCancelled(path)
+        return container
+
+    def run_task(self, name, fn, *args, **kwargs):
+        # short computations on the loading pool, the result comes back by name
+        return self.submit_task(self.pool, name, fn, *args, **kwargs)
+
+    def run_analysis(self, name, fn, *args, **kwargs):
+        # long computations, queued behind each other on the analysis thread
+        return self.submit_task(self.analysis_pool, name, fn, *args, **kwargs)
+
+    def submit_task(self, pool, name, fn, *args, **kwargs):
+        future = pool.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda future: self.on_task_done(name, future))
+        return future
+
+    def on_task_done(self, name, future):
+        try:
+            self.sigTaskDone.emit(name, future.result())
+        except CancelledError:
+            pass
+        except Exception as e:
+            self.sigTaskFailed.emit(name, str(e))
+
+    def cancel(self):
+        # jobs still running keep the event that was set, later submits get a fresh one
+        with self.lock:
+            self.cancel_event.set()
+            self.cancel_event = threading.Event()
+            futures = list(self.jobs)
+        for future in futures:
+            future.cancel()
+
+    def is_busy(self):
+        return len(self.jobs) > 0
+
+    def on_job_done(self, future):
+        with self.lock:
+            typ, path = self.jobs.pop(future)
+            self.finished += 1
+            finished, submitted, idle = self.finished, self.submitted, not self.jobs
+        self.sigProgress.emit(finished, submitted)
+        try:
+            self.sigLoaded.emit(typ, future.result())
+        except (CancelledError, LoadCancelled):
+            pass
+        except Exception as e:
+            self.sigFailed.emit(typ, path, str(e))
+        if idle:
+            self.sigIdle.emit()
+
+    def shutdown(self):
+        self.cancel()
+        self.pool.shutdown(wait=False)
+        self.analysis_pool.shutdown(wait=False)
@@ -1,5 +1,3 @@
-from pathlib import Path
-from posixpath import dirname
 from PySide6 import QtWidgets
 from PySide6 import QtCore
 from PySide6.QtWidgets import (
@@ -9,7 +7,8 @@ from PySide6.QtWidgets import (
     QFileDialog,
     QStyle,
     QColorDialog,
-    QMenu, QMenuBar, QVBoxLayout, QHBoxLayout
+    QMenu, QMenuBar, QVBoxLayout, QHBoxLayout,
+    QProgressBar, QToolButton
 )
 from PySide6.QtCore import QPoint, Qt, QDir, Slot, QStandardPaths
 from PySide6.QtGui import (
@@ -26,38 +25,137 @@ from PySide6.QtGui import (
 )
 import sys
 import os
-from pip import main
+import time
+from contextlib import contextmanager
 
 from pyqtgraph.parametertree import Parameter, ParameterTree
 from pyqtgraph.parametertree import types as pTypes
 
 import pyqtgraph as pg
-import pyqtgraph.opengl as gl
-from pyqtgraph import LayoutWidget 
-
-import trimesh
 import numpy as np
 
-from MeshViewerWidget import MeshViewerWidget, ViewerItemContainer
+from path import Trajectory
+from loader import AssetLoader, restore_containers
+from asset_cache import default_cache
+import path_analytics
+import camera
+import visibility
+import reconstructability
+import clearance
+import path_simplify
+import colormap
+import project
+import playback
+from object_registry import ObjectRegistry
+from profiling import profiler, profiled
+
+class ObjectListParameterItem(pTypes.ListParameterItem):
+    # one combo box entry is added or taken out instead of refilling the box
+    def __init__(self, param, depth):
+        super().__init__(param, depth)
+        param.sigLimitAdded.connect(self.limitAdded)
+        param.sigLimitRemoved.connect(self.limitRemoved)
+
+    def limitAdded(self, param, name, value):
+        self.forward[name] = value
+        self.reverse[0].append(value)
+        self.reverse[1].append(name)
+        self.widget.blockSignals(True)
+        self.widget.addItem(name)
+        self.widget.blockSignals(False)
+
+    def limitRemoved(self, param, name):
+        index = self.reverse[1].index(name)
+        del self.forward[name], self.reverse[0][index], self.reverse[1][index]
+        self.widget.blockSignals(True)
+        self.widget.removeItem(index)
+        self.widget.blockSignals(False)
+
+class ObjectListParameter(pTypes.ListParameter):
+    # a list of loaded objects by name, the value is the object id
+    itemClass = ObjectListParameterItem
+    sigLimitAdded = QtCore.Signal(object, object, object)    # self, name, value
+    sigLimitRemoved = QtCore.Signal(object, object)          # self, name
+
+    def addLimit(self, name, value):
+        self.forward[name] = value
+        self.reverse[0].append(value)
+        self.reverse[1].append(name)
+        self.opts['limits'] = self.forward
+        self.sigLimitAdded.emit(self, name, value)
+
+    def removeLimit(self, value):
+        if value not in self.reverse[0]:
+            return
+        index = self.reverse[0].index(value)
+        name = self.reverse[1][index]
+        del self.forward[name], self.reverse[0][index], self.reverse[1][index]
+        self.opts['limits'] = self.forward
+        self.sigLimitRemoved.emit(self, name)
+        if self.value() == value:
+            self.setValue(self.reverse[0][0] if self.reverse[0] else None)
+
+pTypes.registerParameterType('objectlist', ObjectListParameter)
 
 class ObjectGroupParam(pTypes.GroupParameter):
     def __init__(self, main_windows):
-        pTypes.GroupParameter.__init__(self, name="Objects", addText="Add New..", addList=['Mesh', 'Points', 'Path'])
+        pTypes.GroupParameter.__init__(self, name="Objects", addText="Add New..", addList=['Mesh', 'Tiles', 'Points', 'Path'])
         self.main_windows = main_windows
         
     def addNew(self, typ, path=None):
+        # files are parsed by the loader, addLoaded is called back on the Qt thread
+        if path == None:
+            path = self.main_windows.ask_open_path('Load ' + typ)
+        if path == None:
+            return
+        self.main_windows.loader.submit(typ, path, **self.main_windows.load_options(typ))
+
+    @contextmanager
+    def batch(self):
+        # a scene transaction: tree change signals, registry events and viewer
+        # repaints are held back and applied in one pass at the end
+        main_windows = self.main_windows
+        enabled = main_windows.object_list_tree.updatesEnabled()
+        main_windows.object_list_tree.setUpdatesEnabled(False)
+        try:
+            with main_windows.graphics_viewer.batch(), main_windows.registry.batch(), \
+                    main_windows.object_options.treeChangeBlocker():
+                yield self
+        finally:
+            main_windows.object_list_tree.setUpdatesEnabled(enabled)
+
+    def addLoadedMany(self, items):
+        # items is a list of (type, container)
+        with self.batch():
+            return [self.addLoaded(typ, container) for typ, container in items]
+
+    def removeAll(self):
+        with self.batch():
+            for obj in self.main_windows.registry.all():
+                obj.remove()
+
+    def setShown(self, objects, show):
+        with self.batch():
+            for obj in objects:
+                obj['show'] = show
+
+    def addLoaded(self, typ, container):
         if typ == 'Mesh':
-            self.addChild(MeshParam(self.main_windows, path))
+            param = self.addChild(MeshParam(self.main_windows, container=container))
+        elif typ == 'Tiles':
+            param = self.addChild(TilesParam(self.main_windows, container=container))
         elif typ == 'Points':
-            self.addChild(SampleParam(self.main_windows, path))
+            param = self.addChild(SampleParam(self.main_windows, container=container))
         elif typ == 'Path':
-            self.addChild(PathParam(self.main_windows, path))
+            param = self.addChild(PathParam(self.main_windows, container=container))
+        param.register()
+        return param
     
 class ViewerItemParam(pTypes.GroupParameter):
     count = None
-    def __init__(self, main_windows, path=None, **kwds):
+    def __init__(self, main_windows, path=None, container=None, **kwds):
         self.main_windows = main_windows
-        self.setup(path)
+        self.setup(path, container)
         defs = dict(name=self.itemtype, autoIncrementName=True, renamable=False, removable=True, children=[
             dict(name='filename', type='str', value=self.item_container.name),
             dict(name='show', type='bool', value=bool(self.item_container.display)),
@@ -69,9 +167,17 @@ class ViewerItemParam(pTypes.GroupParameter):
     #     self.mesh_viewer_widget, self.container_list, self.item_container = None, None, None
     #     self.itemtype = None
 
+    def register(self):
+        # once the object is in the tree and its name is final
+        self.object_id = self.main_windows.registry.add(self, self.itemtype)
+
     def remove(self):
-        self.mesh_viewer_widget.removeItemContainer(self.item_container)
+        self.main_windows.registry.remove(self.object_id)
+        # a hidden object is not in the viewer any more
+        if self.item_container.display:
+            self.mesh_viewer_widget.removeItemContainer(self.item_container)
         self.container_list.remove(self.item_container)
+        self.item_container.close()
         super().remove()
 
     def set_display(self):
@@ -79,94 +185,84 @@ class ViewerItemParam(pTypes.GroupParameter):
             return
         self.item_container.display = self['show']
         if self['show'] == True:
-            self.mesh_viewer_widget.addItemContainer(self.item_container)
+            # an object a project opened hidden is read the first time it is shown
+            if not self.item_container.loaded:
+                self.item_container.materialize()
+                self.main_windows.on_object_read(self)
+            self.mesh_viewer_widget.show_loaded(self.item_container)
         else:
             self.mesh_viewer_widget.removeItemContainer(self.item_container)
     
-    def set_select(self, param):
-        limits = self.main_windows.object_options.param(param).opts['limits']
-        limits.append(self.name())
-        self.main_windows.object_options.param(param).setLimits([''])
-        self.main_windows.object_options.param(param).setLimits(limits)
-
-    def reselect(self, param):
-        limits = self.main_windows.object_options.param(param).opts['limits']
-        limits.remove(self.name())
-        self.main_windows.object_options.param(param).setLimits([''])
-        self.main_windows.object_options.param(param).setLimits(limits)
-        pass
-    
 class MeshParam(ViewerItemParam):
     count = 0
-    def __init__(self, main_windows, path=None, **kwds):
-        super().__init__(main_windows, path, **kwds)
+    def __init__(self, main_windows, path=None, container=None, **kwds):
+        super().__init__(main_windows, path, container, **kwds)
         name = self.name() 
         if MeshParam.count != 0:
             name += str(MeshParam.count)
         MeshParam.count += 1
         self.opts['name'] = name
-        self.set_select('selected mesh')
 
-    def setup(self, path=None):
-        self.mesh_viewer_widget, self.container_list, self.item_container = self.main_windows.load_mesh(path)
+    def setup(self, path=None, container=None):
+        self.mesh_viewer_widget, self.container_list, self.item_container = self.main_windows.load_mesh(path, container)
         self.itemtype = 'Mesh'
 
-    def remove(self):
-        super().reselect('selected mesh')
-        if self.name() == self.main_windows.object_options.param('selected mesh').value():
-            self.main_windows.selected_mesh_name = ''
-            self.main_windows.selected_mesh = None
-        super().remove()
     
 pTypes.registerParameterType('Mesh', MeshParam)
+
+class TilesParam(ViewerItemParam):
+    count = 0
+    def __init__(self, main_windows, path=None, container=None, **kwds):
+        super().__init__(main_windows, path, container, **kwds)
+        name = self.name() 
+        if TilesParam.count != 0:
+            name += str(TilesParam.count)
+        TilesParam.count += 1
+        self.opts['name'] = name
+
+    def setup(self, path=None, container=None):
+        self.mesh_viewer_widget, self.container_list, self.item_container = self.main_windows.load_tiles(path, container)
+        self.itemtype = 'Tiles'
+
+
+pTypes.registerParameterType('Tiles', TilesParam)
     
 class SampleParam(ViewerItemParam):
     count = 0
-    def __init__(self, main_windows, path=None, **kwds):
-        super().__init__(main_windows, path, **kwds)
+    def __init__(self, main_windows, path=None, container=None, **kwds):
+        super().__init__(main_windows, path, container, **kwds)
         name = self.name() 
         if SampleParam.count != 0:
             name += str(SampleParam.count)
         SampleParam.count += 1
         self.opts['name'] = name
-        self.set_select('selected sample')
 
-    def setup(self, path=None):
-        self.mesh_viewer_widget, self.container_list, self.item_container = self.main_windows.load_sample(path)
+    def setup(self, path=None, container=None):
+        self.mesh_viewer_widget, self.container_list, self.item_container = self.main_windows.load_sample(path, container)
         self.itemtype = 'Points'
 
-    def remove(self):
-        super().reselect('selected sample')
-        if self.name() == self.main_windows.object_options.param('selected sample').value():
-            self.main_windows.selected_sample_name = ''
-            self.main_windows.selected_sample = None
-        super().remove()
 
 pTypes.registerParameterType('Points', SampleParam)
     
 class PathParam(ViewerItemParam):
     count = 0
-    def __init__(self, main_windows, path=None, **kwds):
-        super().__init__(main_windows, path, **kwds)
+    def __init__(self, main_windows, path=None, container=None, **kwds):
+        super().__init__(main_windows, path, container, **kwds)
         name = self.name() 
         if PathParam.count != 0:
             name += str(PathParam.count)
         PathParam.count += 1
         self.opts['name'] = name
-        self.set_select('selected path')
 
-    def setup(self, path=None):
-        self.mesh_viewer_widget, self.container_list, self.item_container = self.main_windows.load_path(path)
+    def setup(self, path=None, container=None):
+        self.mesh_viewer_widget, self.container_list, self.item_container = self.main_windows.load_path(path, container)
         self.itemtype = 'Path'
 
-    def remove(self):
-        super().reselect('selected path')
-        if self.name() == self.main_windows.object_options.param('selected path').value():
-            self.main_windows.selected_path_name = ''
-            self.main_windows.selected_path = None
-        super().remove()
             
-pTypes.registerParameterType('Path', MeshParam)
+pTypes.registerParameterType('Path', PathParam)
+
+# the object list each item type is selected from
+SELECT_PARAMS = dict(Mesh='selected mesh', Points='selected sample', Path='selected path')
 
 
 class MainWindow(QMainWindow):
@@ -178,9 +274,11 @@ class MainWindow(QMainWindow):
 
         self.setup_toolbar()
         self.set_color(Qt.black)
-        self.mime_type_filters = ["image/png", "image/jpeg"]
+        self.setup_loader()
 
-        self.graphics_viewer = MeshViewerWidget()
+        # the GL view, and pyqtgraph.opengl with it, is made once the window
+        # is up; whatever needs it before gets it made on the spot
+        self._graphics_viewer = None
 
         self.main_widget = QWidget()
         self.setCentralWidget(self.main_widget)
@@ -203,11 +301,30 @@ class MainWindow(QMainWindow):
 
         self.splitter.addWidget(self.object_list_tree)
         self.splitter.addWidget(self.splitter2)
-        self.splitter2.addWidget(self.graphics_viewer)
         self.splitter2.addWidget(self.parameter_tree)
         self.splitter.setStretchFactor(0, 2)
         self.splitter.setStretchFactor(1, 3)
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # the first frame is out, the GL view comes next
+        if self._graphics_viewer is None:
+            QtCore.QTimer.singleShot(0, self.setup_viewer)
+
+    @property
+    def graphics_viewer(self):
+        if self._graphics_viewer is None:
+            self.setup_viewer()
+        return self._graphics_viewer
+
+    def setup_viewer(self):
+        if self._graphics_viewer is not None:
+            return
+        from MeshViewerWidget import MeshViewerWidget
+        self._graphics_viewer = MeshViewerWidget()
+        self._graphics_viewer.sigPicked.connect(self.on_picked)
+        self.splitter2.insertWidget(0, self._graphics_viewer)
+
     def setup_toolbar(self):
         self.bar = self.addToolBar("Tool Bar")
         self.bar.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
@@ -232,6 +349,11 @@ class MainWindow(QMainWindow):
             "Load Path",
             self.on_load_path_toolbar,
         )
+        self.bar.addAction(
+            qApp.style().standardIcon(QStyle.SP_BrowserReload),
+            "Follow Path",
+            self.on_follow_path_toolbar,
+        )
         self.bar.addAction(
             qApp.style().standardIcon(QStyle.SP_DialogResetButton),
             "Clear",
@@ -252,6 +374,97 @@ class MainWindow(QMainWindow):
         self.color_action.triggered.connect(self.on_color_clicked)
         self.bar.addAction(self.color_action)
 
+    def setup_loader(self):
+        self.loader = AssetLoader(self)
+        self.loaded_pending = []
+        self.loader.sigLoaded.connect(self.on_asset_loaded)
+        self.loader.sigFailed.connect(self.on_asset_failed)
+        self.loader.sigProgress.connect(self.on_load_progress)
+        self.loader.sigIdle.connect(self.on_load_idle)
+        self.loader.sigTaskDone.connect(self.on_task_done)
+        self.loader.sigTaskFailed.connect(self.on_task_failed)
+
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(200)
+        self.load_progress.setFormat("Loading %v/%m")
+        self.load_cancel = QToolButton()
+        self.load_cancel.setIcon(qApp.style().standardIcon(QStyle.SP_DialogCancelButton))
+        self.load_cancel.setToolTip("Cancel loading")
+        self.load_cancel.clicked.connect(self.loader.cancel)
+        self.statusBar().addPermanentWidget(self.load_progress)
+        self.statusBar().addPermanentWidget(self.load_cancel)
+        self.load_progress.hide()
+        self.load_cancel.hide()
+
+    @Slot(str, object)
+    def on_asset_loaded(self, typ, container):
+        # assets finishing together are added in one scene transaction
+        if not self.loaded_pending:
+            QtCore.QTimer.singleShot(0, self.add_loaded_pending)
+        self.loaded_pending.append((typ, container))
+
+    def add_loaded_pending(self):
+        items, self.loaded_pending = self.loaded_pending, []
+        self.object_objeGroupParam.addLoadedMany(items)
+
+    @Slot(str, str, str)
+    def on_asset_failed(self, typ, path, message):
+        self.statusBar().showMessage("Failed to load %s: %s" % (path, message), 10000)
+
+    @Slot(int, int)
+    def on_load_progress(self, finished, submitted):
+        self.load_progress.setMaximum(submitted)
+        self.load_progress.setValue(finished)
+        self.load_progress.show()
+        self.load_cancel.show()
+
+    @Slot()
+    def on_load_idle(self):
+        self.load_progress.hide()
+        self.load_cancel.hide()
+        cache = default_cache()
+        if cache is not None:
+            stats = cache.stats()
+            self.statusBar().showMessage("Cache: %d hits, %d misses, %.1f MB read, %.1f MB stored" % (
+                stats['hits'], stats['misses'], stats['bytes_read'] / 2**20, stats['size'] / 2**20), 10000)
+
+    @Slot(str, object)
+    def on_task_done(self, name, result):
+        if name == 'visibility':
+            self.show_visibility(result)
+        elif name == 'reconstructability':
+            self.show_reconstructability(*result)
+        elif name == 'clearance':
+            self.show_clearance(*result)
+        elif name == 'simplify':
+            self.show_simplified(*result)
+        elif name == 'project':
+            self.show_project(*result)
+        elif name == 'playback':
+            self.show_track(*result)
+        elif name == 'materialize':
+            self.show_materialized(*result)
+
+    @Slot(str, str)
+    def on_task_failed(self, name, message):
+        self.statusBar().showMessage("%s failed: %s" % (name, message), 10000)
+
+    @Slot(object)
+    def on_picked(self, pick):
+        if pick == None:
+            self.statusBar().clearMessage()
+            return
+        name = pick.container.name
+        if pick.kind == 'Path':
+            node = pick.attributes
+            message = "Waypoint %d of %s: %s at (%.2f, %.2f, %.2f), pitch %.1f, yaw %.1f" % (
+                node['source'], name, node['imagename'], node['x'], node['y'], node['z'], node['pitch'], node['yaw'])
+        elif pick.kind == 'Points':
+            message = "Point %d of %s at (%.2f, %.2f, %.2f)" % ((pick.index, name) + tuple(pick.attributes['position']))
+        else:
+            message = "Face %d of %s at (%.2f, %.2f, %.2f)" % ((pick.index, name) + tuple(pick.attributes['point']))
+        self.statusBar().showMessage(message)
+
     def setup_menu(self):
         self._menu_bar = QMenuBar()
 
@@ -266,12 +479,91 @@ class MainWindow(QMainWindow):
     def setup_object_list_tree(self):
         self.object_list_tree = ParameterTree(showHeader=False)
         self.object_objeGroupParam = ObjectGroupParam(self)
+        self.registry = ObjectRegistry(self)
+        self.registry.sigAdded.connect(self.on_object_added)
+        self.registry.sigRemoved.connect(self.on_object_removed)
+        self.registry.sigBatch.connect(self.on_objects_changed)
         
         self.object_options = Parameter.create(name='params', type='group', children=[
             dict(name='Load Preset..', type='list', limits=[]),
-            dict(name='selected mesh', type='list', limits=['']),
-            dict(name='selected sample', type='list', limits=['']),
-            dict(name='selected path', type='list', limits=['']),
+            dict(name='selected mesh', type='objectlist', limits={'': None}),
+            dict(name='selected sample', type='objectlist', limits={'': None}),
+            dict(name='selected path', type='objectlist', limits={'': None}),
+            dict(name='path metrics', type='group', expanded=False, children=[
+                dict(name='waypoints', type='int', value=0, readonly=True),
+                dict(name='length (m)', type='float', value=0., readonly=True),
+                dict(name='flight time (s)', type='float', value=0., readonly=True),
+                dict(name='mean segment (m)', type='float', value=0., readonly=True),
+                dict(name='max segment (m)', type='float', value=0., readonly=True),
+                dict(name='heading change (deg)', type='float', value=0., readonly=True),
+                dict(name='pitch change (deg)', type='float', value=0., readonly=True),
+                dict(name='waypoints / 100 m', type='float', value=0., readonly=True),
+                dict(name='waypoints / ha', type='float', value=0., readonly=True),
+                dict(name='speed (m/s)', type='float', value=5., step=0.5, limits=[0.1, None]),
+                ]),
+            dict(name='visibility', type='group', expanded=False, children=[
+                dict(name='camera', type='list', limits=list(camera.CAMERA_PRESETS), value=camera.DEFAULT_CAMERA),
+                dict(name='max distance (m)', type='float', value=0., step=1., limits=[0., None]),
+                dict(name='compute', type='action'),
+                dict(name='visible pairs', type='int', value=0, readonly=True),
+                dict(name='mean views / sample', type='float', value=0., readonly=True),
+                dict(name='unseen samples', type='int', value=0, readonly=True),
+                ]),
+            dict(name='frustums', type='group', expanded=False, children=[
+                dict(name='camera', type='list', limits=list(camera.CAMERA_PRESETS), value=camera.DEFAULT_CAMERA),
+                dict(name='depth (m)', type='float', value=10., step=1., limits=[0.1, None]),
+                dict(name='footprints', type='bool', value=False),
+                dict(name='ground height (m)', type='float', value=0., step=1.),
+                dict(name='max distance (m)', type='float', value=0., step=10., limits=[0., None]),
+                dict(name='show', type='action'),
+                dict(name='hide', type='action'),
+                ]),
+            dict(name='reconstructability', type='group', expanded=False, children=[
+                dict(name='d max (m)', type='float', value=60., step=5., limits=[0.1, None]),
+                dict(name='chunk size', type='int', value=1 << 18, step=1 << 16, limits=[1024, None]),
+                dict(name='processes', type='int', value=os.cpu_count() or 1, limits=[1, os.cpu_count() or 1]),
+                dict(name='compute', type='action'),
+                dict(name='mean score', type='float', value=0., readonly=True),
+                dict(name='max score', type='float', value=0., readonly=True),
+                ]),
+            dict(name='clearance', type='group', expanded=False, children=[
+                dict(name='min clearance (m)', type='float', value=5., step=0.5, limits=[0., None]),
+                dict(name='processes', type='int', value=os.cpu_count() or 1, limits=[1, os.cpu_count() or 1]),
+                dict(name='check', type='action'),
+                dict(name='min waypoint (m)', type='float', value=0., readonly=True),
+                dict(name='min segment (m)', type='float', value=0., readonly=True),
+                dict(name='violations', type='int', value=0, readonly=True),
+                ]),
+            dict(name='colormap', type='group', expanded=False, children=[
+                dict(name='colormap', type='list', limits=colormap.COLORMAPS, value='viridis'),
+                dict(name='auto range', type='bool', value=True),
+                dict(name='min', type='float', value=0.),
+                dict(name='max', type='float', value=1.),
+                dict(name='log', type='bool', value=False),
+                dict(name='clamp', type='bool', value=True),
+                dict(name='path value', type='list', limits=['altitude', 'pitch', 'yaw'], value='altitude'),
+                dict(name='color path', type='action'),
+                ]),
+            dict(name='simplify', type='group', expanded=False, children=[
+                dict(name='position tolerance (m)', type='float', value=.1, step=.05, limits=[0., None]),
+                dict(name='angle tolerance (deg)', type='float', value=1., step=.5, limits=[0., None]),
+                dict(name='on load', type='bool', value=False),
+                dict(name='simplify', type='action'),
+                dict(name='kept waypoints', type='int', value=0, readonly=True),
+                dict(name='original waypoints', type='int', value=0, readonly=True),
+                ]),
+            dict(name='tiles', type='group', expanded=False, children=[
+                dict(name='memory budget (MB)', type='int', value=1024, step=256, limits=[16, None]),
+                dict(name='margin', type='float', value=.25, step=.05, limits=[0., None]),
+                ]),
+            dict(name='project', type='group', expanded=False, children=[
+                dict(name='embed geometry', type='bool', value=True),
+                ]),
+            dict(name='profiling', type='group', expanded=False, children=[
+                dict(name='record', type='bool', value=profiler.enabled),
+                dict(name='overlay', type='bool', value=False),
+                dict(name='export', type='action'),
+                ]),
             # dict(name='Duration', type='float', value=10.0, step=0.1, limits=[0.1, None]),
             # dict(name='Reference Frame', type='list', limits=[]),
             # dict(name='Animate', type='bool', value=True),
@@ -286,14 +578,24 @@ class MainWindow(QMainWindow):
         # self.object_options.param('Load').sigActivated.connect(self.load())
         # self.object_options.param('Load Preset..').sigValueChanged.connect(self.loadPreset)
         self.selected_mesh = None
-        self.selected_mesh_name = None
         self.selected_sample = None
-        self.selected_sample_name = None
         self.selected_path = None
-        self.selected_path_name = None
         self.object_options.param('selected mesh').sigValueChanged.connect(self.on_select_mesh)
         self.object_options.param('selected sample').sigValueChanged.connect(self.on_select_sample)
         self.object_options.param('selected path').sigValueChanged.connect(self.on_select_path)
+        self.object_options.param('path metrics', 'speed (m/s)').sigValueChanged.connect(self.show_path_metrics)
+        self.object_options.param('path metrics', 'speed (m/s)').sigValueChanged.connect(self.reset_playback)
+        self.object_options.param('visibility', 'compute').sigActivated.connect(self.on_compute_visibility)
+        self.object_options.param('frustums', 'show').sigActivated.connect(self.on_show_frustums)
+        self.object_options.param('frustums', 'hide').sigActivated.connect(self.on_hide_frustums)
+        self.object_options.param('reconstructability', 'compute').sigActivated.connect(self.on_compute_reconstructability)
+        self.object_options.param('clearance', 'check').sigActivated.connect(self.on_check_clearance)
+        self.object_options.param('simplify', 'simplify').sigActivated.connect(self.on_simplify_path)
+        self.object_options.param('colormap', 'color path').sigActivated.connect(self.on_color_path)
+        self.object_options.param('profiling', 'record').sigValueChanged.connect(self.on_profile_record)
+        self.object_options.param('profiling', 'overlay').sigValueChanged.connect(self.on_profile_overlay)
+        self.object_options.param('profiling', 'export').sigActivated.connect(self.on_profile_export)
+        self.visibility = None
         self.object_options.sigTreeStateChanged.connect(self.on_objectTree_change)
         
         ## read list of preset configs
@@ -302,225 +604,600 @@ class MainWindow(QMainWindow):
         #     presets = [os.path.splitext(p)[0] for p in os.listdir(presetDir)]
         #     self.object_options.param('Load Preset..').setLimits(['']+presets)
 
-    def on_objectTree_change(self, *args):
-        for object in self.object_options.param('Objects'):
-            object.set_display()
-
-        for param, change, data in args[1]:
-            if change == 'childAdded' or change == 'childRemoved':
-                if (self.object_options.param('selected mesh').value() == '' or\
-                    self.object_options.param('selected mesh').value() == None) and \
-                        len(self.object_options.param('selected mesh').opts['limits']) > 1:
-                    if self.selected_mesh_name == None or self.selected_mesh_name == '':
-                        self.selected_mesh_name = self.object_options.param('selected mesh').opts['limits'][1]
-                    self.object_options.param('selected mesh').setValue(self.selected_mesh_name)
-                if (self.object_options.param('selected sample').value() == '' or\
-                    self.object_options.param('selected sample').value() == None) and \
-                        len(self.object_options.param('selected sample').opts['limits']) > 1:
-                    if self.selected_sample_name == None or self.selected_sample_name == '':
-                        self.selected_sample_name = self.object_options.param('selected sample').opts['limits'][1]
-                    self.object_options.param('selected sample').setValue(self.selected_sample_name)
-                if (self.object_options.param('selected path').value() == '' or\
-                    self.object_options.param('selected path').value() == None) and \
-                        len(self.object_options.param('selected path').opts['limits']) > 1:
-                    if self.selected_path_name == None or self.selected_path_name == '':
-                        self.selected_path_name = self.object_options.param('selected path').opts['limits'][1]
-                    self.object_options.param('selected path').setValue(self.selected_path_name)
-
-    def on_select_mesh(self, param, selected_mesh_name):
-        self.selected_mesh_name = selected_mesh_name
-        mesh_num = len(self.object_options.param('selected mesh').opts['limits'])-1
-        for obj in self.object_options.param('Objects'):
-            if obj.itemtype == 'Mesh':
-                if obj.name()+str(mesh_num) == selected_mesh_name:
-                    self.selected_mesh = obj.item_container.mesh
-                    break
-
-    def on_select_sample(self, param, selected_sample_name):
-        self.selected_sample_name = selected_sample_name
-        sample_num = len(self.object_options.param('selected sample').opts['limits'])-1
-        for obj in self.object_options.param('Objects'):
-            if obj.itemtype == 'Points':
-                if obj.name()+str(sample_num) == selected_sample_name:
-                    self.selected_sample = obj.item_container.sample
-                    break
-
-    def on_select_path(self, param, selected_path_name):
-        self.selected_path_name = selected_path_name
-        path_num = len(self.object_options.param('selected path').opts['limits'])-1
-        for obj in self.object_options.param('Objects'):
-            if obj.itemtype == 'Path':
-                if obj.name()+str(path_num) == selected_path_name:
-                    self.selected_path = obj.item_container.path
-                    break
+    @profiled('callback')
+    def on_objectTree_change(self, param, changes):
+        # only the objects a change is about are touched
+        for param, change, data in changes:
+            if change == 'value' and param.name() == 'show' and isinstance(param.parent(), ViewerItemParam):
+                param.parent().set_display()
+
+    @Slot(int)
+    @profiled('callback')
+    def on_object_added(self, object_id):
+        obj = self.registry.get(object_id)
+        # tiled meshes are not selected by any tool
+        if obj.itemtype not in SELECT_PARAMS:
+            return
+        param = self.object_options.param(SELECT_PARAMS[obj.itemtype])
+        param.addLimit(obj.name(), object_id)
+        # the first object of a type is selected right away
+        if param.value() is None:
+            param.setValue(object_id)
+
+    @Slot(int, str)
+    @profiled('callback')
+    def on_object_removed(self, object_id, typ):
+        if typ not in SELECT_PARAMS:
+            return
+        param = self.object_options.param(SELECT_PARAMS[typ])
+        param.removeLimit(object_id)
+        # a removed selection falls back to the oldest object left
+        if param.value() is None:
+            param.setValue(self.registry.first(typ))
+
+    @Slot(list, list)
+    @profiled('callback')
+    def on_objects_changed(self, added, removed):
+        # after a batch every touched selection list is rebuilt once
+        types = set(typ for _, typ in removed)
+        types.update(self.registry.type_of(object_id) for object_id in added)
+        for typ in types.intersection(SELECT_PARAMS):
+            param = self.object_options.param(SELECT_PARAMS[typ])
+            limits = {'': None}
+            for obj in self.registry.of_type(typ):
+                limits[obj.name()] = obj.object_id
+            param.setLimits(limits)
+            if self.registry.get(param.value()) is None:
+                param.setValue(self.registry.first(typ))
+
+    def selected_container(self, typ):
+        # the container of the selected object, a hidden one may not be read yet
+        obj = self.registry.get(self.object_options[SELECT_PARAMS[typ]])
+        if obj is None:
+            return None
+        return obj.item_container
+
+    def selection_ready(self, types, retry):
+        # whether the selected objects of types are read; the hidden ones that
+        # are not yet get read on the loader and retry is called after
+        pending = []
+        for typ in types:
+            container = self.selected_container(typ)
+            if container is not None and not container.loaded:
+                pending.append((typ, container))
+        if not pending:
+            return True
+        self.statusBar().showMessage("Reading %s.." % ', '.join(container.name for _, container in pending))
+
+        def read():
+            for _, container in pending:
+                container.materialize()
+            return [typ for typ, _ in pending], retry
+        self.loader.run_task('materialize', read)
+        return False
+
+    def show_materialized(self, types, retry):
+        for typ in types:
+            self.refresh_selected(typ)
+        self.statusBar().clearMessage()
+        retry()
+
+    def on_object_read(self, obj):
+        # a hidden object read once it is shown, its selection picks up the data
+        if obj.itemtype in SELECT_PARAMS and self.object_options[SELECT_PARAMS[obj.itemtype]] == obj.object_id:
+            self.refresh_selected(obj.itemtype)
+
+    def refresh_selected(self, typ):
+        param = self.object_options.param(SELECT_PARAMS[typ])
+        handler = dict(Mesh=self.on_select_mesh, Points=self.on_select_sample, Path=self.on_select_path)[typ]
+        handler(param, param.value())
+
+    @profiled('callback')
+    def on_select_mesh(self, param, object_id):
+        # a hidden object stays unread until an analysis needs it
+        container = self.selected_container('Mesh')
+        self.selected_mesh = container.mesh if container is not None and container.loaded else None
+
+    @profiled('callback')
+    def on_select_sample(self, param, object_id):
+        container = self.selected_container('Points')
+        self.selected_sample = container.sample if container is not None and container.loaded else None
+
+    @profiled('callback')
+    def on_select_path(self, param, object_id):
+        container = self.selected_container('Path')
+        self.selected_path = container.path if container is not None and container.loaded else None
+        self.show_path_metrics()
+        self.reset_playback()
+
+    def show_path_metrics(self, *args):
+        metrics = self.object_options.param('path metrics')
+        if self.selected_path == None:
+            summary = path_analytics.summarize(Trajectory())
+        else:
+            summary = path_analytics.summarize(self.selected_path, speed=metrics['speed (m/s)'])
+        metrics['waypoints'] = summary['waypoints']
+        metrics['length (m)'] = summary['length']
+        metrics['flight time (s)'] = summary['flight_time']
+        metrics['mean segment (m)'] = summary['mean_segment']
+        metrics['max segment (m)'] = summary['max_segment']
+        metrics['heading change (deg)'] = summary['total_heading_change']
+        metrics['pitch change (deg)'] = summary['total_pitch_change']
+        metrics['waypoints / 100 m'] = summary['waypoints_per_100m']
+        metrics['waypoints / ha'] = summary['waypoints_per_ha']
     
+    def on_compute_visibility(self):
+        if not self.selection_ready(('Mesh', 'Points', 'Path'), self.on_compute_visibility):
+            return
+        if self.selected_mesh == None or self.selected_sample == None or self.selected_path == None:
+            self.statusBar().showMessage("Select a mesh, samples and a path first", 5000)
+            return
+        options = self.object_options.param('visibility')
+        self.statusBar().showMessage("Computing visibility of %d samples from %d viewpoints.." % (
+            len(self.selected_sample.vertices), self.selected_path.len()))
+        self.loader.run_analysis('visibility', visibility.compute_visibility,
+                                 self.selected_mesh.vertices, self.selected_mesh.faces,
+                                 self.selected_sample.vertices, self.selected_path,
+                                 camera.CAMERA_PRESETS[options['camera']],
+                                 max_distance=options['max distance (m)'] or None)
+
+    def show_visibility(self, matrix):
+        self.visibility = matrix
+        options = self.object_options.param('visibility')
+        sample_counts = matrix.sample_counts()
+        options['visible pairs'] = matrix.nnz()
+        options['mean views / sample'] = float(sample_counts.mean()) if len(sample_counts) else 0.
+        options['unseen samples'] = int((sample_counts == 0).sum())
+        self.statusBar().showMessage("Visibility: %d viewpoint-sample pairs" % matrix.nnz(), 10000)
+
+    def on_show_frustums(self):
+        if not self.selection_ready(('Path',), self.on_show_frustums):
+            return
+        container = self.selected_container('Path')
+        if container == None:
+            self.statusBar().showMessage("Select a path first", 5000)
+            return
+        options = self.object_options.param('frustums')
+        container.set_frustums(options['camera'], options['depth (m)'], options['footprints'],
+                               options['ground height (m)'], options['max distance (m)'] or None)
+
+    def on_hide_frustums(self):
+        container = self.selected_container('Path')
+        if container is not None and container.loaded:
+            container.clear_frustums()
+
+    def on_compute_reconstructability(self):
+        if not self.selection_ready(('Points', 'Path'), self.on_compute_reconstructability):
+            return
+        if self.selected_sample == None or self.selected_path == None:
+            self.statusBar().showMessage("Select samples and a path first", 5000)
+            return
+        options = self.object_options.param('reconstructability')
+        sample, trajectory = self.selected_sample, self.selected_path
+        # the visibility computed for this sample and path, otherwise only the camera frustum counts
+        matrix = self.visibility
+        if matrix is not None and matrix.shape != (trajectory.len(), len(sample.vertices)):
+            matrix = None
+        intrinsics = camera.CAMERA_PRESETS[self.object_options['visibility', 'camera']]
+        kwargs = dict(normals=sample.normals, d_max=options['d max (m)'],
+                      chunk_size=options['chunk size'], processes=options['processes'])
+        self.statusBar().showMessage("Scoring reconstructability of %d samples.." % len(sample.vertices))
+        container = self.selected_container('Points')
+        self.loader.run_analysis('reconstructability', lambda: (container, sample, reconstructability.score_samples(
+            sample.vertices, trajectory, matrix, intrinsics, **kwargs)))
+
+    def show_reconstructability(self, container, sample, scores):
+        options = self.object_options.param('reconstructability')
+        options['mean score'] = float(scores.mean()) if len(scores) else 0.
+        options['max score'] = float(scores.max()) if len(scores) else 0.
+        # unless the points were replaced while scoring
+        if container is not None and container.sample is sample:
+            container.set_scalar_color(scores, **self.colormap_options())
+        self.statusBar().showMessage("Reconstructability: mean %.2f, max %.2f" % (
+            options['mean score'], options['max score']), 10000)
+
+    def on_check_clearance(self):
+        if not self.selection_ready(('Mesh', 'Path'), self.on_check_clearance):
+            return
+        if self.selected_mesh == None or self.selected_path == None:
+            self.statusBar().showMessage("Select a mesh and a path first", 5000)
+            return
+        options = self.object_options.param('clearance')
+        mesh, trajectory = self.selected_mesh, self.selected_path
+        threshold, processes = options['min clearance (m)'], options['processes']
+        self.statusBar().showMessage("Checking clearance of %d waypoints against %d faces.." % (
+            trajectory.len(), len(mesh.faces)))
+        container = self.selected_container('Path')
+        self.loader.run_analysis('clearance', lambda: (container, trajectory, clearance.ClearanceEngine(
+            mesh.vertices, mesh.faces).check(trajectory, threshold, processes=processes)))
+
+    def show_clearance(self, container, trajectory, result):
+        options = self.object_options.param('clearance')
+        options['min waypoint (m)'] = float(result['waypoint'].min()) if len(result['waypoint']) else 0.
+        options['min segment (m)'] = float(result['segment'].min()) if len(result['segment']) else 0.
+        # a segment too close marks both of its waypoints
+        segment_ends = np.concatenate((result['segment_violations'], result['segment_violations'] + 1))
+        flagged = np.union1d(result['waypoint_violations'], segment_ends)
+        options['violations'] = len(flagged)
+        # unless the path was replaced while checking
+        if container is not None and container.path is trajectory:
+            container.set_color()
+            container.highlight(segment_ends, (1., .5, 0., 1.))
+            container.highlight(result['waypoint_violations'])
+        self.statusBar().showMessage("Clearance: %d of %d waypoints too close, nearest %.2f m" % (
+            len(flagged), trajectory.len(), min(options['min waypoint (m)'], options['min segment (m)'])), 10000)
+
+    def colormap_options(self):
+        options = self.object_options.param('colormap')
+        vmin, vmax = (None, None) if options['auto range'] else (options['min'], options['max'])
+        return dict(colormap=options['colormap'], vmin=vmin, vmax=vmax, clamp=options['clamp'], log=options['log'])
+
+    def on_color_path(self):
+        if not self.selection_ready(('Path',), self.on_color_path):
+            return
+        container = self.selected_container('Path')
+        if container == None:
+            self.statusBar().showMessage("Select a path first", 5000)
+            return
+        trajectory = container.path
+        values = dict(altitude=trajectory.z, pitch=trajectory.pitch, yaw=trajectory.yaw)[
+            self.object_options['colormap', 'path value']]
+        container.set_scalar_color(values, **self.colormap_options())
+
+    def load_options(self, typ):
+        # container options of a file about to be loaded
+        options = self.object_options.param('simplify')
+        if typ == 'Path' and options['on load']:
+            return dict(simplify=(options['position tolerance (m)'], options['angle tolerance (deg)']))
+        if typ == 'Tiles':
+            options = self.object_options.param('tiles')
+            return dict(budget=options['memory budget (MB)'] << 20, margin=options['margin'])
+        return {}
+
+    def on_simplify_path(self):
+        if not self.selection_ready(('Path',), self.on_simplify_path):
+            return
+        container = self.selected_container('Path')
+        if container == None:
+            self.statusBar().showMessage("Select a path first", 5000)
+            return
+        if container.tail is not None:
+            self.statusBar().showMessage("A followed path can not be simplified", 5000)
+            return
+        options = self.object_options.param('simplify')
+        # always from the full path, a second run does not compound the error
+        source = container.source if container.source is not None else container.path
+        tolerances = (options['position tolerance (m)'], options['angle tolerance (deg)'])
+        self.statusBar().showMessage("Simplifying %d waypoints.." % source.len())
+        self.loader.run_analysis('simplify', lambda: (container, source.len()) + path_simplify.simplify(source, *tolerances))
+
+    def show_simplified(self, container, count, trajectory, index):
+        selected = self.selected_path is container.path
+        container.set_simplified(trajectory, index)
+        if selected:
+            self.selected_path = container.path
+            self.show_path_metrics()
+            self.reset_playback()
+        options = self.object_options.param('simplify')
+        options['kept waypoints'] = trajectory.len()
+        options['original waypoints'] = count
+        self.statusBar().showMessage("Simplified %s: %d of %d waypoints kept" % (
+            container.name, trajectory.len(), count), 10000)
+
     def setup_parameter_tree(self):
+        # flight playback of the selected path
         self.parameter_tree = ParameterTree(showHeader=False)
-        objectGroup = ObjectGroupParam(self)
-        
         self.params = Parameter.create(name='params', type='group', children=[
-            dict(name='Load Preset..', type='list', limits=[]),
-            #dict(name='Unit System', type='list', limits=['', 'MKS']),
             dict(name='Duration', type='float', value=10.0, step=0.1, limits=[0.1, None]),
-            dict(name='Reference Frame', type='list', limits=[]),
-            dict(name='Animate', type='bool', value=True),
+            dict(name='Reference Frame', type='list', limits=['World', 'Drone'], value='World'),
+            dict(name='Animate', type='bool', value=False),
             dict(name='Animation Speed', type='float', value=1.0, dec=True, step=0.1, limits=[0.0001, None]),
-            dict(name='Recalculate Worldlines', type='action'),
-            dict(name='Save', type='action'),
-            dict(name='Load', type='action'),
-            objectGroup,
+            dict(name='Time', type='float', value=0., step=0.1, limits=[0., 10.0]),
             ])
         self.parameter_tree.setParameters(self.params, showTop=False)
-        self.params.param('Recalculate Worldlines').sigActivated.connect(self.set_color())
-        # self.params.param('Save').sigActivated.connect(self.save())
-        # self.params.param('Load').sigActivated.connect(self.load())
-        # self.params.param('Load Preset..').sigValueChanged.connect(self.loadPreset)
-        self.params.sigTreeStateChanged.connect(self.treeChanged)
-        
-        ## read list of preset configs
-        presetDir = os.path.join(os.path.abspath(os.path.dirname(sys.argv[0])), 'presets')
-        if os.path.exists(presetDir):
-            presets = [os.path.splitext(p)[0] for p in os.listdir(presetDir)]
-            self.params.param('Load Preset..').setLimits(['']+presets)
-
-    def treeChanged(self, *args):
-        clocks = []
-        for c in self.params.param('Objects'):
-            clocks.extend(c.clockNames())
-        #for param, change, data in args[1]:
-            #if change == 'childAdded':
-        self.params.param('Reference Frame').setLimits(clocks)
-        # self.setAnimation(self.params['Animate'])
-        
+        self.params.param('Duration').sigValueChanged.connect(self.on_playback_duration)
+        self.params.param('Reference Frame').sigValueChanged.connect(self.show_playback)
+        self.params.param('Animate').sigValueChanged.connect(self.on_animate)
+        self.params.param('Time').sigValueChanged.connect(self.on_scrub)
+        # the PoseTrack of the path played, in seconds of flight; one pass of
+        # it takes Duration seconds at Animation Speed 1
+        self.playback_path = None
+        self.playback_track = None
+        self.playback_time = 0.
+        self.playback_clock = None
+        self.playback_timer = QtCore.QTimer(self)
+        self.playback_timer.setInterval(16)
+        self.playback_timer.timeout.connect(self.on_playback_tick)
+
+    def playback_ready(self):
+        # the track of the selected path is built on the loader the first time it is needed
+        if not self.selection_ready(('Path',), self.reset_playback):
+            return False
+        if self.selected_path == None or self.selected_path.is_empty():
+            return False
+        if self.playback_path is self.selected_path:
+            return self.playback_track is not None
+        trajectory = self.playback_path = self.selected_path
+        self.playback_track = None
+        speed = self.object_options['path metrics', 'speed (m/s)']
+        self.loader.run_task('playback', lambda: (trajectory, playback.PoseTrack(trajectory, speed)))
+        return False
+
+    def show_track(self, trajectory, track):
+        # another path may have been selected while this one was built
+        if trajectory is not self.playback_path:
+            return
+        self.playback_track = track
+        self.playback_time = self.params['Time'] / self.params['Duration'] * track.duration
+        self.show_playback()
+        if self.params['Animate']:
+            self.start_playback()
+
+    def reset_playback(self, *args):
+        # the selected path or its timing changed
+        self.playback_path = None
+        self.playback_track = None
+        if self._graphics_viewer is not None:
+            self._graphics_viewer.clear_playback()
+        if self.params['Animate']:
+            self.start_playback()
+
+    def on_animate(self, param, animate):
+        if animate:
+            self.start_playback()
+        else:
+            self.playback_timer.stop()
+
+    def start_playback(self):
+        # show_track comes back here once the track is built
+        if not self.playback_ready():
+            self.playback_timer.stop()
+            return
+        self.playback_clock = time.perf_counter()
+        self.playback_timer.start()
+
+    def on_playback_tick(self):
+        now = time.perf_counter()
+        elapsed, self.playback_clock = now - self.playback_clock, now
+        track = self.playback_track
+        if track == None:
+            self.playback_timer.stop()
+            return
+        # wall time to flight time, wrapping around at the end of the path
+        self.playback_time += elapsed * self.params['Animation Speed'] * track.duration / self.params['Duration']
+        self.playback_time %= max(track.duration, 1e-9)
+        self.show_playback()
+
+    def on_scrub(self, param, value):
+        if not self.playback_ready():
+            return
+        self.playback_time = value / self.params['Duration'] * self.playback_track.duration
+        self.show_playback(scrubbed=True)
+
+    def on_playback_duration(self, param, duration):
+        time_param = self.params.param('Time')
+        time_param.setLimits([0., duration])
+        if self.playback_track is not None:
+            time_param.setValue(self.playback_time / self.playback_track.duration * duration, blockSignal=self.on_scrub)
+
+    def show_playback(self, *args, scrubbed=False):
+        track = self.playback_track
+        if track == None:
+            return
+        self.graphics_viewer.set_playback_pose(track, self.playback_time, follow=self.params['Reference Frame'] == 'Drone')
+        if not scrubbed and track.duration > 0:
+            self.params.param('Time').setValue(
+                self.playback_time / track.duration * self.params['Duration'], blockSignal=self.on_scrub)
+
     def save(self):
-        filename = pg.QtWidgets.QFileDialog.getSaveFileName(self, "Save State..", "untitled.cfg", "Config Files (*.cfg)")
+        filename = pg.QtWidgets.QFileDialog.getSaveFileName(self, "Save Project..", "untitled.dcproj", "Projects (*.dcproj)")
         if isinstance(filename, tuple):
             filename = filename[0]  # Qt4/5 API difference
         if filename == '':
             return
-        state = self.params.saveState()
-        configfile.writeConfigFile(state, str(filename)) 
+        self.save_project(str(filename), self.object_options['project', 'embed geometry'])
         
     def load(self):
-        filename = pg.QtWidgets.QFileDialog.getOpenFileName(self, "Save State..", "", "Config Files (*.cfg)")
+        filename = pg.QtWidgets.QFileDialog.getOpenFileName(self, "Open Project..", "", "Projects (*.dcproj)")
         if isinstance(filename, tuple):
             filename = filename[0]  # Qt4/5 API difference
         if filename == '':
             return
-        state = configfile.readConfigFile(str(filename)) 
-        self.loadState(state)
+        self.open_project(str(filename))
         
     def loadPreset(self, param, preset):
         if preset == '':
             return
         path = os.path.abspath(os.path.dirname(__file__))
-        fn = os.path.join(path, 'presets', preset+".cfg")
-        state = configfile.readConfigFile(fn)
-        self.loadState(state)
-        
-    def loadState(self, state):
-        if 'Load Preset..' in state['children']:
-            del state['children']['Load Preset..']['limits']
-            del state['children']['Load Preset..']['value']
-        self.params.param('Objects').clearChildren()
-        self.params.restoreState(state, removeChildren=False)
-        self.recalculate()
+        self.open_project(os.path.join(path, 'presets', preset + ".dcproj"))
+
+    def option_values(self):
+        # the settings of the option groups, readouts and actions left out;
+        # profiling belongs to the running session, not the project
+        values = {}
+        for group in self.object_options.children():
+            if not group.type() == 'group' or group is self.object_objeGroupParam or group.name() == 'profiling':
+                continue
+            values[group.name()] = {p.name(): p.value() for p in group.children()
+                                    if not p.readonly() and not p.type() == 'action'}
+        return values
+
+    def restore_option_values(self, values):
+        # settings a later version dropped are skipped
+        for group, children in values.items():
+            for name, value in children.items():
+                try:
+                    self.object_options.param(group, name).setValue(value)
+                except KeyError:
+                    pass
+
+    def project_state(self, embed=True):
+        # the object list with display flags, selection and styling; embed
+        # stores the decoded arrays too, reopening then skips parsing
+        objects = self.registry.all()
+        entries = []
+        for obj in objects:
+            container = obj.item_container
+            entries.append(dict(
+                type=obj.itemtype, path=container.file_path, show=bool(obj['show']),
+                options=container.options(),
+                style=container.style() if container.loaded else container.pending_style or {},
+                arrays=container.embedded_arrays() if embed else None))
+        ids = [obj.object_id for obj in objects]
+        selection = {}
+        for typ, name in SELECT_PARAMS.items():
+            object_id = self.object_options[name]
+            selection[typ] = ids.index(object_id) if object_id in ids else None
+        return dict(objects=entries, selection=selection, options=self.option_values())
+
+    def save_project(self, filename, embed=True):
+        project.write_project(filename, self.project_state(embed))
+        self.statusBar().showMessage("Saved %s" % filename, 10000)
+
+    def open_project(self, filename):
+        # replaces the scene once the project is read; shown objects are read
+        # on the loader, from the mapped arrays when embedded, hidden ones only once shown
+        try:
+            state = project.read_project(filename)
+        except (OSError, ValueError) as e:
+            self.statusBar().showMessage("Failed to open %s: %s" % (filename, e), 10000)
+            return
+        self.statusBar().showMessage("Opening %s.." % filename)
+        self.loader.run_task('project', lambda: (filename, state) + restore_containers(state['objects']))
+
+    def show_project(self, filename, state, containers, failures):
+        failed = '; '.join('%s: %s' % (os.path.basename(path), message) for path, message in failures)
+        # a project none of whose objects could be read leaves the scene as it was
+        if failures and all(container is None for container in containers):
+            self.statusBar().showMessage("Failed to open %s: %s" % (filename, failed), 10000)
+            return
+        self.object_objeGroupParam.removeAll()
+        self.restore_option_values(state['options'])
+        # the recorded selection is made within the batch, before the first
+        # object of a type would be selected and read even if it is hidden;
+        # its entry goes in ahead of the select list rebuild at the end
+        restored = [(index, entry, container) for index, (entry, container)
+                    in enumerate(zip(state['objects'], containers)) if container is not None]
+        with self.object_objeGroupParam.batch():
+            params = self.object_objeGroupParam.addLoadedMany(
+                [(entry['type'], container) for _, entry, container in restored])
+            params_by_index = dict(zip([index for index, _, _ in restored], params))
+            for typ, index in state['selection'].items():
+                if index in params_by_index:
+                    param = self.object_options.param(SELECT_PARAMS[typ])
+                    param.addLimit(params_by_index[index].name(), params_by_index[index].object_id)
+                    param.setValue(params_by_index[index].object_id)
+        if failures:
+            self.statusBar().showMessage("Opened %s: %d objects, %d failed (%s)" % (
+                filename, len(params), len(failures), failed), 10000)
+        else:
+            self.statusBar().showMessage("Opened %s: %d objects" % (filename, len(params)), 10000)
         
     @Slot()
     def on_load_mesh_toolbar(self):
         self.object_objeGroupParam.addNew('Mesh')
 
-    def load_mesh(self, path=None):
-        if path == None:
-            dialog = QFileDialog(self, "Load Mesh")
-            # dialog.setMimeTypeFilters(['mesh/ply', 'mesh/obj'])
-            dialog.setFileMode(QFileDialog.ExistingFile)
-            dialog.setAcceptMode(QFileDialog.AcceptOpen)
-            # dialog.setDefaultSuffix("ply")
-            # dialog.setDirectory(str(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
-            if dialog.exec() == QFileDialog.Accepted:
-                if dialog.selectedFiles():
-                    return self.graphics_viewer.load_mesh(dialog.selectedFiles()[0])
-        else:
-            return self.graphics_viewer.load_mesh(path)
+    def ask_open_path(self, title):
+        dialog = QFileDialog(self, title)
+        # dialog.setMimeTypeFilters(['mesh/ply', 'mesh/obj'])
+        dialog.setFileMode(QFileDialog.ExistingFile)
+        dialog.setAcceptMode(QFileDialog.AcceptOpen)
+        # dialog.setDefaultSuffix("ply")
+        # dialog.setDirectory(str(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+        if dialog.exec() == QFileDialog.Accepted:
+            if dialog.selectedFiles():
+                return dialog.selectedFiles()[0]
+        return None
+
+    def load_mesh(self, path=None, container=None):
+        if path == None and container == None:
+            path = self.ask_open_path("Load Mesh")
+            if path == None:
+                return
+        return self.graphics_viewer.load_mesh(path, container)
+
+    def load_tiles(self, path=None, container=None):
+        if path == None and container == None:
+            path = self.ask_open_path("Load Tiles")
+            if path == None:
+                return
+        return self.graphics_viewer.load_tiles(path, container)
 
     @Slot()
     def on_load_sample_toobar(self):
         self.object_objeGroupParam.addNew('Points')
 
-    def load_sample(self, path=None):
-        if path == None:
-            dialog = QFileDialog(self, "Load Points")
-            dialog.setFileMode(QFileDialog.ExistingFile)
-            dialog.setAcceptMode(QFileDialog.AcceptOpen)
-            if dialog.exec() == QFileDialog.Accepted:
-                if dialog.selectedFiles():
-                    return self.graphics_viewer.load_sample(dialog.selectedFiles()[0])
-        else:
-            return self.graphics_viewer.load_sample(path)
+    def load_sample(self, path=None, container=None):
+        if path == None and container == None:
+            path = self.ask_open_path("Load Points")
+            if path == None:
+                return
+        return self.graphics_viewer.load_sample(path, container)
 
     @Slot()
     def on_load_path_toolbar(self):
         self.object_objeGroupParam.addNew('Path')
 
+    @Slot()
+    def on_follow_path_toolbar(self):
+        # a log that is still being written, new waypoints show up as they are appended
+        path = self.ask_open_path("Follow Path")
+        if path != None:
+            self.loader.submit('Path', path, follow=True)
+
     @Slot()
     def on_load_example(self):
-        self.object_objeGroupParam.addNew('Mesh', 'test_data/xuexiao_coarse.ply')
-        self.object_objeGroupParam.addNew('Points', 'test_data/xuexiao_coarse_90.ply')
-        self.object_objeGroupParam.addNew('Path', 'test_data/final_trajectory.log')
+        self.loader.submit_many([
+            ('Mesh', 'test_data/xuexiao_coarse.ply'),
+            ('Points', 'test_data/xuexiao_coarse_90.ply'),
+            ('Path', 'test_data/final_trajectory.log'),
+        ])
 
     @Slot()
     def on_clear_objects(self):
-        # import pdb; pdb.set_trace()
-        for object in self.object_options.param('Objects'):
-            # self.object_options.param('Objects').removeChild(object)
-            object.remove()
-        # TODO bug here: can not clear all the objects at once
-        for object in self.object_options.param('Objects'):
-            # self.object_options.param('Objects').removeChild(object)
-            object.remove()
-        pass
-
-    def load_path(self, path=None):
-        if path == None:
-            dialog = QFileDialog(self, "Load Path")
-            dialog.setFileMode(QFileDialog.ExistingFile)
-            dialog.setAcceptMode(QFileDialog.AcceptOpen)
-            if dialog.exec() == QFileDialog.Accepted:
-                if dialog.selectedFiles():
-                    return self.graphics_viewer.load_path(dialog.selectedFiles()[0])
-        else:
-            return self.graphics_viewer.load_path(path)
+        self.object_objeGroupParam.removeAll()
+
+    def load_path(self, path=None, container=None):
+        if path == None and container == None:
+            path = self.ask_open_path("Load Path")
+            if path == None:
+                return
+        return self.graphics_viewer.load_path(path, container)
 
     @Slot()
     def on_save(self):
-        dialog = QFileDialog(self, "Save File")
-        dialog.setMimeTypeFilters(self.mime_type_filters)
-        dialog.setFileMode(QFileDialog.AnyFile)
-        dialog.setAcceptMode(QFileDialog.AcceptSave)
-        dialog.setDefaultSuffix("png")
-        dialog.setDirectory(
-            QStandardPaths.writableLocation(QStandardPaths.PicturesLocation)
-        )
-
-        # if dialog.exec() == QFileDialog.Accepted:
-        #     if dialog.selectedFiles():
-        #         self.painter_widget.save(dialog.selectedFiles()[0])
+        self.save()
 
     @Slot()
     def on_open(self):
-        dialog = QFileDialog(self, "Save File")
-        dialog.setMimeTypeFilters(self.mime_type_filters)
-        dialog.setFileMode(QFileDialog.ExistingFile)
-        dialog.setAcceptMode(QFileDialog.AcceptOpen)
-        dialog.setDefaultSuffix("png")
-        dialog.setDirectory(
-            QStandardPaths.writableLocation(QStandardPaths.PicturesLocation)
-        )
+        self.load()
+
+    def on_profile_record(self, param, record):
+        profiler.set_enabled(record)
+        if not record:
+            self.object_options.param('profiling', 'overlay').setValue(False)
+
+    def on_profile_overlay(self, param, show):
+        if show:
+            self.object_options.param('profiling', 'record').setValue(True)
+        self.graphics_viewer.set_overlay(show)
+
+    def on_profile_export(self):
+        filename = pg.QtWidgets.QFileDialog.getSaveFileName(self, "Export Frame Metrics..", "frames.csv",
+                                                            "CSV (*.csv);;JSON with stage totals (*.json)")
+        if isinstance(filename, tuple):
+            filename = filename[0]
+        if filename == '':
+            return
+        profiler.export(filename)
+        self.statusBar().showMessage("%d frames written to %s" % (len(profiler.frames), filename), 10000)
 
-        # if dialog.exec() == QFileDialog.Accepted:
-        #     if dialog.selectedFiles():
-        #         self.painter_widget.load(dialog.selectedFiles()[0])
+    def closeEvent(self, event):
+        self.loader.shutdown()
+        output = os.environ.get('DRONECENTER_PROFILE_OUTPUT')
+        if output and profiler.frames:
+            profiler.export(output)
+        super().closeEvent(event)
 
     @Slot()
     def on_color_clicked(self):
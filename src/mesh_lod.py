@@ -0,0 +1,102 @@
+import numpy as np
+import pyqtgraph.opengl as gl
+
+
+def cluster_decimate(vertices, faces, cell_size, origin):
+    # vertex clustering: vertices sharing a grid cell collapse to their mean,
+    # faces that lose a corner and repeated faces are dropped
+    cells = np.floor((vertices - origin) / cell_size).astype(np.int64)
+    _, cluster, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    cluster = cluster.reshape(-1)
+    merged = np.empty((len(counts), 3), dtype=np.float64)
+    for axis in range(3):
+        merged[:, axis] = np.bincount(cluster, weights=vertices[:, axis], minlength=len(counts)) / counts
+
+    new_faces = cluster[faces]
+    keep = (new_faces[:, 0] != new_faces[:, 1]) & (new_faces[:, 1] != new_faces[:, 2]) & (new_faces[:, 0] != new_faces[:, 2])
+    new_faces = new_faces[keep]
+    _, first = np.unique(np.sort(new_faces, axis=1), axis=0, return_index=True)
+    new_faces = new_faces[np.sort(first)]
+
+    # drop clusters no face points at any more
+    used = np.zeros(len(merged), dtype=bool)
+    used[new_faces.ravel()] = True
+    remap = np.cumsum(used) - 1
+    return merged[used], remap[new_faces]
+
+
+def face_indexed_meshdata(vertices, faces):
+    meshdata = gl.MeshData(
+        vertexes=np.asarray(vertices, dtype=np.float32),
+        faces=np.asarray(faces, dtype=np.uint32))
+    # smooth=False draws face indexed arrays, build them here instead of on the first paint
+    meshdata.vertexes(indexed='faces')
+    meshdata.faceNormals(indexed='faces')
+    return meshdata
+
+
+class MeshLevel():
+    def __init__(self, meshdata, error) -> None:
+        # error is the largest distance a vertex may have moved, in scene units
+        self.meshdata, self.error = meshdata, error
+
+    def face_count(self):
+        return len(self.meshdata.faces())
+
+
+class MeshLOD():
+    # level 0 is the full mesh, every further level roughly quarters the faces
+    def __init__(self, vertices, faces, meshdata=None, min_faces=2000, max_levels=8) -> None:
+        vertices = np.asarray(vertices, dtype=np.float64)
+        faces = np.asarray(faces, dtype=np.int64)
+        self.lo, self.hi = vertices.min(axis=0), vertices.max(axis=0)
+        extent = float((self.hi - self.lo).max()) or 1.
+
+        if meshdata is None:
+            meshdata = face_indexed_meshdata(vertices, faces)
+        self.levels = [MeshLevel(meshdata, 0.)]
+        # start near the mean edge length so the first level already removes something
+        cell_size = max(extent / np.sqrt(len(faces)), extent / 4096)
+        while len(faces) > min_faces and len(self.levels) < max_levels:
+            cell_size *= 2
+            coarse_vertices, coarse_faces = cluster_decimate(vertices, faces, cell_size, self.lo)
+            if len(coarse_faces) == 0:
+                break
+            if len(coarse_faces) > 0.8 * len(faces):
+                continue
+            vertices, faces = coarse_vertices, coarse_faces
+            self.levels.append(MeshLevel(face_indexed_meshdata(vertices, faces), cell_size * np.sqrt(3)))
+
+    @classmethod
+    def from_arrays(cls, arrays, meshdata):
+        # the chain arrays() stored, level 0 is the full mesh's meshdata
+        lod = cls.__new__(cls)
+        lod.lo, lod.hi = np.asarray(arrays['lo']), np.asarray(arrays['hi'])
+        errors = arrays['errors']
+        lod.levels = [MeshLevel(meshdata, 0.)] + [
+            MeshLevel(face_indexed_meshdata(arrays['vertices%d' % i], arrays['faces%d' % i]), float(errors[i]))
+            for i in range(1, len(errors))]
+        return lod
+
+    def arrays(self):
+        # the coarse levels, the full mesh is stored with the asset already
+        arrays = dict(lo=self.lo, hi=self.hi, errors=np.array([level.error for level in self.levels]))
+        for i, level in enumerate(self.levels[1:], 1):
+            arrays['vertices%d' % i] = level.meshdata.vertexes()
+            arrays['faces%d' % i] = level.meshdata.faces()
+        return arrays
+
+    def len(self):
+        return len(self.levels)
+
+    def distance(self, eye):
+        # from the camera to the closest point of the bounding box
+        return max(float(np.linalg.norm(np.clip(eye, self.lo, self.hi) - eye)), 1e-6)
+
+    def select(self, eye, pixel_scale, error_pixels):
+        # coarsest level whose error projects to at most error_pixels on screen
+        distance = self.distance(eye)
+        for level in range(len(self.levels) - 1, 0, -1):
+            if self.levels[level].error / distance * pixel_scale <= error_pixels:
+                return level
+        return 0
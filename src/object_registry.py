@@ -0,0 +1,82 @@
+import itertools
+from contextlib import contextmanager
+
+from PySide6.QtCore import QObject, Signal
+
+
+class ObjectRegistry(QObject):
+    # loaded objects by an id that stays with the object and is never reused,
+    # indexed by item type, so a lookup or a selection costs the same with
+    # one object loaded or a thousand
+    sigAdded = Signal(int)           # object id
+    sigRemoved = Signal(int, str)    # object id, item type; the object is already gone
+    sigBatch = Signal(list, list)    # ids added, (id, item type) removed within a batch
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.ids = itertools.count()
+        self.objects = {}
+        self.types = {}
+        self.by_type = {}
+        self.pending = None
+
+    def add(self, obj, typ):
+        object_id = next(self.ids)
+        self.objects[object_id] = obj
+        self.types[object_id] = typ
+        self.by_type.setdefault(typ, {})[object_id] = obj
+        if self.pending is not None:
+            self.pending[0].append(object_id)
+        else:
+            self.sigAdded.emit(object_id)
+        return object_id
+
+    def remove(self, object_id):
+        obj = self.objects.pop(object_id, None)
+        if obj is None:
+            return None
+        typ = self.types.pop(object_id)
+        del self.by_type[typ][object_id]
+        if self.pending is not None:
+            self.pending[1].append((object_id, typ))
+        else:
+            self.sigRemoved.emit(object_id, typ)
+        return obj
+
+    @contextmanager
+    def batch(self):
+        # adds and removes inside are reported once, by sigBatch at the end;
+        # an id added inside may already be gone again
+        if self.pending is not None:
+            yield self
+            return
+        self.pending = ([], [])
+        try:
+            yield self
+        finally:
+            added, removed = self.pending
+            self.pending = None
+            if added or removed:
+                self.sigBatch.emit(added, removed)
+
+    def get(self, object_id):
+        return self.objects.get(object_id)
+
+    def type_of(self, object_id):
+        return self.types.get(object_id)
+
+    def of_type(self, typ):
+        # objects of one type in the order they were added
+        return list(self.by_type.get(typ, {}).values())
+
+    def first(self, typ):
+        # id of the oldest object of a type, None when there is none
+        return next(iter(self.by_type.get(typ, {})), None)
+
+    def all(self):
+        return list(self.objects.values())
+
+    def len(self, typ=None):
+        if typ is None:
+            return len(self.objects)
+        return len(self.by_type.get(typ, {}))
@@ -0,0 +1,149 @@
+import numpy as np
+
+
+def part1by2(v):
+    # spreads the low 21 bits of v so two zero bits sit between each of them
+    v = v.astype(np.uint64) & np.uint64(0x1fffff)
+    v = (v | (v << np.uint64(32))) & np.uint64(0x1f00000000ffff)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x1f0000ff0000ff)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x100f00f00f00f00f)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x10c30c30c30c30c3)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x1249249249249249)
+    return v
+
+
+def morton_codes(cells):
+    # cells is (n, 3) integer grid coordinates
+    return part1by2(cells[:, 0]) | (part1by2(cells[:, 1]) << np.uint64(1)) | (part1by2(cells[:, 2]) << np.uint64(2))
+
+
+def frustum_planes(view_projection):
+    # (6, 4) planes a*x + b*y + c*z + d >= 0 inside, from a row-major 4x4 matrix
+    m = np.asarray(view_projection, dtype=np.float64)
+    planes = np.array([m[3] + m[0], m[3] - m[0], m[3] + m[1], m[3] - m[1], m[3] + m[2], m[3] - m[2]])
+    return planes / np.linalg.norm(planes[:, :3], axis=1)[:, None]
+
+
+def boxes_in_frustum(planes, lo, hi):
+    # an AABB is outside when its most positive corner is behind any plane
+    visible = np.ones(len(lo), dtype=bool)
+    for plane in planes:
+        corner = np.where(plane[:3] >= 0, hi, lo)
+        visible &= corner @ plane[:3] + plane[3] >= 0
+    return visible
+
+
+class OctreeLevel():
+    def __init__(self, keys, start, count, lo, size) -> None:
+        self.keys, self.start, self.count = keys, start, count
+        self.lo, self.size = lo, size
+
+    def len(self):
+        return len(self.keys)
+
+
+class PointOctree():
+    # points are sorted along a Morton curve, so every octree node at every
+    # level is a contiguous range of the sorted arrays and a strided slice of
+    # the range is a spatially even subsample of the node
+    def __init__(self, points, leaf_size=1024, max_depth=10) -> None:
+        points = np.asarray(points)
+        self.lo = points.min(axis=0).astype(np.float64)
+        extent = float((points.max(axis=0) - self.lo).max()) or 1.
+        self.depth = int(np.clip(np.ceil(np.log(max(len(points) / leaf_size, 1)) / np.log(8)), 1, max_depth))
+        self.extent = extent * (1 + 1e-6)
+
+        cells_per_axis = 1 << self.depth
+        cells = ((points - self.lo) * (cells_per_axis / self.extent)).astype(np.int64)
+        np.clip(cells, 0, cells_per_axis - 1, out=cells)
+        codes = morton_codes(cells)
+        self.order = np.argsort(codes, kind='stable')
+        codes = codes[self.order]
+        self.points = np.ascontiguousarray(points[self.order], dtype=np.float32)
+
+        self.levels = []
+        for level in range(self.depth + 1):
+            shift = np.uint64(3 * (self.depth - level))
+            prefix = codes >> shift
+            start = np.flatnonzero(np.concatenate(([True], prefix[1:] != prefix[:-1])))
+            count = np.diff(np.append(start, len(codes)))
+            # grid coordinates of a node from any of its points
+            node_cells = cells[self.order[start]] >> (self.depth - level)
+            size = self.extent / (1 << level)
+            self.levels.append(OctreeLevel(prefix[start], start, count, self.lo + node_cells * size, size))
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        octree = cls.__new__(cls)
+        octree.lo, octree.extent = np.asarray(arrays['lo']), float(arrays['extent'][0])
+        octree.order, octree.points = arrays['order'], arrays['points']
+        octree.depth = len(arrays['sizes']) - 1
+        octree.levels = [OctreeLevel(arrays['keys%d' % i], arrays['start%d' % i], arrays['count%d' % i],
+                                     arrays['lo%d' % i], float(size)) for i, size in enumerate(arrays['sizes'])]
+        return octree
+
+    def arrays(self):
+        arrays = dict(lo=self.lo, extent=np.array([self.extent]), order=self.order, points=self.points,
+                      sizes=np.array([level.size for level in self.levels]))
+        for i, level in enumerate(self.levels):
+            arrays.update({'keys%d' % i: level.keys, 'start%d' % i: level.start,
+                           'count%d' % i: level.count, 'lo%d' % i: level.lo})
+        return arrays
+
+    def len(self):
+        return len(self.points)
+
+    def select(self, planes, eye, budget, pixel_scale, refine_pixels=64.):
+        # picks nodes coarse to fine: a visible node is refined while it covers
+        # more than refine_pixels on screen, then the budget is shared between
+        # the chosen nodes by their projected area
+        # returns indices into self.points
+        nodes = []
+        active = np.arange(self.levels[0].len())
+        for level_index, level in enumerate(self.levels):
+            lo = level.lo[active]
+            hi = lo + level.size
+            visible = boxes_in_frustum(planes, lo, hi)
+            active, lo = active[visible], lo[visible]
+            if len(active) == 0:
+                break
+            distance = np.maximum(np.linalg.norm(lo + level.size / 2 - eye, axis=1), level.size / 2)
+            pixels = level.size / distance * pixel_scale
+            refine = pixels > refine_pixels
+            if level_index == self.depth:
+                refine[:] = False
+            nodes.append((level, active[~refine], pixels[~refine]))
+            if not refine.any():
+                break
+            children = self.levels[level_index + 1]
+            parent = children.keys >> np.uint64(3)
+            active = np.flatnonzero(np.isin(parent, level.keys[active[refine]], assume_unique=False))
+
+        if not nodes:
+            return np.empty(0, dtype=np.int64)
+        start = np.concatenate([level.start[i] for level, i, _ in nodes])
+        count = np.concatenate([level.count[i] for level, i, _ in nodes])
+        weight = np.concatenate([p for _, _, p in nodes]) ** 2
+        return self.sample_nodes(start, count, weight, budget)
+
+    @staticmethod
+    def sample_nodes(start, count, weight, budget):
+        if count.sum() <= budget:
+            take = count
+        else:
+            take = np.minimum(count, np.floor(budget * weight / weight.sum()).astype(np.int64))
+            # what the small nodes could not use goes to the ones still clipped
+            spare = budget - take.sum()
+            clipped = take < count
+            if spare > 0 and clipped.any():
+                extra = np.floor(spare * weight[clipped] / weight[clipped].sum()).astype(np.int64)
+                take[clipped] = np.minimum(count[clipped], take[clipped] + extra)
+        keep = take > 0
+        start, count, take = start[keep], count[keep], take[keep]
+        node = np.repeat(np.arange(len(take)), take)
+        local = np.arange(take.sum()) - np.repeat(np.cumsum(take) - take, take)
+        return start[node] + local * count[node] // take[node]
+
+    def nbytes(self):
+        levels = sum(l.keys.nbytes + l.start.nbytes + l.count.nbytes + l.lo.nbytes for l in self.levels)
+        return self.points.nbytes + self.order.nbytes + levels
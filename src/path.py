@@ -1,37 +1,247 @@
+import io
 import os
 
+import numpy as np
+
+# column order of the pose block, the same order as in the smith18 log
+POSE_FIELDS = ('x', 'y', 'z', 'pitch', 'roll', 'yaw')
+
+
 class PathNode():
-    def __init__(self, x, y, z, pitch, roll, yaw) -> None:
-        self.x, self.y, self.z, self.pitch, self.roll, self.yaw = \
-            x, y, z, pitch, roll, yaw
-        pass
+    # lightweight view of one row of a Trajectory, nothing is copied
+    __slots__ = ('trajectory', 'index')
+
+    def __init__(self, trajectory, index) -> None:
+        self.trajectory, self.index = trajectory, index
+
+    @property
+    def x(self):
+        return float(self.trajectory.x[self.index])
+
+    @property
+    def y(self):
+        return float(self.trajectory.y[self.index])
+
+    @property
+    def z(self):
+        return float(self.trajectory.z[self.index])
+
+    @property
+    def pitch(self):
+        return float(self.trajectory.pitch[self.index])
+
+    @property
+    def roll(self):
+        return float(self.trajectory.roll[self.index])
+
+    @property
+    def yaw(self):
+        return float(self.trajectory.yaw[self.index])
+
+    @property
+    def imagename(self):
+        return str(self.trajectory.imagename[self.index])
+
+
+class GrowableArray():
+    # array that can be appended to along one axis, capacity doubles so an
+    # append costs the size of what is appended, not of what is stored
+    def __init__(self, data, axis=0) -> None:
+        self.buffer = np.asarray(data)
+        self.axis = axis
+        self.size = self.buffer.shape[axis]
+
+    @property
+    def data(self):
+        return self.buffer[(slice(None),) * self.axis + (slice(0, self.size),)]
+
+    def extend(self, values):
+        values = np.asarray(values)
+        count = values.shape[self.axis]
+        dtype = np.result_type(self.buffer.dtype, values.dtype)
+        if self.size + count > self.buffer.shape[self.axis] or not dtype == self.buffer.dtype:
+            shape = list(self.buffer.shape)
+            shape[self.axis] = max(2 * (self.size + count), 64)
+            grown = np.empty(shape, dtype=dtype)
+            grown[(slice(None),) * self.axis + (slice(0, self.size),)] = self.data
+            self.buffer = grown
+        self.buffer[(slice(None),) * self.axis + (slice(self.size, self.size + count),)] = values
+        self.size += count
+        return self.data
+
+
+_BLANK = np.frombuffer(b' \t\r', np.uint8)
+
+
+def _line_bounds(buf):
+    # start and first comma of every line that has a comma; a line that has
+    # text but no comma, or not one comma per pose field, is not a log line
+    newlines = np.flatnonzero(buf == ord('\n'))
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(buf)]))
+    commas = np.flatnonzero(buf == ord(','))
+    first = np.searchsorted(commas, starts)
+    count = np.searchsorted(commas, ends) - first
+    for start, end in zip(starts[count == 0], ends[count == 0]):
+        if not np.isin(buf[start:end], _BLANK).all():
+            raise ValueError('no image name in line %r' % bytes(buf[start:end]))
+    rows = count > 0
+    if (count[rows] != len(POSE_FIELDS)).any():
+        raise ValueError('expected %d pose values per line' % len(POSE_FIELDS))
+    return starts[rows], commas[first[rows]]
+
+
+def _image_names(buf, starts, first):
+    # the bytes before every first comma, gathered into one (n, width) block
+    width = max(int((first - starts).max()), 1)
+    windows = np.lib.stride_tricks.sliding_window_view(np.append(buf, np.zeros(width, np.uint8)), width)
+    block = windows[starts]
+    block[np.arange(width) >= (first - starts)[:, None]] = 0
+    if (block >= 0x80).any():
+        names = np.char.decode(block.view('S%d' % width).ravel(), 'utf-8')
+    else:
+        names = block.astype(np.uint32).view('U%d' % width).ravel()
+    if np.isin(block, _BLANK).any():
+        names = np.char.strip(names)
+    return names
+
+
+def parse_smith18_log(raw):
+    # bulk parser for "imagename,x,y,z,pitch,roll,yaw" lines,
+    # returns the image names and a (6, n) block of converted poses
+    if isinstance(raw, str):
+        raw = raw.encode()
+    buf = np.frombuffer(raw, np.uint8)
+    starts, first = _line_bounds(buf)
+    if len(starts) == 0:
+        return np.empty(0, dtype='U1'), np.empty((len(POSE_FIELDS), 0))
+    # the pose columns are read as one float block, the names are cut from the
+    # raw bytes; a structured dtype with a string field is several times slower
+    poses = np.loadtxt(io.BytesIO(raw), delimiter=',', usecols=range(1, len(POSE_FIELDS) + 1),
+                       comments=None, ndmin=2, encoding='utf-8')
+    columns = np.ascontiguousarray(poses.T)
+    # as the same format used in C++ program
+    columns[0] *= -0.01
+    columns[1:3] *= 0.01
+    columns[3] *= -1
+    columns[5] = 90 - columns[5]
+    return _image_names(buf, starts, first), columns
 
 
 class Trajectory():
-    def __init__(self) -> None:
-        self.path = []
-        pass
+    def __init__(self, log_path=None) -> None:
+        self.set_columns(np.empty(0, dtype='U1'), np.empty((len(POSE_FIELDS), 0)))
+        if log_path is not None:
+            self.load_smith18_path(log_path)
+
+    @classmethod
+    def from_columns(cls, imagename, columns):
+        trajectory = cls()
+        trajectory.set_columns(imagename, columns)
+        return trajectory
 
-    def __init__(self, log_path) -> None:
-        self.path = []
-        self.load_smith18_path(log_path)
-        pass
+    def set_columns(self, imagename, columns):
+        self.imagename_array = GrowableArray(imagename)
+        self.column_array = GrowableArray(np.ascontiguousarray(columns, dtype=np.float64), axis=1)
+
+    def append(self, imagename, columns):
+        # views taken from the trajectory before an append may be stale after it
+        self.imagename_array.extend(imagename)
+        self.column_array.extend(columns)
 
     def load_smith18_path(self, log_path):
-        f = open(log_path, 'r')
-        lines = f.readlines()
-        self.path = []
-        for i, line in enumerate(lines):
-            imagename, x, y, z, pitch, roll, yaw = line.split(',')
-            # as the same format used in C++ program
-            x, y, z, pitch, roll, yaw = - \
-                float(x)/100, float(y)/100, float(z)/100, - \
-                float(pitch), float(roll), 90-float(yaw)
-            node = PathNode(x, y, z, pitch, roll, yaw)
-            self.path.append(node)
+        with open(log_path, 'rb') as f:
+            self.set_columns(*parse_smith18_log(f.read()))
+
+    @property
+    def imagename(self):
+        return self.imagename_array.data
+
+    @property
+    def columns(self):
+        return self.column_array.data
+
+    @property
+    def x(self):
+        return self.columns[0]
+
+    @property
+    def y(self):
+        return self.columns[1]
+
+    @property
+    def z(self):
+        return self.columns[2]
+
+    @property
+    def pitch(self):
+        return self.columns[3]
+
+    @property
+    def roll(self):
+        return self.columns[4]
+
+    @property
+    def yaw(self):
+        return self.columns[5]
+
+    def positions(self):
+        return self.columns[:3].T
+
+    @property
+    def path(self):
+        # kept for callers that still iterate `trajectory.path`
+        return self
+
+    def node(self, index):
+        if index < 0:
+            index += self.len()
+        if not 0 <= index < self.len():
+            raise IndexError(index)
+        return PathNode(self, index)
+
+    def __getitem__(self, index):
+        return self.node(index)
+
+    def __iter__(self):
+        for i in range(self.len()):
+            yield PathNode(self, i)
+
+    def __len__(self):
+        return self.len()
 
     def len(self):
-        return len(self.path)
+        return self.column_array.size
 
     def is_empty(self):
         return self.len() == 0
+
+
+class TrajectoryTail():
+    # follows a smith18 log that is still being written: each poll reads
+    # only the bytes added since the last one and appends the complete lines
+    def __init__(self, trajectory, log_path, offset=0) -> None:
+        self.trajectory, self.log_path, self.offset = trajectory, log_path, offset
+        self.pending = b''
+
+    def poll(self):
+        # returns the number of nodes appended
+        try:
+            size = os.path.getsize(self.log_path)
+        except OSError:
+            return 0
+        if size <= self.offset:
+            return 0
+        with open(self.log_path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+        self.offset += len(chunk)
+        data = self.pending + chunk
+        end = data.rfind(b'\n') + 1
+        # a line still being written waits for the next poll
+        self.pending = data[end:]
+        if end == 0:
+            return 0
+        imagename, columns = parse_smith18_log(data[:end])
+        self.trajectory.append(imagename, columns)
+        return columns.shape[1]
@@ -0,0 +1,96 @@
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from path import Trajectory
+
+
+def wrap_degrees(angle):
+    # into [-180, 180)
+    return (angle + 180.) % 360. - 180.
+
+
+def segment_metrics(trajectory):
+    # per segment arrays, segment i goes from node i to node i + 1
+    positions = trajectory.positions()
+    delta = np.diff(positions, axis=0)
+    return dict(
+        length=np.sqrt(np.einsum('ij,ij->i', delta, delta)),
+        climb=delta[:, 2],
+        heading_change=wrap_degrees(np.diff(trajectory.yaw)),
+        pitch_change=np.diff(trajectory.pitch),
+    )
+
+
+def summarize(trajectory, speed=5., capture_time=0., turn_rate=None):
+    # scalar metrics of a whole path; speed in m/s, capture_time is the
+    # hover per waypoint in s, turn_rate in deg/s adds the time spent yawing
+    count = trajectory.len()
+    summary = dict(waypoints=count, length=0., flight_time=count * capture_time,
+                   mean_segment=0., max_segment=0., total_heading_change=0.,
+                   max_heading_change=0., total_pitch_change=0., max_pitch_change=0.,
+                   waypoints_per_100m=0., waypoints_per_ha=0.)
+    if count < 2:
+        return summary
+    segments = segment_metrics(trajectory)
+    length = float(segments['length'].sum())
+    heading = np.abs(segments['heading_change'])
+    pitch = np.abs(segments['pitch_change'])
+    positions = trajectory.positions()
+    area = float(np.prod(positions[:, :2].max(axis=0) - positions[:, :2].min(axis=0)))
+    flight_time = length / speed + count * capture_time
+    if turn_rate is not None:
+        flight_time += float(heading.sum()) / turn_rate
+    summary.update(
+        length=length,
+        flight_time=flight_time,
+        mean_segment=float(segments['length'].mean()),
+        max_segment=float(segments['length'].max()),
+        total_heading_change=float(heading.sum()),
+        max_heading_change=float(heading.max()),
+        total_pitch_change=float(pitch.sum()),
+        max_pitch_change=float(pitch.max()),
+        # along the path and over the xy bounding box
+        waypoints_per_100m=count / length * 100. if length > 0 else 0.,
+        waypoints_per_ha=count / area * 1e4 if area > 0 else 0.,
+    )
+    return summary
+
+
+def analyze_log(log_path, **kwargs):
+    return log_path, summarize(Trajectory(log_path), **kwargs)
+
+
+def _analyze_log(args):
+    log_path, kwargs = args
+    return analyze_log(log_path, **kwargs)
+
+
+def analyze_directory(directory, pattern='*.log', processes=None, **kwargs):
+    # summarize every log in directory on a process pool, {path: summary}
+    logs = sorted(glob.glob(os.path.join(directory, pattern)))
+    if not logs:
+        return {}
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return dict(pool.map(_analyze_log, [(log, kwargs) for log in logs]))
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Flight metrics of every smith18 log in a directory')
+    parser.add_argument('directory')
+    parser.add_argument('--pattern', default='*.log')
+    parser.add_argument('--speed', type=float, default=5.)
+    parser.add_argument('--capture-time', type=float, default=0.)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    results = analyze_directory(args.directory, args.pattern, args.processes,
+                                speed=args.speed, capture_time=args.capture_time)
+    print('%-40s %10s %12s %12s %14s' % ('log', 'waypoints', 'length m', 'time s', 'heading deg'))
+    for log_path, summary in results.items():
+        print('%-40s %10d %12.1f %12.1f %14.1f' % (
+            os.path.basename(log_path), summary['waypoints'], summary['length'],
+            summary['flight_time'], summary['total_heading_change']))
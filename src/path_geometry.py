@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def rotation_x(angle):
+    # (n, 3, 3) right-handed rotations about x, angle in degrees
+    angle = np.radians(np.asarray(angle, dtype=np.float64))
+    c, s = np.cos(angle), np.sin(angle)
+    rot = np.zeros(angle.shape + (3, 3))
+    rot[..., 0, 0] = 1.
+    rot[..., 1, 1], rot[..., 1, 2] = c, -s
+    rot[..., 2, 1], rot[..., 2, 2] = s, c
+    return rot
+
+
+def rotation_z(angle):
+    # (n, 3, 3) right-handed rotations about z, angle in degrees
+    angle = np.radians(np.asarray(angle, dtype=np.float64))
+    c, s = np.cos(angle), np.sin(angle)
+    rot = np.zeros(angle.shape + (3, 3))
+    rot[..., 0, 0], rot[..., 0, 1] = c, -s
+    rot[..., 1, 0], rot[..., 1, 1] = s, c
+    rot[..., 2, 2] = 1.
+    return rot
+
+
+def marker_rotations(pitch, yaw):
+    # the same chain GLMeshItem.rotate applied per marker:
+    # rotate(-90, x), rotate(pitch, x), rotate(yaw-90, z)
+    return rotation_z(yaw - 90) @ rotation_x(pitch - 90)
+
+
+def instance_vertexes(vertexes, rotations, translations, out=None):
+    # places one template at every pose, returns (n * len(vertexes), 3) float32,
+    # written into out when given
+    verts = np.einsum('nij,vj->nvi', rotations, vertexes)
+    verts += translations[:, None, :]
+    if out is not None:
+        out[:] = verts.reshape(-1, 3)
+        return out
+    return verts.reshape(-1, 3).astype(np.float32)
+
+
+def instance_normals(normals, rotations, out=None):
+    # the template normals turned with every marker, (n * len(normals), 3) float32,
+    # written into out when given
+    if out is not None:
+        np.einsum('nij,vj->nvi', rotations, normals,
+                  out=out.reshape(len(rotations), len(normals), 3), casting='same_kind')
+        return out
+    return np.einsum('nij,vj->nvi', rotations, normals).reshape(-1, 3).astype(np.float32)
+
+
+def instance_faces(faces, count, vertex_count, first=0):
+    # faces of markers first .. first + count
+    offsets = np.arange(first, first + count, dtype=np.uint32) * np.uint32(vertex_count)
+    return (faces.astype(np.uint32)[None] + offsets[:, None, None]).reshape(-1, 3)
+
+
+def instance_colors(colors, vertex_count):
+    return np.repeat(np.asarray(colors, dtype=np.float32), vertex_count, axis=0)
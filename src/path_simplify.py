@@ -0,0 +1,68 @@
+import numpy as np
+
+from path import Trajectory
+
+
+def span_errors(columns, start, end, span, index, position_tolerance, angle_tolerance):
+    # how far node index strays from the straight flight start .. end of its
+    # span, in units of the tolerances: the distance to the chord and the
+    # largest pitch, roll or yaw difference to the orientation interpolated
+    # at the same fraction. angles are unwrapped, a turn keeps the direction
+    # it was flown in
+    first = columns[:, start]
+    delta = columns[:, end] - first
+    length = (delta[:3] ** 2).sum(axis=0)
+    node = columns[:, index] - first[:, span]
+    delta = delta[:, span]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # nodes hovering on one spot are spread by their index instead
+        t = np.where(length[span] > 0, np.clip((node[:3] * delta[:3]).sum(axis=0) / length[span], 0., 1.),
+                     (index - start[span]) / (end - start)[span])
+    node -= delta * t
+    distance = np.sqrt((node[:3] ** 2).sum(axis=0))
+    deviation = np.abs(node[3:]).max(axis=0)
+    return np.maximum(distance / max(position_tolerance, 1e-9), deviation / max(angle_tolerance, 1e-9))
+
+
+def simplify_indices(trajectory, position_tolerance=.1, angle_tolerance=1., window=1 << 16):
+    # nodes Douglas-Peucker keeps under both tolerances, positions in m and
+    # angles in degrees. every open span is split in the same pass, so a pass
+    # is a few array operations over the nodes left and the passes follow the
+    # depth of the recursion. a survey splits off one turn per level, so the
+    # path is first cut every window nodes, which bounds the depth by the
+    # turns in a window at the cost of count / window extra nodes
+    count = trajectory.len()
+    keep = np.zeros(count, dtype=bool)
+    if count == 0:
+        return np.flatnonzero(keep)
+    columns = trajectory.columns[:6].copy()
+    columns[3:] = np.unwrap(columns[3:], period=360., axis=1)
+    bounds = np.unique(np.append(np.arange(0, count, window), count - 1))
+    keep[bounds] = True
+    start, end = bounds[:-1], bounds[1:]
+    while True:
+        inner = end - start - 1
+        open_span = inner > 0
+        start, end, inner = start[open_span], end[open_span], inner[open_span]
+        if len(start) == 0:
+            break
+        offsets = np.cumsum(inner) - inner
+        span = np.repeat(np.arange(len(start)), inner)
+        index = np.arange(len(span)) - offsets[span] + start[span] + 1
+        error = span_errors(columns, start, end, span, index, position_tolerance, angle_tolerance)
+        worst = np.maximum.reduceat(error, offsets)
+        # the first node of every span at its worst error
+        first = np.minimum.reduceat(np.where(error == worst[span], np.arange(len(span)), len(span)), offsets)
+        split = index[first]
+        over = worst > 1.
+        keep[split[over]] = True
+        start, end = np.concatenate((start[over], split[over])), np.concatenate((split[over], end[over]))
+    return np.flatnonzero(keep)
+
+
+def simplify(trajectory, position_tolerance=.1, angle_tolerance=1., window=1 << 16):
+    # (reduced Trajectory, index) where node i of the reduced path is node
+    # index[i] of the original one
+    index = simplify_indices(trajectory, position_tolerance, angle_tolerance, window)
+    reduced = Trajectory.from_columns(trajectory.imagename[index], trajectory.columns[:, index])
+    return reduced, index
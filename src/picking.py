@@ -0,0 +1,92 @@
+import numpy as np
+
+
+def pick_ray(view_projection, x, y, width, height):
+    # (origin on the near plane, unit direction) under widget pixel x, y
+    inverse = np.linalg.inv(view_projection)
+    ndc_x, ndc_y = 2. * x / width - 1., 1. - 2. * y / height
+    near = inverse @ np.array((ndc_x, ndc_y, -1., 1.))
+    far = inverse @ np.array((ndc_x, ndc_y, 1., 1.))
+    near, far = near[:3] / near[3], far[:3] / far[3]
+    direction = far - near
+    return near, direction / np.linalg.norm(direction)
+
+
+def ray_box(origin, direction, lo, hi):
+    # (t_in, t_out) of the ray through an axis aligned box, t_in > t_out for a miss
+    inverse = 1. / np.where(direction == 0., 1e-30, direction)
+    t0, t1 = (lo - origin) * inverse, (hi - origin) * inverse
+    return max(float(np.minimum(t0, t1).max()), 0.), float(np.maximum(t0, t1).min())
+
+
+class PointPicker():
+    # picks points by a cone around a ray: everything within tan_tolerance * t
+    # + radius of the ray at distance t. the KD-tree is built on the first pick
+    # and kept, the cone is covered by a run of ball queries that grow with t
+    def __init__(self, points, max_balls=4096) -> None:
+        self.points = points
+        self.max_balls = max_balls
+        self.tree = None
+
+    def build(self):
+        if self.tree is None:
+            from scipy.spatial import cKDTree
+            # sliding midpoint splits build several times faster than median ones
+            self.tree = cKDTree(np.asarray(self.points), balanced_tree=False, compact_nodes=False)
+            self.lo, self.hi = self.tree.mins, self.tree.maxes
+        return self.tree
+
+    def pick(self, origin, direction, tan_tolerance, radius=0.):
+        # (index, t) of the picked point nearest along the ray, None for nothing
+        if len(self.points) == 0:
+            return None
+        tree = self.build()
+        # the box grows by the widest the cone gets inside it
+        corner = np.maximum(np.abs(self.lo - origin), np.abs(self.hi - origin))
+        pad = tan_tolerance * np.linalg.norm(corner) + radius
+        t_in, t_out = ray_box(origin, direction, self.lo - pad, self.hi + pad)
+        if t_in > t_out:
+            return None
+        # ball k is centered at t with half length h along the ray, large
+        # enough to hold the whole cone section between t - h and t + h
+        min_half = (t_out - t_in) / (2 * self.max_balls)
+        centers, radii = [], []
+        t = t_in
+        while t < t_out:
+            half = max(tan_tolerance * t + radius, min_half)
+            far = tan_tolerance * (t + 2 * half) + radius
+            centers.append(t + half)
+            radii.append(np.sqrt(half ** 2 + far ** 2))
+            t += 2 * half
+        centers, radii = np.array(centers), np.array(radii)
+        # balls are queried near to far a batch at a time, the search stops
+        # once no later ball can hold a point nearer than the best one found
+        best = None
+        for start in range(0, len(centers), 32):
+            if best is not None and centers[start] - radii[start] >= best[1]:
+                break
+            balls = tree.query_ball_point(origin + np.outer(centers[start:start + 32], direction),
+                                          radii[start:start + 32])
+            candidates = np.unique(np.concatenate([np.asarray(b, dtype=np.int64) for b in balls]))
+            if len(candidates) == 0:
+                continue
+            offset = np.asarray(self.points[candidates], dtype=np.float64) - origin
+            along = offset @ direction
+            across = np.sqrt(np.maximum(np.einsum('ij,ij->i', offset, offset) - along ** 2, 0.))
+            inside = (along > 0) & (across <= tan_tolerance * along + radius)
+            if inside.any():
+                nearest = np.flatnonzero(inside)[np.argmin(along[inside])]
+                if best is None or along[nearest] < best[1]:
+                    best = (int(candidates[nearest]), float(along[nearest]))
+        return best
+
+
+class Pick():
+    # what a click hit: the container, 'Mesh' / 'Points' / 'Path', the face,
+    # point or waypoint index, the distance along the ray and a dict of details
+    def __init__(self, container, kind, index, distance, attributes) -> None:
+        self.container = container
+        self.kind = kind
+        self.index = index
+        self.distance = distance
+        self.attributes = attributes
@@ -0,0 +1,107 @@
+import math
+
+import numpy as np
+
+import path_geometry
+
+
+def quaternions(rotations):
+    # (n, 4) w, x, y, z unit quaternions of (n, 3, 3) rotations, each taken
+    # from the largest of its four components so none divides by a small one
+    m = rotations
+    diagonal = np.stack((1 + m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2], 1 + m[:, 0, 0] - m[:, 1, 1] - m[:, 2, 2],
+                         1 - m[:, 0, 0] + m[:, 1, 1] - m[:, 2, 2], 1 - m[:, 0, 0] - m[:, 1, 1] + m[:, 2, 2]), axis=1)
+    wx, wy, wz = m[:, 2, 1] - m[:, 1, 2], m[:, 0, 2] - m[:, 2, 0], m[:, 1, 0] - m[:, 0, 1]
+    xy, xz, yz = m[:, 0, 1] + m[:, 1, 0], m[:, 0, 2] + m[:, 2, 0], m[:, 1, 2] + m[:, 2, 1]
+    # row k is 4 q_k q
+    rows = [(diagonal[:, 0], wx, wy, wz), (wx, diagonal[:, 1], xy, xz),
+            (wy, xy, diagonal[:, 2], yz), (wz, xz, yz, diagonal[:, 3])]
+    largest = diagonal.argmax(axis=1)
+    q = np.empty((len(m), 4))
+    for k, row in enumerate(rows):
+        pick = largest == k
+        q[pick] = np.column_stack([r[pick] for r in row]) / (2 * np.sqrt(diagonal[pick, k]))[:, None]
+    return q
+
+
+def pose_rotations(trajectory):
+    # the marker frame of camera.camera_rotations, rolled about the viewing axis
+    return path_geometry.marker_rotations(trajectory.pitch, trajectory.yaw) @ path_geometry.rotation_z(trajectory.roll)
+
+
+class PoseTrack():
+    # a trajectory as a function of time: a cubic Hermite spline through the
+    # positions and slerp between the node orientations. Node times come from
+    # flying the path at speed m/s and turning at turn_rate deg/s, whichever
+    # takes longer per segment. pose() finds the segment by binary search and
+    # writes into a caller's buffer, so playback and scrubbing cost the same
+    # O(log n) on any path and allocate no arrays
+    def __init__(self, trajectory, speed=5., turn_rate=90.) -> None:
+        positions = np.ascontiguousarray(trajectory.positions(), dtype=np.float64)
+        count = len(positions)
+        if count == 0:
+            raise ValueError('empty trajectory')
+        self.quats = quaternions(pose_rotations(trajectory))
+        # q and -q are the same rotation, neighbours are made to agree so slerp takes the short way
+        dots = np.einsum('ij,ij->i', self.quats[1:], self.quats[:-1])
+        self.quats[1:] *= np.cumprod(np.where(dots < 0, -1., 1.))[:, None]
+        self.theta = np.arccos(np.clip(np.abs(dots), 0., 1.))
+
+        delta = np.diff(positions, axis=0)
+        length = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+        # a hover segment still takes a moment so its node keeps a time of its own
+        dt = np.maximum(np.maximum(length / speed, np.degrees(2 * self.theta) / turn_rate), 1e-6)
+        self.times = np.concatenate(([0.], np.cumsum(dt)))
+
+        # finite difference tangents, one sided at the ends; knots[i] is the
+        # position and tangent of node i, two neighbours are one (4, 3) block
+        self.knots = np.empty((count, 2, 3))
+        self.knots[:, 0] = positions
+        if count == 1:
+            self.knots[:, 1] = 0.
+        else:
+            self.knots[0, 1] = delta[0] / dt[0]
+            self.knots[-1, 1] = delta[-1] / dt[-1]
+            self.knots[1:-1, 1] = (positions[2:] - positions[:-2]) / (dt[1:] + dt[:-1])[:, None]
+        self.last_segment = max(count - 2, 0)
+        self.basis = np.empty(4)
+        self.weights = np.empty(2)
+
+    @property
+    def duration(self):
+        return float(self.times[-1])
+
+    def len(self):
+        return len(self.times)
+
+    def segment(self, t):
+        # index of the node starting the segment time t falls in
+        return min(max(int(np.searchsorted(self.times, t, 'right')) - 1, 0), self.last_segment)
+
+    def pose(self, t, out):
+        # out is a (7,) float64 array, filled with x, y, z and the w, x, y, z
+        # quaternion at time t; returns the segment index
+        if self.len() == 1:
+            out[:3] = self.knots[0, 0]
+            out[3:] = self.quats[0]
+            return 0
+        i = self.segment(t)
+        t0 = self.times[i]
+        dt = self.times[i + 1] - t0
+        u = min(max((t - t0) / dt, 0.), 1.)
+        u2 = u * u
+        u3 = u2 * u
+        basis = self.basis
+        basis[0] = 2 * u3 - 3 * u2 + 1
+        basis[1] = (u3 - 2 * u2 + u) * dt
+        basis[2] = 3 * u2 - 2 * u3
+        basis[3] = (u3 - u2) * dt
+        np.dot(basis, self.knots[i:i + 2].reshape(4, 3), out=out[:3])
+        theta = self.theta[i]
+        if theta < 1e-6:
+            self.weights[0], self.weights[1] = 1 - u, u
+        else:
+            s = math.sin(theta)
+            self.weights[0], self.weights[1] = math.sin((1 - u) * theta) / s, math.sin(u * theta) / s
+        np.dot(self.weights, self.quats[i:i + 2], out=out[3:])
+        return i
@@ -0,0 +1,134 @@
+import numpy as np
+
+PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8',
+}
+
+
+class PlyFormatError(Exception):
+    pass
+
+
+class PlyElement():
+    def __init__(self, name, count) -> None:
+        self.name, self.count = name, count
+        # (name, dtype) for scalars, (name, count dtype, item dtype) for lists
+        self.properties = []
+        self.offset = None
+        self.data = None
+
+    def has_lists(self):
+        return any(len(p) == 3 for p in self.properties)
+
+
+def read_header(f):
+    if f.readline().strip() != b'ply':
+        raise PlyFormatError('not a ply file')
+    fmt, elements = None, []
+    while True:
+        line = f.readline()
+        if not line:
+            raise PlyFormatError('ply header has no end_header')
+        words = line.split()
+        if not words or words[0] in (b'comment', b'obj_info'):
+            continue
+        if words[0] == b'end_header':
+            return fmt, elements, f.tell()
+        if words[0] == b'format':
+            fmt = words[1].decode()
+        elif words[0] == b'element':
+            elements.append(PlyElement(words[1].decode(), int(words[2])))
+        elif words[0] == b'property' and words[1] == b'list':
+            elements[-1].properties.append(
+                (words[4].decode(), '<' + PLY_TYPES[words[2].decode()], '<' + PLY_TYPES[words[3].decode()]))
+        elif words[0] == b'property':
+            elements[-1].properties.append((words[2].decode(), '<' + PLY_TYPES[words[1].decode()]))
+
+
+def is_binary_ply(path):
+    try:
+        with open(path, 'rb') as f:
+            return read_header(f)[0] == 'binary_little_endian'
+    except (OSError, PlyFormatError, KeyError, IndexError, ValueError):
+        return False
+
+
+class PlyData():
+    # binary little endian PLY mapped read-only into memory; element data are
+    # structured arrays over the mapping and vertices/faces/colors are strided
+    # views into them, nothing is read until it is touched
+    def __init__(self, path) -> None:
+        with open(path, 'rb') as f:
+            fmt, elements, offset = read_header(f)
+        if fmt != 'binary_little_endian':
+            raise PlyFormatError('only binary_little_endian ply can be mapped, got %s' % fmt)
+        self.path = path
+        self.buffer = np.memmap(path, dtype=np.uint8, mode='r')
+        self.elements = {}
+        for element in elements:
+            dtype = self.element_dtype(element, offset)
+            if dtype is None:
+                # the size of a variable list element is unknown, so nothing after it can be located
+                break
+            if offset + dtype.itemsize * element.count > len(self.buffer):
+                raise PlyFormatError('%s: element %s runs past the end of the file' % (path, element.name))
+            element.offset = offset
+            element.data = np.ndarray((element.count,), dtype=dtype, buffer=self.buffer, offset=offset)
+            self.elements[element.name] = element
+            offset += dtype.itemsize * element.count
+
+    def element_dtype(self, element, offset):
+        if not element.has_lists():
+            return np.dtype([p for p in element.properties])
+        # a list element maps only when every list has the length of the first one
+        if len(element.properties) != 1 or element.count == 0:
+            return None
+        name, count_type, item_type = element.properties[0]
+        length = int(np.ndarray((1,), dtype=count_type, buffer=self.buffer, offset=offset)[0])
+        dtype = np.dtype([('count', count_type), (name, item_type, (length,))])
+        if offset + dtype.itemsize * element.count > len(self.buffer):
+            return None
+        counts = np.ndarray((element.count,), dtype=dtype, buffer=self.buffer, offset=offset)['count']
+        if not (counts == length).all():
+            return None
+        return dtype
+
+    def columns(self, element_name, names):
+        # (n, len(names)) view when the properties are adjacent and of one type, else a copy
+        element = self.elements.get(element_name)
+        if element is None or not all(n in element.data.dtype.names for n in names):
+            return None
+        data = element.data
+        fields = [data.dtype.fields[n] for n in names]
+        base_type, first_offset = fields[0]
+        adjacent = all(t == base_type and o == first_offset + i * base_type.itemsize
+                       for i, (t, o) in enumerate(fields))
+        if adjacent:
+            return np.ndarray((len(data), len(names)), dtype=base_type, buffer=self.buffer,
+                              offset=element.offset + first_offset,
+                              strides=(data.dtype.itemsize, base_type.itemsize))
+        return np.column_stack([data[n] for n in names])
+
+    @property
+    def vertices(self):
+        return self.columns('vertex', ('x', 'y', 'z'))
+
+    @property
+    def normals(self):
+        return self.columns('vertex', ('nx', 'ny', 'nz'))
+
+    @property
+    def colors(self):
+        rgba = self.columns('vertex', ('red', 'green', 'blue', 'alpha'))
+        return rgba if rgba is not None else self.columns('vertex', ('red', 'green', 'blue'))
+
+    @property
+    def faces(self):
+        element = self.elements.get('face')
+        if element is None:
+            return None
+        # vertex_indices in most writers, vertex_index in some
+        return element.data[element.properties[0][0]]
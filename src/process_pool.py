@@ -0,0 +1,10 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def process_pool(processes=None, initializer=None, initargs=()):
+    # pools are started from loader threads of a Qt process; a forked child
+    # would inherit whatever locks the other threads hold at that moment,
+    # spawned ones start from a fresh interpreter
+    return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=initializer, initargs=initargs)
@@ -0,0 +1,114 @@
+import csv
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+import numpy as np
+
+# columns of a recorded frame; setup, loader and callback time is what ran
+# on any thread since the frame before
+FIELDS = ['time', 'paint_ms', 'items', 'draw_calls', 'sent_bytes', 'setup_ms', 'loader_ms', 'callback_ms']
+CATEGORIES = ['setup', 'loader', 'callback']
+
+
+class FrameProfiler():
+    # rolling per frame metrics of the viewer, the last max_frames frames are
+    # kept; every hook is a single check of enabled while it is off
+    def __init__(self, max_frames=1200) -> None:
+        self.enabled = False
+        self.frames = deque(maxlen=max_frames)
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.pending = dict.fromkeys(CATEGORIES, 0.)
+        # name -> [category, calls, seconds] since recording began
+        self.stages = {}
+
+    def set_enabled(self, enabled):
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def reset(self):
+        with self.lock:
+            self.frames.clear()
+            self.start = time.perf_counter()
+            self.pending = dict.fromkeys(CATEGORIES, 0.)
+            self.stages = {}
+
+    def add(self, category, name, seconds):
+        # called from loader workers too
+        with self.lock:
+            self.pending[category] += seconds
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = [category, 0, 0.]
+            stage[1] += 1
+            stage[2] += seconds
+
+    def frame(self, paint_seconds, items, draw_calls, sent_bytes):
+        with self.lock:
+            pending, self.pending = self.pending, dict.fromkeys(CATEGORIES, 0.)
+        self.frames.append((time.perf_counter() - self.start, 1000. * paint_seconds, items, draw_calls, sent_bytes,
+                            1000. * pending['setup'], 1000. * pending['loader'], 1000. * pending['callback']))
+
+    def summary(self, window=1.):
+        # overlay text over the frames of the last window seconds
+        if not self.frames:
+            return 'no frames yet'
+        now = time.perf_counter() - self.start
+        recent = np.array([f for f in self.frames if f[0] >= now - window] or [self.frames[-1]])
+        paint = recent[:, 1]
+        last = self.frames[-1]
+        return '\n'.join([
+            '%.1f fps  paint %.1f ms  p95 %.1f ms  max %.1f ms' % (
+                len(recent) / window, paint.mean(), np.percentile(paint, 95), paint.max()),
+            '%d items  %d draw calls  %.1f MB sent' % (last[2], last[3], last[4] / 2**20),
+            'setup %.1f  loader %.1f  callbacks %.1f ms/s' % tuple(recent[:, 5:].sum(axis=0) / window),
+        ])
+
+    def export(self, path):
+        # .json gets the per stage totals as well, anything else is CSV of the frames
+        if os.path.splitext(path)[1].lower() == '.json':
+            self.export_json(path)
+        else:
+            self.export_csv(path)
+
+    def export_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            writer.writerows(list(self.frames))
+
+    def export_json(self, path):
+        with self.lock:
+            stages = dict((name, dict(category=category, calls=calls, seconds=seconds))
+                          for name, (category, calls, seconds) in self.stages.items())
+        with open(path, 'w') as f:
+            json.dump(dict(fields=FIELDS, frames=list(self.frames), stages=stages), f, indent=1)
+
+
+# DRONECENTER_PROFILE=1 records from startup, DRONECENTER_PROFILE_OUTPUT
+# names a .csv or .json the main window exports to when it closes
+profiler = FrameProfiler()
+profiler.set_enabled(os.environ.get('DRONECENTER_PROFILE', '0') == '1')
+
+
+def profiled(category):
+    # times every call of the function into category while recording
+    def decorate(fn):
+        name = fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.add(category, name, time.perf_counter() - start)
+        return wrapper
+    return decorate
@@ -0,0 +1,99 @@
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+# magic, format version, reserved, manifest offset, manifest length
+HEADER = struct.Struct('<8sIIQQ')
+MAGIC = b'DCPROJ\r\n'
+VERSION = 1
+# chunks start on cache line boundaries so every array can be viewed in place
+ALIGN = 64
+# arrays are written this many bytes at a time, a memory-mapped source is never copied whole
+BLOCK_BYTES = 64 << 20
+
+
+def _pack(value, chunks):
+    # numpy arrays anywhere in value become references to chunks
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject or value.dtype.names is not None:
+            raise ValueError('can not store %s arrays in a project' % value.dtype)
+        chunks.append(value)
+        return {'__array__': len(chunks) - 1}
+    if isinstance(value, dict):
+        return {key: _pack(v, chunks) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_pack(v, chunks) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _unpack(value, arrays):
+    if isinstance(value, dict):
+        if '__array__' in value:
+            return arrays[value['__array__']]
+        return {key: _unpack(v, arrays) for key, v in value.items()}
+    if isinstance(value, list):
+        return [_unpack(v, arrays) for v in value]
+    return value
+
+
+def _write_array(f, array):
+    array = np.asarray(array)
+    if array.flags.c_contiguous:
+        f.write(array.reshape(-1).view(np.uint8))
+        return
+    rows = max(1, BLOCK_BYTES // max(1, array[:1].nbytes))
+    for start in range(0, len(array), rows):
+        f.write(np.ascontiguousarray(array[start:start + rows]).reshape(-1).view(np.uint8))
+
+
+def write_project(path, state):
+    # state is a JSON document apart from numpy arrays anywhere in it, the
+    # arrays are stored as raw aligned chunks that read_project maps instead
+    # of reading. written next to path and renamed, an open project mapping
+    # the old file keeps reading the old one
+    chunks = []
+    manifest = dict(state=_pack(state, chunks), chunks=[])
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.dcproj')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(bytes(HEADER.size))
+            for array in chunks:
+                f.write(bytes(-f.tell() % ALIGN))
+                manifest['chunks'].append(dict(offset=f.tell(), dtype=array.dtype.str, shape=list(array.shape)))
+                _write_array(f, array)
+            offset = f.tell()
+            text = json.dumps(manifest).encode()
+            f.write(text)
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, 0, offset, len(text)))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_project(path):
+    # the state written by write_project, its arrays are read-only views of the mapped file
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size or not header[:len(MAGIC)] == MAGIC:
+        raise ValueError('%s is not a project file' % path)
+    _, version, _, offset, length = HEADER.unpack(header)
+    if version > VERSION:
+        raise ValueError('%s was written by a newer version (%d)' % (path, version))
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    manifest = json.loads(bytes(data[offset:offset + length]))
+    arrays = []
+    for chunk in manifest['chunks']:
+        dtype = np.dtype(chunk['dtype'])
+        nbytes = int(np.prod(chunk['shape'], dtype=np.int64)) * dtype.itemsize
+        start = chunk['offset']
+        arrays.append(data[start:start + nbytes].view(dtype).reshape(chunk['shape']))
+    return _unpack(manifest['state'], arrays)
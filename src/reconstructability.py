@@ -0,0 +1,116 @@
+import numpy as np
+
+import visibility
+from process_pool import process_pool
+
+# pair weights of Smith et al. 2018: w1 rewards parallax for triangulation,
+# w3 penalizes it for matching, w2 falls off with distance up to d_max
+K1 = 32.
+ALPHA1 = np.pi / 16
+ALPHA3 = np.pi / 4
+
+
+def entry_arrays(matrix):
+    # (sample, view) of every visible pair, grouped by sample
+    indptr, views = matrix.transposed()
+    samples = np.repeat(np.arange(matrix.shape[1], dtype=np.int32), np.diff(indptr))
+    return indptr, samples, views
+
+
+def partner_counts(indptr):
+    # entry p of a sample seen k times is paired with the k - p - 1 entries after it
+    counts = np.diff(indptr)
+    position = np.arange(indptr[-1]) - np.repeat(indptr[:-1], counts)
+    return np.repeat(counts, counts) - position - 1
+
+
+def pair_blocks(partners, chunk_size):
+    # splits the entries into runs with at most chunk_size pairs each, a run
+    # holds at least one entry, so chunk_size below the views of a sample only
+    # makes the runs single entries
+    total = np.cumsum(partners)
+    blocks, start = [], 0
+    while start < len(partners):
+        done = total[start - 1] if start else 0
+        stop = max(int(np.searchsorted(total, done + chunk_size, side='right')), start + 1)
+        blocks.append((start, stop))
+        start = stop
+    return blocks
+
+
+def score_pairs(first, second, entry_sample, entry_view, samples, centers, normals, d_max):
+    sample = entry_sample[first]
+    point = samples[sample]
+    vi = centers[entry_view[first]] - point
+    vj = centers[entry_view[second]] - point
+    di = np.sqrt(np.einsum('ij,ij->i', vi, vi))
+    dj = np.sqrt(np.einsum('ij,ij->i', vj, vj))
+    alpha = np.arccos(np.clip(np.einsum('ij,ij->i', vi, vj) / (di * dj), -1., 1.))
+    w1 = 1. / (1. + np.exp(-K1 * (alpha - ALPHA1)))
+    w2 = 1. - np.minimum(np.maximum(di, dj) / d_max, 1.)
+    w3 = 1. - np.minimum(alpha / ALPHA3, 1.)
+    score = w1 * w2 * w3
+    if normals is not None:
+        # cosine of the larger of the two angles to the surface normal
+        normal = normals[sample]
+        cos_theta = np.minimum(np.einsum('ij,ij->i', normal, vi) / di, np.einsum('ij,ij->i', normal, vj) / dj)
+        score *= np.clip(cos_theta, 0., None)
+    return sample, score
+
+
+def score_block(start, stop, partners, entry_sample, entry_view, samples, centers, normals, d_max):
+    # (first sample, summed scores of the samples start .. stop touch)
+    count = partners[start:stop]
+    first = np.repeat(np.arange(start, stop), count)
+    offset = np.arange(len(first)) - np.repeat(np.cumsum(count) - count, count)
+    sample, score = score_pairs(first, first + 1 + offset, entry_sample, entry_view, samples, centers, normals, d_max)
+    low = int(entry_sample[start])
+    high = int(entry_sample[stop - 1]) + 1
+    return low, np.bincount(sample - low, weights=score, minlength=high - low)
+
+
+# state of a pool process, sent once per worker
+_worker = {}
+
+
+def _init_worker(partners, entry_sample, entry_view, samples, centers, normals, d_max):
+    _worker.update(partners=partners, entry_sample=entry_sample, entry_view=entry_view,
+                   samples=samples, centers=centers, normals=normals, d_max=d_max)
+
+
+def _score_block(block):
+    w = _worker
+    return score_block(block[0], block[1], w['partners'], w['entry_sample'], w['entry_view'],
+                       w['samples'], w['centers'], w['normals'], w['d_max'])
+
+
+def score_samples(samples, trajectory, matrix=None, intrinsics=None, normals=None, d_max=60.,
+                  chunk_size=1 << 18, processes=1):
+    # reconstructability of every sample, the sum of the pair weights over all
+    # pairs of viewpoints that see it. pairs are enumerated chunk_size at a
+    # time, which bounds the memory; processes != 1 spreads the chunks over a
+    # process pool. without a VisibilityMatrix the camera frustum decides
+    samples = np.ascontiguousarray(samples, dtype=np.float64)
+    centers = trajectory.positions()
+    if matrix is None:
+        matrix = visibility.compute_visibility(None, None, samples, trajectory, intrinsics)
+    if normals is not None:
+        normals = np.asarray(normals, dtype=np.float64)
+        normals = normals / np.maximum(np.linalg.norm(normals, axis=1), 1e-12)[:, None]
+
+    scores = np.zeros(len(samples))
+    indptr, entry_sample, entry_view = entry_arrays(matrix)
+    if len(entry_sample) == 0:
+        return scores
+    partners = partner_counts(indptr)
+    blocks = [(start, stop) for start, stop in pair_blocks(partners, chunk_size) if partners[start:stop].any()]
+    init = (partners, entry_sample, entry_view, samples, centers, normals, d_max)
+    if processes == 1 or len(blocks) <= 1:
+        # inline runs keep their state local, loader threads may run several at once
+        results = [score_block(start, stop, *init) for start, stop in blocks]
+    else:
+        with process_pool(processes, _init_worker, init) as pool:
+            results = list(pool.map(_score_block, blocks))
+    for low, block_scores in results:
+        scores[low:low + len(block_scores)] += block_scores
+    return scores
@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PySide6.QtCore import QObject, Signal
+
+from octree import boxes_in_frustum
+
+# bump when the meaning of the index changes
+INDEX_VERSION = 1
+# resident bytes per face of a tile not read yet: the face indexed vertex and
+# normal arrays the viewer draws, the faces and vertices, and LOD levels
+BYTES_PER_FACE = 100
+
+
+class TileIndex():
+    # tile files of one scene and their bounding boxes, paths in the JSON
+    # file are relative to it
+    def __init__(self, paths, lo, hi, faces) -> None:
+        self.paths = list(paths)
+        self.lo = np.asarray(lo, dtype=np.float64).reshape(-1, 3)
+        self.hi = np.asarray(hi, dtype=np.float64).reshape(-1, 3)
+        self.faces = np.asarray(faces, dtype=np.int64)
+
+    @classmethod
+    def read(cls, index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+        if index.get('version', 1) > INDEX_VERSION:
+            raise ValueError('%s was written by a newer version' % index_path)
+        root = os.path.dirname(os.path.abspath(index_path))
+        tiles = index['tiles']
+        return cls([os.path.join(root, tile['path']) for tile in tiles], [tile['lo'] for tile in tiles],
+                   [tile['hi'] for tile in tiles], [tile.get('faces', 0) for tile in tiles])
+
+    @classmethod
+    def from_arrays(cls, paths, arrays):
+        # arrays is a list of dict(vertices, faces), one per tile
+        return cls(paths, [np.min(a['vertices'], axis=0) for a in arrays], [np.max(a['vertices'], axis=0) for a in arrays],
+                   [len(a['faces']) for a in arrays])
+
+    def write(self, index_path):
+        root = os.path.dirname(os.path.abspath(index_path))
+        tiles = [dict(path=os.path.relpath(path, root), lo=lo.tolist(), hi=hi.tolist(), faces=int(faces))
+                 for path, lo, hi, faces in zip(self.paths, self.lo, self.hi, self.faces)]
+        with open(index_path, 'w') as f:
+            json.dump(dict(version=INDEX_VERSION, tiles=tiles), f, indent=1)
+
+    def len(self):
+        return len(self.paths)
+
+
+class TilePager(QObject):
+    # keeps the tiles nearest the camera among those in or near the view
+    # frustum resident within budget bytes. Tiles are read one at a time on
+    # a thread of its own; everything else runs on the Qt thread, the read
+    # tiles come back through sigRead
+    sigRead = Signal(int, object, int)        # tile, what read returned, resident bytes
+    sigFailed = Signal(int, str)              # tile, error message
+
+    def __init__(self, index, read, budget=1 << 30, margin=.25, parent=None) -> None:
+        super().__init__(parent)
+        # read(path) returns (tile, resident bytes), it runs on the paging thread
+        self.index, self.read, self.budget, self.margin = index, read, budget, margin
+        self.pool = ThreadPoolExecutor(max_workers=1)
+        self.lock = threading.Lock()
+        self.resident = {}
+        self.resident_bytes = {}
+        self.jobs = {}
+        self.failed = {}
+        self.plan = frozenset()
+        self.distance = np.zeros(index.len())
+
+    def update(self, planes, eye):
+        # plans the resident set for a camera, queues the reads it is missing
+        # and returns the (number, tile) evicted to stay within budget
+        pad = self.margin * (self.index.hi - self.index.lo)
+        near = boxes_in_frustum(planes, self.index.lo - pad, self.index.hi + pad)
+        self.distance = np.linalg.norm(np.clip(eye, self.index.lo, self.index.hi) - eye, axis=1)
+        for number in self.failed:
+            near[number] = False
+        order = np.flatnonzero(near)
+        order = order[np.argsort(self.distance[order], kind='stable')]
+        cost = self.index.faces[order] * BYTES_PER_FACE
+        for i, number in enumerate(order.tolist()):
+            cost[i] = self.resident_bytes.get(number, cost[i])
+        plan = order[np.cumsum(cost) <= self.budget].tolist()
+        self.plan = frozenset(plan)
+        # reads not started yet of tiles that left the plan are dropped
+        with self.lock:
+            for number, future in list(self.jobs.items()):
+                if number not in self.plan and future.cancel():
+                    del self.jobs[number]
+            for number in plan:
+                if number not in self.resident and number not in self.jobs:
+                    self.jobs[number] = self.pool.submit(self.read_tile, number)
+        return self.evict()
+
+    def read_tile(self, number):
+        if number not in self.plan:
+            with self.lock:
+                self.jobs.pop(number, None)
+            return
+        try:
+            tile, nbytes = self.read(self.index.paths[number])
+        except Exception as e:
+            self.sigFailed.emit(number, str(e))
+            return
+        self.sigRead.emit(number, tile, nbytes)
+
+    def accept(self, number, tile, nbytes):
+        # a read tile is kept when the current plan still has it, returns
+        # whether it was and the (number, tile) evicted to make room
+        with self.lock:
+            self.jobs.pop(number, None)
+        if number not in self.plan:
+            return False, []
+        self.resident[number] = tile
+        self.resident_bytes[number] = nbytes
+        return True, self.evict()
+
+    def fail(self, number, message):
+        with self.lock:
+            self.jobs.pop(number, None)
+        self.failed[number] = message
+
+    def evict(self):
+        # farthest tiles outside the plan go first, those in it are never evicted
+        total = sum(self.resident_bytes.values())
+        evicted = []
+        outside = [number for number in self.resident if number not in self.plan]
+        for number in sorted(outside, key=lambda number: -self.distance[number]):
+            if total <= self.budget:
+                break
+            total -= self.resident_bytes.pop(number)
+            evicted.append((number, self.resident.pop(number)))
+        return evicted
+
+    def nbytes(self):
+        return sum(self.resident_bytes.values())
+
+    def is_busy(self):
+        return len(self.jobs) > 0
+
+    def shutdown(self):
+        with self.lock:
+            for future in self.jobs.values():
+                future.cancel()
+            self.jobs = {}
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,135 @@
+import numpy as np
+
+import camera
+from bvh import build_bvh
+from asset_cache import default_cache
+from process_pool import process_pool
+
+
+class VisibilityMatrix():
+    # sparse (views, samples) visibility in CSR layout: the samples view i
+    # sees are indices[indptr[i]:indptr[i + 1]], in increasing order
+    def __init__(self, indptr, indices, shape) -> None:
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.shape = tuple(int(n) for n in shape)
+        self._transposed = None
+
+    @staticmethod
+    def from_counts(counts, indices, shape):
+        return VisibilityMatrix(np.concatenate(([0], np.cumsum(counts))), indices, shape)
+
+    @staticmethod
+    def from_arrays(arrays):
+        return VisibilityMatrix(arrays['indptr'], arrays['indices'], arrays['shape'])
+
+    def arrays(self):
+        return dict(indptr=self.indptr, indices=self.indices, shape=np.array(self.shape))
+
+    def nnz(self):
+        return len(self.indices)
+
+    def samples_of(self, view):
+        return self.indices[self.indptr[view]:self.indptr[view + 1]]
+
+    def views_of(self, sample):
+        indptr, views = self.transposed()
+        return views[indptr[sample]:indptr[sample + 1]]
+
+    def transposed(self):
+        # CSC layout, built on the first query by sample
+        if self._transposed is None:
+            views = np.repeat(np.arange(self.shape[0], dtype=np.int32), np.diff(self.indptr))
+            order = np.argsort(self.indices, kind='stable')
+            counts = np.bincount(self.indices, minlength=self.shape[1])
+            self._transposed = (np.concatenate(([0], np.cumsum(counts))), views[order])
+        return self._transposed
+
+    def view_counts(self):
+        return np.diff(self.indptr)
+
+    def sample_counts(self):
+        return np.bincount(self.indices, minlength=self.shape[1])
+
+    def to_scipy(self):
+        from scipy.sparse import csr_matrix
+        return csr_matrix((np.ones(self.nnz(), dtype=bool), self.indices, self.indptr), shape=self.shape)
+
+
+def visible_samples(bvh, samples, rotations, centers, intrinsics, max_distance=None,
+                    tolerance=1e-3, block=1 << 21):
+    # (counts, indices) of the samples each view sees. views are culled against
+    # the camera frustum block views at a time, so at most block view-sample
+    # pairs are held; the survivors are cast as segments from the camera to the
+    # sample, which is occluded by any hit before 1 - tolerance of the way.
+    # without a bvh only the frustum is tested
+    views_per_block = max(1, block // max(len(samples), 1))
+    counts, indices = [], []
+    for start in range(0, len(centers), views_per_block):
+        block_rotations = rotations[start:start + views_per_block]
+        block_centers = centers[start:start + views_per_block]
+        local = camera.to_camera(block_rotations, block_centers, samples)
+        view, sample = np.nonzero(camera.in_fov(local, intrinsics, max_distance))
+        del local
+        if bvh is not None:
+            origins = block_centers[view]
+            visible = ~bvh.occluded(origins, samples[sample] - origins, 1. - tolerance)
+            view, sample = view[visible], sample[visible]
+        counts.append(np.bincount(view, minlength=len(block_centers)))
+        indices.append(sample.astype(np.int32))
+    if not counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32)
+    return np.concatenate(counts), np.concatenate(indices)
+
+
+# state of a pool process, the mesh and samples are sent once per worker
+_worker = {}
+
+
+def _init_worker(vertices, faces, samples):
+    _worker['bvh'] = build_bvh(vertices, faces) if faces is not None else None
+    _worker['samples'] = samples
+
+
+def _visible_samples(args):
+    return visible_samples(_worker['bvh'], _worker['samples'], *args)
+
+
+def compute_visibility(vertices, faces, samples, trajectory, intrinsics, max_distance=None,
+                       tolerance=1e-3, views_per_task=64, processes=None, use_cache=True):
+    # VisibilityMatrix of every viewpoint of trajectory against every sample;
+    # chunks of views_per_task views run on a process pool, processes=1 runs
+    # inline. results are cached on the inputs, a repeated query is a lookup.
+    # faces=None skips the occlusion test
+    samples = np.ascontiguousarray(samples, dtype=np.float64)
+    rotations = camera.camera_rotations(trajectory)
+    centers = trajectory.positions()
+    shape = (len(centers), len(samples))
+
+    cache = default_cache() if use_cache else None
+    if cache is not None:
+        arrays = [a for a in (vertices, faces) if a is not None] + [samples, rotations, centers]
+        key = cache.data_key('visibility', arrays, '%r:%s:%r:%r:%r' % (
+            faces is not None, intrinsics.name, intrinsics.tan_half_fov(), max_distance, tolerance))
+        arrays = cache.get_entry(key)
+        if arrays is not None:
+            return VisibilityMatrix.from_arrays(arrays)
+
+    if len(centers) == 0 or len(samples) == 0:
+        matrix = VisibilityMatrix(np.zeros(len(centers) + 1), np.zeros(0), shape)
+    else:
+        chunks = [(rotations[start:start + views_per_task], centers[start:start + views_per_task],
+                   intrinsics, max_distance, tolerance) for start in range(0, len(centers), views_per_task)]
+        if processes == 1 or len(chunks) == 1:
+            # inline runs keep their state local, loader threads may run several at once
+            bvh = build_bvh(vertices, faces) if faces is not None else None
+            results = [visible_samples(bvh, samples, *chunk) for chunk in chunks]
+        else:
+            with process_pool(processes, _init_worker, (vertices, faces, samples)) as pool:
+                results = list(pool.map(_visible_samples, chunks))
+        matrix = VisibilityMatrix.from_counts(np.concatenate([counts for counts, _ in results]),
+                                              np.concatenate([indices for _, indices in results]), shape)
+
+    if cache is not None:
+        cache.put_entry(key, matrix.arrays())
+    return matrix